@@ -61,6 +61,11 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
+# Per-request query counts / Server-Timing headers, off unless asked for
+QUERY_PROFILING = os.environ.get('QUERY_PROFILING') == '1'
+if QUERY_PROFILING:
+    MIDDLEWARE.append('core.middleware.QueryProfilingMiddleware')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
@@ -124,6 +129,13 @@ COMPREFACE_HOST = os.environ.get('COMPREFACE_HOST')
 COMPREFACE_PORT = os.environ.get('COMPREFACE_PORT')
 COMPREFACE_API_KEY = os.environ.get('COMPREFACE_API_KEY')
 COMPREFACE_ADD_FACE_URL = f"{COMPREFACE_HOST}:{COMPREFACE_PORT}/api/v1/recognition/faces"
+# Registration embeddings come from the detection service, the same calculator the edge devices use
+COMPREFACE_DETECTION_API_KEY = os.environ.get('COMPREFACE_DETECTION_API_KEY')
+COMPREFACE_DETECT_URL = f"{COMPREFACE_HOST}:{COMPREFACE_PORT}/api/v1/detection/detect"
+COMPREFACE_CALCULATOR = os.environ.get('COMPREFACE_CALCULATOR', 'facenet.Calculator')
+
+# Recognition edge devices authenticate with a shared key (X-Edge-Key header)
+EDGE_API_KEY = os.environ.get('EDGE_API_KEY')
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -8,6 +8,8 @@ from .models import PartnerUni, Semester, Module, ClassSession, ClassRoom, Atten
 from .models import Notification, News, Event, Announcement
 # Requests
 from .models import LeaveRequest, AttendanceAppeal
+# Sync
+from .models import SyncTombstone, SyncMarker
 
 class CustomUserAdmin(UserAdmin):
     # Field for editing 
@@ -73,3 +75,5 @@ admin.site.register(Event)
 admin.site.register(Announcement)
 admin.site.register(LeaveRequest)
 admin.site.register(AttendanceAppeal)
+admin.site.register(SyncTombstone)
+admin.site.register(SyncMarker)
\ No newline at end of file
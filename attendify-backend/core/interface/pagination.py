@@ -0,0 +1,78 @@
+from django.core.paginator import Paginator, EmptyPage
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.response import Response
+from core.services.admin_services import AdminService
+
+
+class EstimatedCountPaginator(Paginator):
+    # Uses planner statistics instead of SELECT COUNT(*) on large tables.
+    # The estimate can be off either way, so it is corrected as soon as a page proves it wrong
+    count_is_exact = False
+
+    @cached_property
+    def count(self):
+        return AdminService.estimate_count(self.object_list)
+
+    def use_exact_count(self, count=None):
+        self.__dict__['count'] = self.object_list.count() if count is None else count
+        self.__dict__.pop('num_pages', None)
+        self.__dict__.pop('page_range', None)
+        self.count_is_exact = True
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_is_exact:
+                raise
+            # Underestimated: the rows may go on past the estimated last page
+            self.use_exact_count()
+            return super().validate_number(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page])
+
+        if len(rows) < self.per_page and not self.count_is_exact:
+            if rows or number == 1:
+                # A short page is the last one, which gives the exact count for free
+                self.use_exact_count(bottom + len(rows))
+            else:
+                # Overestimated: past the real last page
+                self.use_exact_count()
+                super().validate_number(number)
+
+        return self._get_page(rows, number, self)
+
+
+class AdminPageNumberPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, estimate_count=False):
+        self.estimate_count = estimate_count
+        if estimate_count:
+            self.django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_is_estimate'] = self.estimate_count and not getattr(self.page.paginator, 'count_is_exact', True)
+        return response
+
+
+class AdminCursorPagination(CursorPagination):
+    # Keyset on the primary key: no COUNT, no OFFSET scans on deep pages
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'pk'
+
+
+def get_admin_paginator(query_params):
+    if query_params.get('pagination') == 'cursor':
+        return AdminCursorPagination()
+
+    return AdminPageNumberPagination(estimate_count=query_params.get('count') == 'estimate')
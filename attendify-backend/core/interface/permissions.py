@@ -0,0 +1,12 @@
+import hmac
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class HasEdgeApiKey(BasePermission):
+    message = "Invalid edge key."
+
+    def has_permission(self, request, view):
+        expected = settings.EDGE_API_KEY
+        provided = request.headers.get('X-Edge-Key', '')
+        return bool(expected) and hmac.compare_digest(provided, expected)
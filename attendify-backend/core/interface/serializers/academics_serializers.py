@@ -49,6 +49,36 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class AttendanceHistorySessionSerializer(serializers.ModelSerializer):
+    module = serializers.SerializerMethodField()
+    venue = serializers.CharField(source='venue.name', read_only=True, default="TBA")
+
+    class Meta:
+        model = ClassSession
+        fields = ['id', 'name', 'type', 'date', 'start_time', 'end_time', 'status', 'module', 'venue']
+
+    def get_module(self, obj):
+        return {
+            "code": obj.module.code,
+            "name": obj.module.name
+        }
+
+
+class AttendanceHistorySerializer(serializers.ModelSerializer):
+    # Compact row for the history list: no per-row aggregates, no nested student
+    session = AttendanceHistorySessionSerializer(read_only=True)
+
+    class Meta:
+        model = AttendanceRecord
+        fields = ['id', 'status', 'entry_time', 'exit_time', 'remarks', 'duration', 'session']
+
+
+class SyncAttendanceRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttendanceRecord
+        fields = ['id', 'session', 'status', 'entry_time', 'exit_time', 'remarks', 'duration', 'updated_at']
+
+
 class FaceRecognitionSerializer(serializers.Serializer):
     student_id = serializers.CharField(max_length=50)
     venue = serializers.CharField(max_length=50)
@@ -72,7 +102,8 @@ class TimeTableSerializer(serializers.ModelSerializer):
             'status', 
             'module',     
             'venue',  
-            'attendance' 
+            'attendance',
+            'updated_at'
         ]
 
     def get_module(self, obj):
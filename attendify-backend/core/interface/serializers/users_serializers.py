@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from core.models import User, Admin, Lecturer, Student, PartnerUni
+from core.models import User, Admin, Lecturer, Student, PartnerUni, FaceEmbedding
 
 class PartnerUniSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,4 +49,36 @@ class MultiFaceEmbeddingSerializer(serializers.Serializer):
             min_length=128,
             max_length=4096
         )
-    )
\ No newline at end of file
+    )
+    poses = serializers.ListField(
+        child=serializers.ChoiceField(choices=FaceEmbedding.POSE_CHOICES),
+        required=False
+    )
+
+
+class FaceIdentifySerializer(serializers.Serializer):
+    embeddings = serializers.ListField(
+        child=serializers.ListField(
+            child=serializers.FloatField(),
+            min_length=128,
+            max_length=4096
+        ),
+        min_length=1,
+        max_length=32
+    )
+    venue = serializers.CharField(max_length=50, required=False)
+    at = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=10, default=1)
+    threshold = serializers.FloatField(min_value=0, max_value=1, default=0.8)
+
+
+class FaceGallerySerializer(serializers.ModelSerializer):
+    student_id = serializers.CharField(source='student.student_id', read_only=True)
+    embedding = serializers.SerializerMethodField()
+
+    class Meta:
+        model = FaceEmbedding
+        fields = ['id', 'student_id', 'pose', 'embedding']
+
+    def get_embedding(self, obj):
+        return [float(value) for value in obj.embedding]
@@ -5,6 +5,7 @@ from .views import communication_views
 from .views import academics_views
 from .views import requests_views
 from .views import admin_views
+from .views import sync_views
 
 
 urlpatterns = [
@@ -31,7 +32,11 @@ urlpatterns = [
     path('get-reschedule-options/', academics_views.get_reschedule_options, name='get-reschedule-options'),
     path('reschedule-class/', academics_views.reschedule_class, name='reschedule-class'),
     path('mark-attendance/', academics_views.mark_attendance, name='mark-attendance'),
+    path('session-roster/', academics_views.get_session_roster, name='session-roster'),
+    path('venue-schedule/', academics_views.get_venue_schedule, name='venue-schedule'),
     path('register-face/', academics_views.register_face, name='register-face'),
+    path('face-embeddings/', academics_views.store_face_embeddings, name='face-embeddings'),
+    path('identify-face/', academics_views.identify_face, name='identify-face'),
 
     # Communication
     path('newsevent/', communication_views.get_newsevent, name='newsevent'),
@@ -42,6 +47,10 @@ urlpatterns = [
     path('notifications/mark-read/', communication_views.mark_notifications_read, name='mark-read'),
     path('notifications/<int:pk>/mark-read/', communication_views.mark_single_notifications_read, name='mark-one-read'),
 
+    # Sync
+    path('sync/', sync_views.sync, name='sync'),
+    path('face-gallery/', sync_views.face_gallery, name='face-gallery'),
+
     # Requests
     path('leaves/', requests_views.get_leaves, name='leaves'),
     path('appeals/', requests_views.get_student_appeals, name='appeals'),
@@ -55,6 +64,7 @@ urlpatterns = [
     # Custom
     path('admin/semester-attendance/<str:student_id>/', admin_views.get_student_semester_attendance, name='student-semester-attendance'),
     path('admin/get-document-url/', admin_views.get_secure_document_url, name='get_secure_document_url'),
+    path('admin/cache-metrics/', admin_views.get_cache_metrics, name='cache-metrics'),
     # Users
     path('admin/crud/users/', admin_views.users_list, name='crud-users-list'),
     path('admin/crud/users/<int:pk>/', admin_views.users_detail, name='crud-users-detail'),
@@ -3,12 +3,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.utils import timezone
 from core.models import Student, ClassSession, Lecturer
 from core.services.academics_services import AcademicService
+from core.services.cache_services import DashboardCacheService, ScheduleVersionService
+from core.logic.academics_logics import AcademicLogic
+from core.interface.permissions import HasEdgeApiKey
 # Serializers
-from core.interface.serializers.academics_serializers import ClassSessionSerializer, AttendanceRecordSerializer, TimeTableSerializer, FaceRecognitionSerializer
+from core.interface.serializers.academics_serializers import ClassSessionSerializer, AttendanceHistorySerializer, TimeTableSerializer, FaceRecognitionSerializer
 from core.interface.serializers.communication_serializers import AnnouncementSerializer
-from core.interface.serializers.users_serializers import MultiFaceEmbeddingSerializer
+from core.interface.serializers.users_serializers import MultiFaceEmbeddingSerializer, FaceIdentifySerializer
 
 
 @api_view(['GET'])
@@ -19,14 +24,30 @@ def get_dashboard(request):
 
     try:
         if user.role_type == 'student':
-            data = service.get_student_dashboard(user)
+            cache_service = DashboardCacheService()
+
+            def build_student_payload():
+                data = service.get_student_dashboard(user)
+                return {
+                    "attendance_rate": data['attendance_rate'],
+                    "today_classes": ClassSessionSerializer(data['todays_sessions'], many=True).data,
+                    "upcoming_classes": ClassSessionSerializer(data['upcoming_sessions'], many=True).data
+                }
+
+            payload = cache_service.get_student_payload(user.id, build_student_payload)
+            announcements = cache_service.get_announcements(
+                lambda: AnnouncementSerializer(service.get_recent_announcements(), many=True).data
+            )
+            semester_range = cache_service.get_semester_range(service.get_semester_range)
 
             return Response({
-                "attendance_rate": data['attendance_rate'],
-                "semester_range": data['semester_range'],
-                "announcements" : AnnouncementSerializer(data['announcements'], many=True).data,
-                "today_classes": ClassSessionSerializer(data['todays_sessions'], many=True).data,
-                "upcoming_classes": ClassSessionSerializer(data['upcoming_sessions'], many=True).data
+                "attendance_rate": payload['attendance_rate'],
+                "semester_range": semester_range,
+                "announcements" : announcements,
+                "today_classes": payload['today_classes'],
+                "upcoming_classes": AcademicLogic.filter_upcoming_sessions(
+                    payload['upcoming_classes'], timezone.localtime(timezone.now())
+                )
             })
 
         elif user.role_type == 'lecturer':
@@ -41,7 +62,9 @@ def get_dashboard(request):
                 "today_sessions": ClassSessionSerializer(data['today_sessions'], many=True).data,
                 "week_sessions": ClassSessionSerializer(data['week_sessions'], many=True).data,
                 "next_class": next_class_data,
-                "announcements": AnnouncementSerializer(data['announcements'], many=True).data
+                "announcements": DashboardCacheService().get_announcements(
+                    lambda: AnnouncementSerializer(data['announcements'], many=True).data
+                )
             })
         else:
             return Response({"error": "Role not supported"}, status=403)
@@ -58,11 +81,34 @@ def get_dashboard(request):
 @permission_classes([IsAuthenticated])
 def get_timetable(request):
     service = AcademicService()
+    user = request.user
 
     try:
-        sessions = service.get_timetable(request.user)
+        today = timezone.localtime(timezone.now()).date()
+        is_valid, result = AcademicLogic.validate_timetable_window(
+            request.query_params.get('start'),
+            request.query_params.get('end'),
+            today
+        )
+
+        if not is_valid:
+            return Response({"error": result}, status=400)
+        
+        start_date, end_date = result
+
+        # Answered from the version counter alone, without touching the session table
+        version = ScheduleVersionService().get_version(user.id)
+        headers = {"Cache-Control": "private, no-cache"}
+
+        # No version (cache down): always send the full timetable, never a 304
+        if version is not None:
+            headers["ETag"] = AcademicLogic.build_schedule_etag(user.id, version, start_date, end_date)
+            if AcademicLogic.etag_matches(request.headers.get('If-None-Match'), headers["ETag"]):
+                return Response(status=304, headers=headers)
 
-        return Response(TimeTableSerializer(sessions, many=True).data)
+        sessions = service.get_timetable(user, start_date, end_date)
+
+        return Response(TimeTableSerializer(sessions, many=True).data, headers=headers)
 
     except (Student.DoesNotExist, Lecturer.DoesNotExist):
         return Response({"error": "Profile not found"}, status=404)
@@ -106,9 +152,23 @@ def get_attendance_history(request):
     service = AcademicService()
 
     try:
-        records = service.get_attendance_history(request.user)
+        is_valid, position = AcademicLogic.decode_history_cursor(request.query_params.get('cursor'))
+        if not is_valid:
+            return Response({"error": position}, status=400)
+
+        page_size = AcademicLogic.get_page_size(request.query_params.get('page_size'))
+        records, has_more = service.get_attendance_history(request.user, position, page_size)
+
+        # Only the token: an absolute URL built here would say http:// behind the TLS proxy
+        next_cursor = None
+        if has_more:
+            last = records[-1]
+            next_cursor = AcademicLogic.encode_history_cursor(last.session.date, last.id)
 
-        return Response(AttendanceRecordSerializer(records, many=True).data)
+        return Response({
+            "next_cursor": next_cursor,
+            "results": AttendanceHistorySerializer(records, many=True).data
+        })
 
     except Student.DoesNotExist:
         return Response({"error": "This user is not a Student"}, status=403)
@@ -173,6 +233,67 @@ def mark_attendance(request):
         return Response({"error": str(e)}, status=400)
 
 
+@api_view(['GET'])
+@permission_classes([HasEdgeApiKey])
+def get_session_roster(request):
+    service = AcademicService()
+
+    venue = request.query_params.get('venue')
+    if not venue:
+        return Response({"error": "'venue' is required."}, status=400)
+
+    is_valid, at = AcademicLogic.parse_roster_time(request.query_params.get('at'), timezone.now())
+    if not is_valid:
+        return Response({"error": at}, status=400)
+
+    try:
+        roster = service.get_session_roster(venue, at)
+        session = roster['session']
+
+        return Response({
+            "venue": venue,
+            "session": {
+                "id": session.id,
+                "name": session.name,
+                "module": session.module.code,
+                "date": session.date,
+                "start_time": session.start_time,
+                "end_time": session.end_time
+            } if session else None,
+            "students": roster['students'],
+            "valid_until": roster['valid_until']
+        }, status=200)
+
+    except Exception as e:
+        print(f"Session Roster Error: {e}")
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([HasEdgeApiKey])
+def get_venue_schedule(request):
+    service = AcademicService()
+
+    venue = request.query_params.get('venue')
+    if not venue:
+        return Response({"error": "'venue' is required."}, status=400)
+
+    is_valid, at = AcademicLogic.parse_roster_time(request.query_params.get('at'), timezone.now())
+    if not is_valid:
+        return Response({"error": at}, status=400)
+
+    try:
+        return Response({
+            "venue": venue,
+            "date": at.date(),
+            "sessions": service.get_venue_schedule(venue, at.date())
+        }, status=200)
+
+    except Exception as e:
+        print(f"Venue Schedule Error: {e}")
+        return Response({"error": str(e)}, status=500)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
@@ -184,4 +305,59 @@ def register_face(request):
         return Response(result, status=201)
 
     except Exception as e:
-        return Response({"status": "error", "message": str(e)}, status=400)
\ No newline at end of file
+        return Response({"status": "error", "message": str(e)}, status=400)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def store_face_embeddings(request):
+    service = AcademicService()
+
+    serializer = MultiFaceEmbeddingSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+
+    try:
+        result = service.store_face_embeddings(
+            request.user,
+            serializer.validated_data['embeddings'],
+            serializer.validated_data.get('poses')
+        )
+        return Response(result, status=201)
+
+    except PermissionDenied as e:
+        return Response({"error": str(e.detail)}, status=403)
+    except ValidationError as e:
+        return Response({"error": str(e.detail[0])}, status=400)
+    except Exception as e:
+        print(f"Store Face Embeddings Error: {e}")
+        return Response({"error": str(e)}, status=500)
+
+
+@api_view(['POST'])
+@permission_classes([HasEdgeApiKey])
+def identify_face(request):
+    service = AcademicService()
+
+    serializer = FaceIdentifySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+
+    data = serializer.validated_data
+    at = timezone.localtime(data.get('at') or timezone.now())
+
+    try:
+        result = service.identify_faces(
+            data['embeddings'],
+            venue=data.get('venue'),
+            at=at,
+            limit=data['limit'],
+            threshold=data['threshold']
+        )
+        return Response(result, status=200)
+
+    except ValidationError as e:
+        return Response({"error": str(e.detail[0])}, status=400)
+    except Exception as e:
+        print(f"Identify Face Error: {e}")
+        return Response({"error": str(e)}, status=500)
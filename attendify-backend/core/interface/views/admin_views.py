@@ -4,8 +4,10 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from core.interface.pagination import get_admin_paginator
 # Import Service
 from core.services.admin_services import AdminService
+from core.services.cache_services import DashboardCacheService
 
 # Import all serializers
 from core.interface.serializers.admin_serializers import *
@@ -22,8 +24,7 @@ def create_crud_views(model_class, serializer_class):
         if request.method == 'GET':
             queryset = service.get_filtered_queryset(request.query_params)
 
-            paginator = PageNumberPagination()
-            paginator.page_size = 10
+            paginator = get_admin_paginator(request.query_params)
             page = paginator.paginate_queryset(queryset, request)
             
             if page is not None:
@@ -45,8 +46,14 @@ def create_crud_views(model_class, serializer_class):
     @permission_classes([IsAdminUser])
     @parser_classes([MultiPartParser, FormParser, JSONParser])
     def detail(request, pk):
+        service = AdminService(model_class)
+
         try:
-            item = model_class.objects.get(pk=pk)
+            # Annotated counts would be stale after a PATCH, so only reads use the plan
+            if request.method == 'GET':
+                item = service.get_item(pk)
+            else:
+                item = model_class.objects.get(pk=pk)
         except model_class.DoesNotExist:
             return Response({"error": "Not found"}, status=404)
 
@@ -108,6 +115,16 @@ def get_secure_document_url(request):
         return Response({"error": "Internal Server Error"}, status=500)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_cache_metrics(request):
+    try:
+        return Response(DashboardCacheService().get_metrics(), status=200)
+
+    except Exception as e:
+        return Response({"error": "Internal Server Error"}, status=500)
+
+
 # Users
 users_list, users_detail = create_crud_views(User, AdminUserSerializer)
 students_list, students_detail = create_crud_views(Student, AdminStudentSerializer)
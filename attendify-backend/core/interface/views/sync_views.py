@@ -0,0 +1,80 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from core.interface.permissions import HasEdgeApiKey
+from rest_framework.response import Response
+from core.models import Student, Lecturer
+from core.logic.sync_logics import SyncLogic
+# Import Services
+from core.services.sync_services import SyncService
+# Serializers
+from core.interface.serializers.academics_serializers import TimeTableSerializer, SyncAttendanceRecordSerializer
+from core.interface.serializers.communication_serializers import NotificationSerializer
+from core.interface.serializers.users_serializers import FaceGallerySerializer
+
+
+SYNC_SERIALIZERS = {
+    'timetable': TimeTableSerializer,
+    'notifications': NotificationSerializer,
+    'attendance': SyncAttendanceRecordSerializer,
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    service = SyncService()
+
+    try:
+        changes = service.sync(request.user, request.query_params)
+
+        response = {}
+        for resource, data in changes.items():
+            serializer_class = SYNC_SERIALIZERS[resource]
+            response[resource] = {
+                "changed": serializer_class(data['changed'], many=True).data,
+                "deleted": data['deleted'],
+                "cursor": data['cursor'],
+                "has_more": data['has_more'],
+                "reset": data['reset']
+            }
+
+        return Response(response, status=200)
+
+    except (Student.DoesNotExist, Lecturer.DoesNotExist):
+        return Response({"error": "Profile not found"}, status=404)
+
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    except Exception as e:
+        print(f"Sync Error: {e}")
+        return Response({"error": "Failed to sync"}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([HasEdgeApiKey])
+def face_gallery(request):
+    service = SyncService()
+
+    venue = request.query_params.get('venue')
+    if not venue:
+        return Response({"error": "'venue' is required."}, status=400)
+
+    is_valid, position = SyncLogic.decode_cursor(request.query_params.get('cursor'))
+    if not is_valid:
+        return Response({"error": position}, status=400)
+
+    try:
+        data = service.get_face_gallery(venue, position)
+
+        return Response({
+            "changed": FaceGallerySerializer(data['changed'], many=True).data,
+            "deleted": data['deleted'],
+            "cursor": data['cursor'],
+            "has_more": data['has_more'],
+            "reset": data['reset']
+        }, status=200)
+
+    except Exception as e:
+        print(f"Face Gallery Error: {e}")
+        return Response({"error": "Failed to sync face gallery"}, status=500)
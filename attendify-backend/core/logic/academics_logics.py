@@ -1,8 +1,14 @@
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import datetime, timedelta
+import hashlib
+import base64
 
 class AcademicLogic:
 
+    # Part of every timetable ETag: bump whenever TimeTableSerializer's output changes shape
+    SCHEDULE_PAYLOAD_VERSION = 2
+
     @staticmethod
     def get_upcoming_class_window():
         local_now = timezone.localtime(timezone.now())
@@ -54,3 +60,163 @@ class AcademicLogic:
 
         return earliest_allowed <= current_time <= latest_allowed
     
+
+    @staticmethod
+    def filter_upcoming_sessions(sessions, current_dt):
+        # Works on serialized sessions (ISO date / time strings)
+        today = current_dt.date().isoformat()
+        now_time = current_dt.time().strftime("%H:%M:%S")
+
+        return [
+            session for session in sessions
+            if session['date'] > today or
+            (session['date'] == today and session['start_time'] >= now_time)
+        ]
+    
+
+    @staticmethod
+    def validate_timetable_window(start_str, end_str, today):
+        # Default: 4 weeks back, 16 weeks ahead (roughly the rest of a semester)
+        try:
+            start_date = datetime.strptime(start_str, "%Y-%m-%d").date() if start_str else today - timedelta(days=28)
+            end_date = datetime.strptime(end_str, "%Y-%m-%d").date() if end_str else today + timedelta(days=112)
+        except ValueError:
+            return False, "Invalid date format. Use YYYY-MM-DD."
+
+        if start_date > end_date:
+            return False, "Start date cannot be after end date."
+
+        if (end_date - start_date).days > 190:
+            return False, "Date range cannot exceed 190 days."
+
+        return True, (start_date, end_date)
+    
+
+    @staticmethod
+    def build_schedule_etag(user_id, version, start_date, end_date):
+        raw = f"{AcademicLogic.SCHEDULE_PAYLOAD_VERSION}:{user_id}:{version}:{start_date.isoformat()}:{end_date.isoformat()}"
+        return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+    
+
+    @staticmethod
+    def etag_matches(if_none_match, etag):
+        if not if_none_match:
+            return False
+
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+    
+
+    @staticmethod
+    def encode_history_cursor(session_date, record_id):
+        raw = f"{session_date.isoformat()}|{record_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+
+    @staticmethod
+    def decode_history_cursor(cursor):
+        if not cursor:
+            return True, None
+
+        try:
+            raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return True, (datetime.strptime(raw_date, "%Y-%m-%d").date(), int(raw_id))
+        except (ValueError, UnicodeDecodeError):
+            return False, "Invalid cursor."
+        
+
+    @staticmethod
+    def get_page_size(raw_value, default=30, maximum=100):
+        try:
+            page_size = int(raw_value) if raw_value else default
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(page_size, maximum))
+    
+
+    @staticmethod
+    def parse_roster_time(raw_value, now):
+        if not raw_value:
+            return True, timezone.localtime(now)
+
+        parsed = parse_datetime(raw_value)
+        if parsed is None:
+            return False, "Invalid 'at' timestamp. Use ISO 8601."
+
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return True, timezone.localtime(parsed)
+    
+
+    @staticmethod
+    def get_roster_expiry(at, session, next_start):
+        # Edge refetches at this time: end of the class, or just before the next one opens
+        if session:
+            return timezone.make_aware(datetime.combine(session.date, session.end_time))
+
+        expiry = at + timedelta(minutes=15)
+        if next_start:
+            # Rosters open 30 minutes early, matching mark_attendance
+            opens = timezone.make_aware(datetime.combine(at.date(), next_start)) - timedelta(minutes=30)
+            expiry = max(at + timedelta(minutes=1), min(expiry, opens))
+        return expiry
+    
+
+    @staticmethod
+    def get_attendance_window(session):
+        # Attendance opens 30 minutes before the class, matching mark_attendance
+        start = timezone.make_aware(datetime.combine(session.date, session.start_time))
+        end = timezone.make_aware(datetime.combine(session.date, session.end_time))
+        return start - timedelta(minutes=30), end
+    
+
+    @staticmethod
+    def validate_face_embeddings(embeddings, poses, dimensions, allowed_poses):
+        if len(embeddings) != len(poses):
+            return False, f"Expected {len(poses)} embeddings, one per pose ({', '.join(poses)})."
+
+        if len(set(poses)) != len(poses) or not set(poses) <= set(allowed_poses):
+            return False, f"Poses must be distinct and one of: {', '.join(allowed_poses)}."
+
+        for pose, embedding in zip(poses, embeddings):
+            if len(embedding) != dimensions:
+                return False, f"Embedding for '{pose}' has {len(embedding)} dimensions, expected {dimensions}."
+
+        return True, list(zip(poses, embeddings))
+    
+
+    @staticmethod
+    def extract_face_embedding(payload, pose, calculator, dimensions):
+        # CompreFace detection with face_plugins=calculator: one face per registration photo,
+        # computed by the same model the edge devices run, or the vectors are not comparable
+        faces = payload.get('result') or []
+        if len(faces) != 1:
+            return False, f"Expected one face in the '{pose}' photo, found {len(faces)}."
+
+        model = (payload.get('plugins_versions') or {}).get('calculator')
+        if model != calculator:
+            return False, f"CompreFace calculator is '{model}', expected '{calculator}'."
+
+        embedding = faces[0].get('embedding') or []
+        if len(embedding) != dimensions:
+            return False, f"Embedding for '{pose}' has {len(embedding)} dimensions, expected {dimensions}."
+
+        return True, embedding
+    
+
+    @staticmethod
+    def rank_face_matches(rows, limit, threshold):
+        # Rows come ordered by cosine distance; a student can match on several poses
+        subjects = []
+        seen = set()
+        for student_id, distance in rows:
+            similarity = round(1 - distance, 4)
+            if similarity < threshold:
+                break
+            if student_id in seen:
+                continue
+            seen.add(student_id)
+            subjects.append({"subject": student_id, "similarity": similarity})
+            if len(subjects) >= limit:
+                break
+        return subjects
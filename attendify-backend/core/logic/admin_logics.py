@@ -1,5 +1,33 @@
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from core.models import Student, Module, ClassSession, AttendanceRecord, Event
+
+
+def count_subquery(queryset, outer_field, outer_ref='pk'):
+    # Correlated COUNT that never multiplies rows of the outer query
+    counted = queryset.filter(**{outer_field: OuterRef(outer_ref)})\
+        .order_by().values(outer_field)\
+        .annotate(total=Count('pk')).values('total')
+    
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def session_count_annotations():
+    records = AttendanceRecord.objects.all()
+    
+    return {
+        "_total_students": count_subquery(Module.students.through.objects.all(), 'module_id', 'module_id'),
+        "_present_count": count_subquery(records.filter(status='present'), 'session_id'),
+        "_absent_count": count_subquery(records.filter(status='absent'), 'session_id'),
+        "_on_leave_count": count_subquery(records.filter(status='on_leave'), 'session_id'),
+    }
+
+
 class AdminLogic:
 
+    # Query params consumed by the paginators, never treated as filters
+    PAGINATION_PARAMS = ['page', 'page_size', 'cursor', 'pagination', 'count']
+
     @staticmethod
     def get_filter_config(model_name):
     
@@ -62,4 +90,59 @@ class AdminLogic:
                 'lecturer': 'module__lecturer',
             }
 
-        return config
\ No newline at end of file
+        return config
+    
+
+    @staticmethod
+    def get_query_plan(model_name):
+        # Joins, prefetches and annotations each admin serializer needs,
+        # so a list page costs the same number of queries at any page size
+        plan = {
+            "select_related": [],
+            "prefetch_related": [],
+            "annotations": {}
+        }
+
+        if model_name in ['Student', 'Lecturer', 'Admin']:
+            plan['select_related'] = ['user']
+
+        if model_name == 'Student':
+            completed = AttendanceRecord.objects.filter(session__status='completed')
+            plan['annotations'] = {
+                "_completed_total": count_subquery(completed, 'student_id'),
+                "_completed_present": count_subquery(completed.filter(status='present'), 'student_id'),
+                "_completed_on_leave": count_subquery(completed.filter(status='on_leave'), 'student_id'),
+            }
+
+        elif model_name == 'Module':
+            plan['prefetch_related'] = [
+                Prefetch('students', queryset=Student.objects.only('pk')),
+                Prefetch(
+                    'sessions',
+                    queryset=ClassSession.objects.filter(status='completed').annotate(**session_count_annotations()),
+                    to_attr='_completed_sessions'
+                ),
+            ]
+            plan['annotations'] = {
+                "_student_count": count_subquery(Module.students.through.objects.all(), 'module_id'),
+            }
+
+        elif model_name == 'ClassSession':
+            plan['select_related'] = ['venue']
+            plan['annotations'] = session_count_annotations()
+
+        elif model_name == 'Event':
+            plan['prefetch_related'] = [
+                Prefetch('students', queryset=Student.objects.only('pk')),
+            ]
+            plan['annotations'] = {
+                "_total_student": count_subquery(Event.students.through.objects.all(), 'event_id'),
+            }
+
+        elif model_name == 'LeaveRequest':
+            plan['select_related'] = ['user']
+
+        elif model_name == 'AttendanceAppeal':
+            plan['select_related'] = ['student__user']
+
+        return plan
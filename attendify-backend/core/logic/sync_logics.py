@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+
+class SyncLogic:
+
+    RESOURCES = ['timetable', 'notifications', 'attendance']
+    PAGE_SIZE = 500
+    # Rows committed out of order within this window are picked up on the next sync
+    SAFETY_LAG = timedelta(seconds=5)
+    TOMBSTONE_RETENTION = timedelta(days=90)
+
+    @staticmethod
+    def encode_cursor(row_ts, row_id, tomb_ts, tomb_id):
+        raw = json.dumps({
+            "u": row_ts.isoformat() if row_ts else None,
+            "i": row_id,
+            "d": tomb_ts.isoformat() if tomb_ts else None,
+            "t": tomb_id,
+        })
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+
+    @staticmethod
+    def decode_cursor(cursor):
+        # Empty cursor = initial sync
+        if not cursor:
+            return True, None
+
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return True, {
+                "row_ts": datetime.fromisoformat(raw["u"]) if raw.get("u") else None,
+                "row_id": int(raw.get("i") or 0),
+                "tomb_ts": datetime.fromisoformat(raw["d"]) if raw.get("d") else None,
+                "tomb_id": int(raw.get("t") or 0),
+            }
+        except (ValueError, KeyError, TypeError):
+            return False, "Invalid sync cursor."
+        
+
+    @staticmethod
+    def requires_reset(position, current_dt):
+        # Tombstones older than the retention window are pruned, so a stale
+        # client has to start over from a full snapshot
+        if not position or not position["row_ts"]:
+            return False
+        return position["row_ts"] < current_dt - SyncLogic.TOMBSTONE_RETENTION
+    
+
+    @staticmethod
+    def get_requested_resources(query_params, role_type):
+        allowed = list(SyncLogic.RESOURCES)
+        if role_type != 'student':
+            allowed.remove('attendance')
+
+        requested = [r for r in allowed if r in query_params]
+        return requested or allowed
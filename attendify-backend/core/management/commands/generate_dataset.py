@@ -0,0 +1,415 @@
+import csv
+import io
+import random
+import time
+from datetime import date, datetime, timedelta, time as dt_time
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from core.models import (
+    User, Student, Lecturer, PartnerUni, Semester, Module, ClassRoom, ClassSession,
+    AttendanceRecord, Notification, News, Event, Announcement, LeaveRequest, AttendanceAppeal
+)
+
+
+SLOTS = [
+    (dt_time(8, 30), dt_time(10, 30)),
+    (dt_time(10, 30), dt_time(12, 30)),
+    (dt_time(13, 30), dt_time(15, 30)),
+    (dt_time(15, 30), dt_time(17, 30)),
+    (dt_time(18, 0), dt_time(21, 0)),
+]
+
+PROGRAMMES = ["Computer Science", "Information Technology", "Cyber Security", "Data Science", "Business Information Systems"]
+LEAVE_REASONS = ["Medical", "Family Emergency", "Compassionate", "Official Duty"]
+APPEAL_REASONS = ["Camera did not detect me", "Arrived late due to transport", "Attended another venue"]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic, production-sized dataset for load testing. "
+        "The same --seed and --start-date always produce the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='load', help="Prefix for usernames, module codes and venue names")
+        parser.add_argument('--start-date', type=date.fromisoformat, default=None,
+                            help="Semester start (YYYY-MM-DD). Defaults to a semester centred on today")
+        parser.add_argument('--weeks', type=int, default=13)
+        parser.add_argument('--universities', type=int, default=4)
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--lecturers', type=int, default=400)
+        parser.add_argument('--modules', type=int, default=300)
+        parser.add_argument('--classrooms', type=int, default=80)
+        parser.add_argument('--modules-per-student', type=int, default=5)
+        parser.add_argument('--sessions-per-week', type=int, default=3)
+        parser.add_argument('--notifications-per-student', type=int, default=15)
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--leave-rate', type=float, default=0.1, help="Share of students with leave requests")
+        parser.add_argument('--appeal-rate', type=float, default=0.02, help="Share of absences that get appealed")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--copy-batch-size', type=int, default=200000)
+        parser.add_argument('--method', choices=['auto', 'copy', 'bulk'], default='auto',
+                            help="COPY is used for the largest tables on PostgreSQL unless 'bulk' is given")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+
+        if options['method'] == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError("COPY is only available on PostgreSQL.")
+        self.use_copy = options['method'] == 'copy' or (options['method'] == 'auto' and connection.vendor == 'postgresql')
+
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(
+                f"Rows with prefix '{self.prefix}' already exist. Use another --prefix or flush the database."
+            )
+
+        self.today = timezone.localtime(timezone.now()).date()
+        start_date = options['start_date']
+        if start_date is None:
+            midpoint = self.today - timedelta(weeks=options['weeks'] // 2)
+            start_date = midpoint - timedelta(days=midpoint.weekday())
+        self.start_date = start_date
+        self.end_date = start_date + timedelta(weeks=options['weeks']) - timedelta(days=1)
+
+        # One shared hash; hashing every password would dominate the run
+        self.password = make_password("password123")
+
+        started = time.perf_counter()
+
+        self.create_universities()
+        self.create_classrooms()
+        self.create_lecturers()
+        self.create_students()
+        self.create_modules()
+        self.create_enrolments()
+        self.create_sessions()
+        self.create_attendance()
+        self.create_appeals()
+        self.create_leaves()
+        self.create_notifications()
+        self.create_feed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Dataset '{self.prefix}' (seed {options['seed']}, {self.start_date} to {self.end_date}) "
+            f"generated in {time.perf_counter() - started:.1f}s"
+        ))
+
+
+    # Helpers
+    def report(self, label, count, started):
+        self.stdout.write(f"  {label:<20}{count:>12,} rows  {time.perf_counter() - started:>7.1f}s")
+
+    def bulk_insert(self, model, objects):
+        created = []
+        for batch in chunked(objects, self.batch_size):
+            created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def copy_insert(self, model, fields, rows):
+        # Streams CSV batches straight into COPY; far faster than INSERT for millions of rows
+        table = model._meta.db_table
+        columns = ", ".join(model._meta.get_field(name).column for name in fields)
+        sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+        total = 0
+        for batch in chunked(rows, self.options['copy_batch_size']):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+
+            with connection.cursor() as cursor:
+                cursor.copy_expert(sql, buffer)
+            total += len(batch)
+
+        return total
+
+    def insert_rows(self, model, fields, rows):
+        if self.use_copy:
+            return self.copy_insert(model, fields, rows)
+
+        objects = (model(**dict(zip(fields, row))) for row in rows)
+        total = 0
+        for batch in chunked(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            total += len(batch)
+        return total
+
+    def aware(self, day, at):
+        return timezone.make_aware(datetime.combine(day, at))
+
+
+    # Academics
+    def create_universities(self):
+        started = time.perf_counter()
+        self.unis = self.bulk_insert(PartnerUni, [
+            PartnerUni(name=f"{self.prefix} University {i}") for i in range(self.options['universities'])
+        ])
+        self.semesters = self.bulk_insert(Semester, [
+            Semester(partner_uni=uni, name=f"Semester {self.start_date:%Y-%m}", start_date=self.start_date, end_date=self.end_date)
+            for uni in self.unis
+        ])
+        self.report("PartnerUni/Semester", len(self.unis) + len(self.semesters), started)
+
+    def create_classrooms(self):
+        started = time.perf_counter()
+        self.classrooms = self.bulk_insert(ClassRoom, [
+            ClassRoom(name=f"{self.prefix}-{i // 20}.{i % 20}") for i in range(self.options['classrooms'])
+        ])
+        self.report("ClassRoom", len(self.classrooms), started)
+
+    def build_users(self, role_type, count):
+        return [
+            User(
+                username=f"{self.prefix}_{role_type[0]}{i:06d}",
+                email=f"{self.prefix}_{role_type[0]}{i:06d}@attendify.test",
+                first_name=role_type.title(),
+                last_name=f"{i:06d}",
+                password=self.password,
+                role_type=role_type,
+                gender=self.rng.choice(['male', 'female']),
+                is_staff=False
+            )
+            for i in range(count)
+        ]
+
+    def create_lecturers(self):
+        started = time.perf_counter()
+        users = self.bulk_insert(User, self.build_users('lecturer', self.options['lecturers']))
+        self.lecturers = self.bulk_insert(Lecturer, [
+            Lecturer(user=user, staff_id=f"{self.prefix}-L{i:06d}", partner_uni=self.unis[i % len(self.unis)])
+            for i, user in enumerate(users)
+        ])
+        self.report("Lecturer", len(self.lecturers), started)
+
+    def create_students(self):
+        started = time.perf_counter()
+        users = self.bulk_insert(User, self.build_users('student', self.options['students']))
+        self.students = self.bulk_insert(Student, [
+            Student(
+                user=user,
+                student_id=f"{self.prefix}-S{i:06d}",
+                programme=self.rng.choice(PROGRAMMES),
+                partner_uni=self.unis[i % len(self.unis)],
+                registration=True
+            )
+            for i, user in enumerate(users)
+        ])
+
+        # How reliably each student turns up, drawn once so their history is consistent
+        self.reliability = {student.pk: self.rng.betavariate(8, 2) for student in self.students}
+        self.report("User/Student", len(self.students) * 2, started)
+
+    def create_modules(self):
+        started = time.perf_counter()
+        lecturers_by_uni = {}
+        for lecturer in self.lecturers:
+            lecturers_by_uni.setdefault(lecturer.partner_uni_id, []).append(lecturer)
+
+        modules = []
+        for i in range(self.options['modules']):
+            semester = self.semesters[i % len(self.semesters)]
+            lecturers = lecturers_by_uni.get(semester.partner_uni_id) or self.lecturers
+            modules.append(Module(
+                semester=semester,
+                lecturer=self.rng.choice(lecturers),
+                code=f"{self.prefix.upper()}{i:05d}",
+                name=f"Module {i}",
+                credit=self.rng.choice([3, 6])
+            ))
+        self.modules = self.bulk_insert(Module, modules)
+        self.report("Module", len(self.modules), started)
+
+    def create_enrolments(self):
+        started = time.perf_counter()
+        modules_by_uni = {}
+        for module in self.modules:
+            modules_by_uni.setdefault(module.semester.partner_uni_id, []).append(module)
+
+        self.enrolment = {module.pk: [] for module in self.modules}
+        through = Module.students.through
+        rows = []
+        for student in self.students:
+            choices = modules_by_uni.get(student.partner_uni_id) or self.modules
+            for module in self.rng.sample(choices, min(self.options['modules_per_student'], len(choices))):
+                self.enrolment[module.pk].append(student.pk)
+                rows.append(through(module_id=module.pk, student_id=student.pk))
+
+        self.bulk_insert(through, rows)
+        self.report("Enrolment", len(rows), started)
+
+    def create_sessions(self):
+        started = time.perf_counter()
+        sessions = []
+        for module in self.modules:
+            days = sorted(self.rng.sample(range(5), min(self.options['sessions_per_week'], 5)))
+            slots = [self.rng.choice(SLOTS) for _ in days]
+            venue = self.rng.choice(self.classrooms)
+
+            for week in range(self.options['weeks']):
+                for index, (weekday, (start, end)) in enumerate(zip(days, slots)):
+                    day = self.start_date + timedelta(weeks=week, days=weekday)
+                    sessions.append(ClassSession(
+                        module=module,
+                        venue=venue,
+                        type='lecture' if index == 0 else 'tutorial',
+                        name=f"{module.code} Week {week + 1} {'Lecture' if index == 0 else 'Tutorial'}",
+                        date=day,
+                        start_time=start,
+                        end_time=end,
+                        status='completed' if day < self.today else 'upcoming'
+                    ))
+
+        self.sessions = self.bulk_insert(ClassSession, sessions)
+        self.report("ClassSession", len(self.sessions), started)
+
+    def create_attendance(self):
+        started = time.perf_counter()
+        self.absences = []
+        appeal_rate = self.options['appeal_rate']
+        now = timezone.now()
+
+        def rows():
+            for session in self.sessions:
+                if session.status != 'completed':
+                    continue
+
+                session_start = self.aware(session.date, session.start_time)
+                session_end = self.aware(session.date, session.end_time)
+
+                for student_id in self.enrolment[session.module_id]:
+                    roll = self.rng.random()
+                    reliability = self.reliability[student_id]
+
+                    entry_time = exit_time = None
+                    duration = 0
+
+                    if roll < reliability:
+                        status = 'present'
+                        entry_time = session_start + timedelta(minutes=self.rng.randint(-5, 10))
+                        exit_time = session_end - timedelta(minutes=self.rng.randint(0, 15))
+                        duration = int((exit_time - entry_time).total_seconds())
+                    elif roll < reliability + 0.03:
+                        status = 'on_leave'
+                    else:
+                        status = 'absent'
+                        if self.rng.random() < appeal_rate:
+                            self.absences.append((session, student_id))
+
+                    yield (session.pk, student_id, entry_time, exit_time, now, status, None, duration, now)
+
+        fields = ['session_id', 'student_id', 'entry_time', 'exit_time', 'recorded_at', 'status', 'remarks', 'duration', 'updated_at']
+        total = self.insert_rows(AttendanceRecord, fields, rows())
+        self.report("AttendanceRecord", total, started)
+
+
+    # Requests
+    def create_appeals(self):
+        started = time.perf_counter()
+        appeals = self.bulk_insert(AttendanceAppeal, [
+            AttendanceAppeal(
+                student_id=student_id,
+                session=session,
+                reason=self.rng.choice(APPEAL_REASONS),
+                description="Generated appeal",
+                status=self.rng.choice(['pending', 'approved', 'rejected'])
+            )
+            for session, student_id in self.absences
+        ])
+        self.report("AttendanceAppeal", len(appeals), started)
+
+    def create_leaves(self):
+        started = time.perf_counter()
+        span = (self.end_date - self.start_date).days
+        leaves = []
+        for student in self.students:
+            if self.rng.random() >= self.options['leave_rate']:
+                continue
+            for _ in range(self.rng.randint(1, 2)):
+                start = self.start_date + timedelta(days=self.rng.randrange(span))
+                leaves.append(LeaveRequest(
+                    user_id=student.pk,
+                    start_date=start,
+                    end_date=start + timedelta(days=self.rng.randint(0, 3)),
+                    reason=self.rng.choice(LEAVE_REASONS),
+                    description="Generated leave",
+                    status=self.rng.choice(['pending', 'approved', 'rejected'])
+                ))
+
+        self.bulk_insert(LeaveRequest, leaves)
+        self.report("LeaveRequest", len(leaves), started)
+
+
+    # Communication
+    def create_notifications(self):
+        started = time.perf_counter()
+        window = int((min(self.today, self.end_date) - self.start_date).total_seconds()) or 86400
+        semester_start = self.aware(self.start_date, dt_time(8, 0))
+
+        def rows():
+            for student in self.students:
+                for _ in range(self.options['notifications_per_student']):
+                    sent = semester_start + timedelta(seconds=self.rng.randrange(window))
+                    yield (student.pk, "Class Reminder", "Your class starts in 30 minutes.", self.rng.random() < 0.7, sent, sent)
+
+        fields = ['recipient_id', 'title', 'description', 'is_read', 'date_sent', 'updated_at']
+        total = self.insert_rows(Notification, fields, rows())
+        self.report("Notification", total, started)
+
+    def create_feed(self):
+        started = time.perf_counter()
+        span = (self.end_date - self.start_date).days
+
+        events = []
+        for i in range(self.options['events']):
+            event_date = self.aware(self.start_date + timedelta(days=self.rng.randrange(span)), dt_time(18, 0))
+            events.append(Event(
+                title=f"{self.prefix} Event {i}",
+                message="Generated event",
+                description="Generated for load testing",
+                organizer="Student Council",
+                event_date=event_date,
+                venue=self.rng.choice(self.classrooms).name,
+                status='completed' if event_date.date() < self.today else 'upcoming',
+                slot_limit=self.rng.choice([None, 50, 100, 300])
+            ))
+        events = self.bulk_insert(Event, events)
+
+        through = Event.students.through
+        joins = []
+        for event in events:
+            limit = event.slot_limit or 150
+            for student in self.rng.sample(self.students, min(self.rng.randint(0, limit), len(self.students))):
+                joins.append(through(event_id=event.pk, student_id=student.pk))
+        self.bulk_insert(through, joins)
+
+        news = self.bulk_insert(News, [
+            News(
+                title=f"{self.prefix} News {i}",
+                message="Generated news",
+                description="Generated for load testing",
+                news_date=self.aware(self.start_date + timedelta(days=self.rng.randrange(span)), dt_time(9, 0))
+            )
+            for i in range(max(1, self.options['events'] // 4))
+        ])
+        announcements = self.bulk_insert(Announcement, [
+            Announcement(title=f"{self.prefix} Announcement {i}", description="Generated announcement")
+            for i in range(20)
+        ])
+
+        self.report("Event/News/Announce", len(events) + len(joins) + len(news) + len(announcements), started)
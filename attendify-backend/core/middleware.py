@@ -0,0 +1,53 @@
+import os
+import time
+from collections import Counter
+from django.db import connection
+
+
+class QueryProfilingMiddleware:
+    # Opt-in via QUERY_PROFILING=1 (see settings.py)
+    SLOW_MS = float(os.environ.get('QUERY_PROFILING_SLOW_MS', 500))
+    TOP_DUPLICATES = 5
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((sql, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        db_ms = sum(duration for _, duration in queries) * 1000
+
+        response['X-DB-Queries'] = str(len(queries))
+        response['X-DB-Time'] = f"{db_ms:.1f}"
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{len(queries)} queries", total;dur={total_ms:.1f}'
+        )
+
+        if total_ms >= self.SLOW_MS:
+            self.log_slow_request(request, response, queries, total_ms, db_ms)
+
+        return response
+
+    def log_slow_request(self, request, response, queries, total_ms, db_ms):
+        print(
+            f"[Profiler] SLOW {request.method} {request.get_full_path()} -> {response.status_code} "
+            f"{total_ms:.0f}ms total, {db_ms:.0f}ms in {len(queries)} queries"
+        )
+
+        duplicates = Counter(sql for sql, _ in queries).most_common(self.TOP_DUPLICATES)
+        for sql, count in duplicates:
+            if count < 2:
+                break
+            print(f"[Profiler]   x{count}: {sql[:300]}")
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 11:40
+
+import django.db.models.deletion
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.db import migrations, models
+from pgvector.django import VectorExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_attendancerecord_updated_at_classsession_updated_at_and_more'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        migrations.CreateModel(
+            name='FaceEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pose', models.CharField(choices=[('center', 'Center'), ('left', 'Left'), ('right', 'Right')], max_length=10)),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=512)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='face_embeddings', to='core.student')),
+            ],
+            options={
+                'indexes': [pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='core_faceemb_hnsw_idx', opclasses=['vector_cosine_ops']), models.Index(fields=['updated_at', 'id'], name='core_faceem_updated_c6d207_idx')],
+                'unique_together': {('student', 'pose')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_faceembedding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synctombstone',
+            name='resource',
+            field=models.CharField(choices=[('timetable', 'Timetable'), ('attendance', 'Attendance'), ('notifications', 'Notifications'), ('face_gallery', 'Face Gallery')], max_length=20),
+        ),
+    ]
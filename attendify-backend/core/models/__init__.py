@@ -1,5 +1,5 @@
 # Users 
-from .users import User, Admin, Lecturer, Student
+from .users import User, Admin, Lecturer, Student, FaceEmbedding
 
 # Academics
 from .academics import PartnerUni, Semester, Module, ClassSession, ClassRoom, AttendanceRecord
@@ -9,3 +9,6 @@ from .communication import Notification, News, Event, Announcement
 
 # Requests
 from .requests import LeaveRequest, AttendanceAppeal
+
+# Sync
+from .sync import SyncTombstone, SyncMarker
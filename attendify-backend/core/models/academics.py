@@ -46,8 +46,13 @@ class Module(models.Model):
 
     @property
     def average_attendance(self):
-        completed_sessions = self.sessions.filter(status='completed')
-        count = completed_sessions.count()
+        # Admin lists prefetch completed sessions with their counts annotated
+        if hasattr(self, '_completed_sessions'):
+            completed_sessions = self._completed_sessions
+            count = len(completed_sessions)
+        else:
+            completed_sessions = self.sessions.filter(status='completed')
+            count = completed_sessions.count()
         
         if count == 0:
             return 0.0
@@ -57,6 +62,10 @@ class Module(models.Model):
     
     @property
     def student_enrolled(self):
+        if hasattr(self, '_student_count'):
+            return self._student_count
+        if 'students' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.students.all())
         return self.students.count()
     
     class Meta:
@@ -94,21 +103,30 @@ class ClassSession(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
     status = models.CharField(max_length=20, choices=SESSION_STATUS, default='upcoming')
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def total_students(self):
+        if hasattr(self, '_total_students'):
+            return self._total_students
         return self.module.student_enrolled
 
     @property
     def present_students(self):
+        if hasattr(self, '_present_count'):
+            return self._present_count
         return self.attendance_records.filter(status='present').count()
     
     @property
     def absent_students(self):
+        if hasattr(self, '_absent_count'):
+            return self._absent_count
         return self.attendance_records.filter(status='absent').count()
     
     @property
     def on_leave_students(self):
+        if hasattr(self, '_on_leave_count'):
+            return self._on_leave_count
         return self.attendance_records.filter(status='on_leave').count()
     
     @property
@@ -128,6 +146,7 @@ class ClassSession(models.Model):
             models.Index(fields=['date', 'start_time']),
             models.Index(fields=['date', 'status']),
             models.Index(fields=['venue', 'date', 'start_time']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -161,12 +180,14 @@ class AttendanceRecord(models.Model):
     status = models.CharField(max_length=20, choices=ATTENDANCE_STATUS, default='absent')
     remarks = models.CharField(max_length=200, blank=True, null=True)
     duration = models.IntegerField(default=0, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('session', 'student')
         indexes = [ 
             models.Index(fields=['session', 'status']),
             models.Index(fields=['student']),
+            models.Index(fields=['student', 'updated_at']),
         ]
 
     def __str__(self):
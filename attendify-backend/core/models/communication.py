@@ -10,10 +10,14 @@ class Notification(models.Model):
     description = models.TextField()
     is_read = models.BooleanField(default=False)
     date_sent = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date_sent'] # Newest first
-        indexes = [ models.Index(fields=['recipient', 'is_read']) ]
+        indexes = [
+            models.Index(fields=['recipient', 'is_read']),
+            models.Index(fields=['recipient', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.recipient.username} - {self.title}"
@@ -62,6 +66,8 @@ class Event(models.Model):
 
     @property
     def total_student(self):
+        if hasattr(self, '_total_student'):
+            return self._total_student
         return self.students.count()
     
     @property
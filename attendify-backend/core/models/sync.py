@@ -0,0 +1,49 @@
+from django.db import models
+
+
+class SyncTombstone(models.Model):
+    RESOURCE_CHOICES = [
+        ('timetable', 'Timetable'),
+        ('attendance', 'Attendance'),
+        ('notifications', 'Notifications'),
+        ('face_gallery', 'Face Gallery'),
+    ]
+
+    # Relationships
+    # Nullable: face gallery tombstones must survive the student they belong to
+    user = models.ForeignKey('core.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='sync_tombstones')
+    # Face gallery only: set when a student leaves one venue's scope, empty for a deletion seen everywhere
+    venue = models.ForeignKey('core.ClassRoom', on_delete=models.CASCADE, null=True, blank=True, related_name='sync_tombstones')
+
+    # Attributes
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'resource', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} removed for {self.user_id} ({self.deleted_at})"
+
+
+class SyncMarker(models.Model):
+    # A module that entered a user's timetable, or whose sessions are shown differently
+    # (module or room renamed): its sessions count as changed for that user from added_at on
+
+    # Relationships
+    user = models.ForeignKey('core.User', on_delete=models.CASCADE, related_name='sync_markers')
+    module = models.ForeignKey('core.Module', on_delete=models.CASCADE, related_name='sync_markers')
+
+    # Attributes
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'module', 'added_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.module_id} added for {self.user_id} ({self.added_at})"
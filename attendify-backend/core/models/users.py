@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from pgvector.django import VectorField
+from pgvector.django import VectorField, HnswIndex
 from django.conf import settings
 
 
@@ -83,11 +83,16 @@ class Student(models.Model):
 
     @property
     def attendance_rate(self):
-        records = self.attendance_records.filter(session__status='completed')
-        
-        total_present = records.filter(status='present').count()
-        total_on_leave = records.filter(status='on_leave').count()
-        total_sessions = records.count()
+        if hasattr(self, '_completed_total'):
+            total_present = self._completed_present
+            total_on_leave = self._completed_on_leave
+            total_sessions = self._completed_total
+        else:
+            records = self.attendance_records.filter(session__status='completed')
+            
+            total_present = records.filter(status='present').count()
+            total_on_leave = records.filter(status='on_leave').count()
+            total_sessions = records.count()
         
         effective_total = total_sessions - total_on_leave
         
@@ -98,3 +103,38 @@ class Student(models.Model):
 
     def __str__(self):
         return f"{self.user.username} ({self.student_id})"
+
+
+class FaceEmbedding(models.Model):
+    POSE_CHOICES = [
+        ('center', 'Center'),
+        ('left', 'Left'),
+        ('right', 'Right'),
+    ]
+
+    DIMENSIONS = 512
+
+    # Relationships
+    student = models.ForeignKey('Student', on_delete=models.CASCADE, related_name='face_embeddings')
+
+    # Attributes
+    pose = models.CharField(max_length=10, choices=POSE_CHOICES)
+    embedding = VectorField(dimensions=DIMENSIONS)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'pose')
+        indexes = [
+            HnswIndex(
+                name='core_faceemb_hnsw_idx',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops']
+            ),
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} ({self.pose})"
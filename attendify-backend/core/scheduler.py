@@ -51,5 +51,15 @@ def start():
         replace_existing=True
     )
 
+    scheduler.add_job(
+        task.task_prune_sync_tombstones,
+        trigger='cron',
+        hour='3',
+        minute='0',
+        timezone='Asia/Singapore',
+        id='prune_sync_tombstones',
+        replace_existing=True
+    )
+
     scheduler.start()
     atexit.register(lambda: scheduler.shutdown())
\ No newline at end of file
@@ -1,23 +1,65 @@
-from core.models import Student, ClassSession, Semester, AttendanceRecord, Lecturer, LeaveRequest, Announcement, Notification, ClassRoom
+from core.models import Student, ClassSession, Semester, AttendanceRecord, Lecturer, LeaveRequest, Announcement, Notification, ClassRoom, FaceEmbedding
 from django.utils import timezone
 from datetime import timedelta, datetime, time
+from django.db import transaction
 from django.db.models import Q, Prefetch
 from django.conf import settings
 from django.core.mail import send_mail
 import os
 import statistics
 import requests
+from pgvector.django import CosineDistance
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from core.logic.academics_logics import AcademicLogic
+from core.logic.admin_logics import session_count_annotations
+from core.services.cache_services import DashboardCacheService, ScheduleVersionService
 
 
 class AcademicService:
 
+    def with_session_counts(self, sessions):
+        # Everything ClassSessionSerializer reads, in a fixed number of queries
+        completed_sessions = ClassSession.objects.filter(
+            status='completed'
+        ).annotate(**session_count_annotations())
+
+        return sessions.select_related(
+            'module', 'module__semester', 'venue'
+        ).annotate(
+            **session_count_annotations()
+        ).prefetch_related(
+            Prefetch('module__students', queryset=Student.objects.only('pk')),
+            Prefetch('module__sessions', queryset=completed_sessions, to_attr='_completed_sessions')
+        )
+    
+
     def get_student_dashboard(self, user):
         student = Student.objects.get(user=user)
+        today_date = timezone.localtime(timezone.now()).date()
+
+        todays_sessions = self.with_session_counts(ClassSession.objects.filter(
+            module__students=student,
+            date=today_date
+        )).order_by('start_time')
+        
+        end_of_week = today_date + timedelta(days= 6 - today_date.weekday())
+
+        # Sessions that already started today are dropped when the payload is read,
+        # so the week list stays valid for as long as it is cached
+        upcoming_sessions = self.with_session_counts(ClassSession.objects.filter(
+            module__students=student,
+            date__range=[today_date, end_of_week],
+        )).order_by('date', 'start_time')
+
+        return {
+            "attendance_rate": student.attendance_rate,
+            "todays_sessions": todays_sessions,    
+            "upcoming_sessions": upcoming_sessions
+        }
+
+
+    def get_semester_range(self):
         today = timezone.localtime(timezone.now())
-        today_date = today.date()
-        current_time = today.time()
 
         current_semester = Semester.objects.filter(
             start_date__lte=today, 
@@ -30,33 +72,16 @@ class AcademicService:
             s_end = current_semester.end_date.strftime("%b %Y")
             semester_range = f"{s_start} - {s_end}"
 
-        todays_announcements = Announcement.objects.filter(
-            created_at__date__gte = today_date -timedelta(days=7),
-            created_at__date__lte = today_date
-        ).order_by('-created_at')
+        return semester_range
 
-        todays_sessions = ClassSession.objects.filter(
-            module__students=student,
-            date=today_date
-        ).order_by('start_time')
-        
-        end_of_week = today_date + timedelta(days= 6 - today_date.weekday())
 
-        upcoming_sessions = ClassSession.objects.filter(
-            module__students=student,
-            date__range=[today_date, end_of_week],
-            ).filter(
-            Q(date__gt=today_date) | 
-            Q(date=today_date, start_time__gte=current_time)
-        ).order_by('date', 'start_time')
+    def get_recent_announcements(self):
+        today_date = timezone.localtime(timezone.now()).date()
 
-        return {
-            "attendance_rate": student.attendance_rate,
-            "semester_range": semester_range,
-            "announcements": todays_announcements,
-            "todays_sessions": todays_sessions,    
-            "upcoming_sessions": upcoming_sessions
-        }
+        return Announcement.objects.filter(
+            created_at__date__gte = today_date -timedelta(days=7),
+            created_at__date__lte = today_date
+        ).order_by('-created_at')
     
 
     def get_lecturer_dashboard(self, user):
@@ -65,29 +90,26 @@ class AcademicService:
         today_date = today.date()
 
         # 1. Stats
-        today_sessions = ClassSession.objects.filter(
+        today_sessions = self.with_session_counts(ClassSession.objects.filter(
             module__lecturer=lecturer, 
             date=today_date
-        ).order_by('start_time')
+        )).order_by('start_time')
 
         start_week = today_date - timedelta(days=today_date.weekday())
         end_week = start_week + timedelta(days=6)
         
-        week_sessions = ClassSession.objects.filter(
+        week_sessions = self.with_session_counts(ClassSession.objects.filter(
             module__lecturer=lecturer,
             date__range=[start_week, end_week]
-        ).order_by('date', 'start_time')
+        )).order_by('date', 'start_time')
 
-        next_class = ClassSession.objects.filter(
+        next_class = self.with_session_counts(ClassSession.objects.filter(
             module__lecturer=lecturer
-        ).filter(
+        )).filter(
             Q(date__gt=today_date) | Q(date=today_date, start_time__gte=today.time())
         ).order_by('date', 'start_time').first()
 
-        todays_announcements = Announcement.objects.filter(
-            created_at__date__gte = today_date -timedelta(days=7),
-            created_at__date__lte = today_date
-        ).order_by('-created_at')
+        todays_announcements = self.get_recent_announcements()
 
         return {
             "stats": {
@@ -101,7 +123,13 @@ class AcademicService:
         }
     
 
-    def get_timetable(self, user):
+    def get_timetable(self, user, start_date, end_date):
+        return self.get_timetable_queryset(user)\
+            .filter(date__range=[start_date, end_date])\
+            .order_by('date', 'start_time')
+    
+
+    def get_timetable_queryset(self, user):
         if user.role_type == 'student':
             profile = Student.objects.get(user=user)
             filter_kwargs = {'module__students': profile}
@@ -113,16 +141,14 @@ class AcademicService:
 
             return ClassSession.objects.filter(**filter_kwargs)\
                 .select_related('module', 'venue')\
-                .prefetch_related(attendance_prefetch)\
-                .order_by('date', 'start_time')
+                .prefetch_related(attendance_prefetch)
         
         elif user.role_type == 'lecturer':
             profile = Lecturer.objects.get(user=user)
             filter_kwargs = {'module__lecturer': profile}
 
             return ClassSession.objects.filter(**filter_kwargs)\
-            .select_related('module', 'venue')\
-            .order_by('date', 'start_time')
+            .select_related('module', 'venue')
         
         else:
             raise ValueError("Timetable not available for this role")
@@ -131,7 +157,7 @@ class AcademicService:
     def get_class_details(self, user, session_id):
         student = Student.objects.get(user=user)
 
-        session = ClassSession.objects.get(id=session_id)
+        session = self.with_session_counts(ClassSession.objects.all()).get(id=session_id)
         
         attendance = AttendanceRecord.objects.filter(
             session=session, 
@@ -141,18 +167,35 @@ class AcademicService:
         return session, attendance
     
 
-    def get_attendance_history(self, user):
-        student = Student.objects.get(user=user)
+    def get_attendance_history(self, user, position=None, page_size=30):
+        if user.role_type != 'student':
+            raise Student.DoesNotExist("This user is not a Student")
 
+        # Student pk is the user id, so no profile lookup is needed
         records = AttendanceRecord.objects.filter(
-            student=student
+            student_id=user.id
         ).select_related(
             'session', 
             'session__module',
-            'session__module__semester' 
-        ).order_by('-session__date')
+            'session__venue'
+        ).only(
+            'id', 'status', 'entry_time', 'exit_time', 'remarks', 'duration',
+            'session__id', 'session__name', 'session__type', 'session__date',
+            'session__start_time', 'session__end_time', 'session__status',
+            'session__module__code', 'session__module__name', 'session__venue__name'
+        )
+
+        if position:
+            session_date, record_id = position
+            records = records.filter(
+                Q(session__date__lt=session_date) |
+                Q(session__date=session_date, id__lt=record_id)
+            )
+
+        records = list(records.order_by('-session__date', '-id')[:page_size + 1])
+        has_more = len(records) > page_size
 
-        return records
+        return records[:page_size], has_more
 
 
     def auto_create_attendance(self):
@@ -239,13 +282,18 @@ class AcademicService:
             duration__lt=threshold
         )
 
-        count = short_duration_records.count()
+        student_ids = list(short_duration_records.values_list('student_id', flat=True))
+        count = len(student_ids)
 
         if count > 0:
             short_duration_records.update(
                 status='absent',
-                remarks=f"Auto-Absent: Duration < {threshold:.0f}m (Median: {median_duration:.0f}m)"
+                remarks=f"Auto-Absent: Duration < {threshold:.0f}m (Median: {median_duration:.0f}m)",
+                updated_at=timezone.now()
             )
+            # Queryset updates bypass the post_save signals
+            DashboardCacheService().invalidate_students(student_ids)
+            ScheduleVersionService().bump(student_ids)
             print(f"[Audit] Session {session.id}: Marked {count} students absent (Median Check).")
 
 
@@ -319,11 +367,26 @@ class AcademicService:
         days_to_check = 14 
         possible_slots = []
 
-        students = session.module.students.all()
-        total_student_count = students.count()
+        student_ids = set(session.module.students.values_list('pk', flat=True))
+        total_student_count = len(student_ids)
         if total_student_count == 0:
             total_student_count = 1 
 
+        # Load the whole window once instead of querying per 30 minute slot
+        end_date = start_date + timedelta(days=days_to_check - 1)
+        window_sessions = ClassSession.objects.filter(
+            date__range=[start_date, end_date],
+            status='upcoming'
+        )
+
+        lecturer_sessions = {}
+        for row in window_sessions.filter(module__lecturer=lecturer).values('date', 'start_time', 'end_time'):
+            lecturer_sessions.setdefault(row['date'], []).append((row['start_time'], row['end_time']))
+
+        student_sessions = {}
+        for row in window_sessions.filter(module__students__in=student_ids).values('date', 'start_time', 'end_time', 'module__students'):
+            student_sessions.setdefault(row['date'], []).append((row['start_time'], row['end_time'], row['module__students']))
+
         for i in range(days_to_check):
             current_date = start_date + timedelta(days=i)
             
@@ -343,22 +406,17 @@ class AcademicService:
                     current_slot_datetime += timedelta(minutes=30)
                     continue
 
-                lecturer_busy = ClassSession.objects.filter(
-                    module__lecturer=lecturer, 
-                    date=current_date,
-                    status='upcoming',
-                    start_time__lt=slot_end, 
-                    end_time__gt=slot_start
-                ).exists()
+                lecturer_busy = any(
+                    start < slot_end and end > slot_start
+                    for start, end in lecturer_sessions.get(current_date, [])
+                )
 
                 if not lecturer_busy:
-                    conflict_count = ClassSession.objects.filter(
-                        module__students__in=students, 
-                        date=current_date,
-                        status='upcoming',
-                        start_time__lt=slot_end,
-                        end_time__gt=slot_start
-                    ).values('module__students').distinct().count()
+                    conflict_count = len({
+                        student_id
+                        for start, end, student_id in student_sessions.get(current_date, [])
+                        if start < slot_end and end > slot_start
+                    })
 
                     attendance_rate = (total_student_count - conflict_count) / total_student_count
 
@@ -440,7 +498,7 @@ class AcademicService:
         notifications = []
         for student in students:
             notifications.append(Notification(
-                recipient=student.user,
+                recipient_id=student.user_id,
                 title="Class Rescheduled",
                 description=f"Your class {session.name} has been moved to {new_session.date} at {new_session.start_time} in {available_venue.name}."
             ))
@@ -458,6 +516,125 @@ class AcademicService:
         }
 
 
+    def get_active_session(self, venue, at):
+        # Same window mark_attendance accepts: opens 30 minutes before the class
+        return ClassSession.objects.filter(
+            venue__name=venue,
+            date=at.date(),
+            start_time__lte=(at + timedelta(minutes=30)).time(),
+            end_time__gte=at.time()
+        ).exclude(
+            status__in=['cancelled', 'rescheduled']
+        ).select_related('module').order_by('start_time').first()
+
+
+    def get_session_roster(self, venue, at):
+        session = self.get_active_session(venue, at)
+
+        students = []
+        next_start = None
+
+        if session:
+            students = list(
+                Student.objects.filter(modules_enrolled=session.module_id)
+                .order_by('student_id')
+                .values_list('student_id', flat=True)
+            )
+        else:
+            next_start = ClassSession.objects.filter(
+                venue__name=venue,
+                date=at.date(),
+                start_time__gt=at.time()
+            ).exclude(
+                status__in=['cancelled', 'rescheduled']
+            ).order_by('start_time').values_list('start_time', flat=True).first()
+
+        return {
+            "session": session,
+            "students": students,
+            "valid_until": AcademicLogic.get_roster_expiry(at, session, next_start)
+        }
+
+
+    def get_venue_schedule(self, venue, day):
+        sessions = ClassSession.objects.filter(
+            venue__name=venue,
+            date=day
+        ).exclude(
+            status__in=['cancelled', 'rescheduled']
+        ).select_related('module').order_by('start_time')
+
+        schedule = []
+        for session in sessions:
+            opens_at, ends_at = AcademicLogic.get_attendance_window(session)
+            schedule.append({
+                "id": session.id,
+                "name": session.name,
+                "module": session.module.code,
+                "opens_at": opens_at,
+                "start": timezone.make_aware(datetime.combine(session.date, session.start_time)),
+                "end": ends_at
+            })
+        return schedule
+
+
+    def store_face_embeddings(self, user, embeddings, poses=None):
+        try:
+            student = Student.objects.get(user=user)
+        except Student.DoesNotExist:
+            raise PermissionDenied("User is not a student.")
+
+        allowed_poses = [pose for pose, _ in FaceEmbedding.POSE_CHOICES]
+        is_valid, result = AcademicLogic.validate_face_embeddings(
+            embeddings, poses or allowed_poses[:len(embeddings)], FaceEmbedding.DIMENSIONS, allowed_poses
+        )
+        if not is_valid:
+            raise ValidationError(result)
+
+        # Re-registering a pose replaces its embedding
+        FaceEmbedding.objects.bulk_create(
+            [FaceEmbedding(student=student, pose=pose, embedding=embedding) for pose, embedding in result],
+            update_conflicts=True,
+            unique_fields=['student', 'pose'],
+            update_fields=['embedding', 'updated_at']
+        )
+
+        return {
+            "status": "success",
+            "student_id": student.student_id,
+            "poses": [pose for pose, _ in result]
+        }
+
+
+    def identify_faces(self, embeddings, venue=None, at=None, limit=1, threshold=0.8):
+        session = self.get_active_session(venue, at) if venue else None
+
+        candidates = FaceEmbedding.objects.all()
+        if session:
+            candidates = candidates.filter(student__modules_enrolled=session.module_id)
+        elif venue:
+            # Nobody is expected at this venue right now, never fall back to the whole gallery
+            candidates = FaceEmbedding.objects.none()
+
+        # A student has one row per pose, so fetch enough rows to fill the limit with distinct students
+        row_limit = limit * len(FaceEmbedding.POSE_CHOICES)
+        results = []
+        for embedding in embeddings:
+            if len(embedding) != FaceEmbedding.DIMENSIONS:
+                raise ValidationError(f"Embeddings must have {FaceEmbedding.DIMENSIONS} dimensions.")
+
+            rows = candidates.annotate(
+                distance=CosineDistance('embedding', embedding)
+            ).order_by('distance').values_list('student__student_id', 'distance')[:row_limit]
+
+            results.append({"subjects": AcademicLogic.rank_face_matches(rows, limit, threshold)})
+
+        return {
+            "session": session.id if session else None,
+            "result": results
+        }
+
+
     def mark_attendance(self, student_id, venue, entry_time_stamp, exit_time_stamp):
         try:
             student = Student.objects.get(student_id=student_id)
@@ -484,9 +661,10 @@ class AcademicService:
             defaults={'status': 'absent',
                       'duration': 0})
 
+        naive_start_dt = datetime.combine(active_session.date, active_session.start_time)
+        official_start_dt = timezone.make_aware(naive_start_dt)
+
         if attendance.entry_time is None:
-            naive_start_dt = datetime.combine(active_session.date, active_session.start_time)
-            official_start_dt = timezone.make_aware(naive_start_dt)
             if entry_time_stamp < official_start_dt:
                 attendance.entry_time = official_start_dt
             else:
@@ -531,6 +709,31 @@ class AcademicService:
         }
     
 
+    def compute_face_embedding(self, pose, files_payload):
+        response = requests.post(
+            settings.COMPREFACE_DETECT_URL,
+            headers={'x-api-key': settings.COMPREFACE_DETECTION_API_KEY},
+            params={'face_plugins': 'calculator', 'limit': 0},
+            files=files_payload,
+            timeout=20
+        )
+
+        if response.status_code != 200:
+            try:
+                err_msg = response.json().get('message', response.text)
+            except:
+                err_msg = response.text
+            raise Exception(f"Failed to compute the {pose} embedding: {err_msg}")
+
+        is_valid, result = AcademicLogic.extract_face_embedding(
+            response.json(), pose, settings.COMPREFACE_CALCULATOR, FaceEmbedding.DIMENSIONS
+        )
+        if not is_valid:
+            raise ValidationError(result)
+
+        return result
+
+
     def register_face(self, user, data, files):
         try:
             student = Student.objects.get(user=user)
@@ -551,6 +754,9 @@ class AcademicService:
             headers = {'x-api-key': settings.COMPREFACE_API_KEY}
             payload = {'subject': student.student_id}
 
+            # Embeddings first: nothing is uploaded for a photo the edge could not match against
+            uploads = {}
+            embeddings = []
             for pose in required_poses:
                 image_file = files[pose]
                 
@@ -561,10 +767,12 @@ class AcademicService:
                 image_file.seek(0)
                 file_content = image_file.read()
                 
-                files_payload = {'file': (filename, file_content, image_file.content_type)}
+                uploads[pose] = {'file': (filename, file_content, image_file.content_type)}
+                embeddings.append(self.compute_face_embedding(pose, uploads[pose]))
 
+            for pose in required_poses:
                 response = requests.post(
-                    url, headers=headers, params=payload, files=files_payload, timeout=20
+                    url, headers=headers, params=payload, files=uploads[pose], timeout=20
                 )
 
                 if response.status_code in [200, 201]:
@@ -582,8 +790,10 @@ class AcademicService:
                     
                     raise Exception(f"Failed to register {pose} pose: {err_msg}")
 
-            student.registration = True
-            student.save()
+            with transaction.atomic():
+                self.store_face_embeddings(user, embeddings, required_poses)
+                student.registration = True
+                student.save()
 
             return {
                 "status": "success",
@@ -1,3 +1,6 @@
+import json
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, Count
 from core.logic.admin_logics import AdminLogic
 from core.models import *
 from core.services.storage_services import SupabaseStorageService
@@ -16,6 +19,9 @@ class AdminService:
         direct_fields = [f.name for f in self.model._meta.fields]
 
         for key, value in query_params.items():
+
+            if key in AdminLogic.PAGINATION_PARAMS:
+                continue
             
             # Direct Field
             if key in direct_fields:
@@ -38,7 +44,68 @@ class AdminService:
                 if config['user_path']:
                     filter_kwargs[f"{config['user_path']}__{key}"] = value
 
-        return self.model.objects.filter(**filter_kwargs).distinct().order_by('pk')
+        queryset = self.get_planned_queryset().filter(**filter_kwargs)
+
+        # DISTINCT only when a filter fans out over a to-many join
+        if any(self.traverses_to_many(path) for path in filter_kwargs):
+            queryset = queryset.distinct()
+
+        return queryset.order_by('pk')
+    
+
+    def get_planned_queryset(self):
+        plan = AdminLogic.get_query_plan(self.model_name)
+        queryset = self.model.objects.all()
+
+        if plan['select_related']:
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan['prefetch_related']:
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        if plan['annotations']:
+            queryset = queryset.annotate(**plan['annotations'])
+
+        return queryset
+    
+
+    def get_item(self, pk):
+        return self.get_planned_queryset().get(pk=pk)
+    
+
+    def traverses_to_many(self, lookup_path):
+        model = self.model
+
+        for part in lookup_path.split('__'):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                # Reached a lookup such as __icontains
+                return False
+            
+            if field.many_to_many or field.one_to_many:
+                return True
+            
+            if not field.is_relation:
+                return False
+            
+            model = field.related_model
+
+        return False
+    
+
+    @staticmethod
+    def estimate_count(queryset, exact_below=1000):
+        # Planner row estimate for the filtered query; small results get an exact count
+        try:
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            print(f"Count Estimate Error: {e}")
+            return queryset.count()
+
+        if estimate < exact_below:
+            return queryset.count()
+        
+        return estimate
     
 
     def create_item(self, data, serializer_class):
@@ -56,19 +123,24 @@ class AdminService:
         except Student.DoesNotExist:
             return None
 
-        semesters = Semester.objects.all().order_by('-start_date')
+        # One grouped query for every semester instead of three per semester
+        records = 'modules__sessions__attendance_records'
+        completed = Q(**{
+            'modules__sessions__status': 'completed',
+            f'{records}__student': student
+        })
+
+        semesters = Semester.objects.annotate(
+            _total=Count(records, filter=completed),
+            _present=Count(records, filter=completed & Q(**{f'{records}__status': 'present'})),
+            _on_leave=Count(records, filter=completed & Q(**{f'{records}__status': 'on_leave'}))
+        ).order_by('-start_date')
         results = []
 
         for sem in semesters:
-            records = AttendanceRecord.objects.filter(
-                student=student,
-                session__module__semester=sem,
-                session__status='completed'
-            )
-
-            total_sessions = records.count()
-            present_count = records.filter(status='present').count()
-            on_leave_count = records.filter(status='on_leave').count()
+            total_sessions = sem._total
+            present_count = sem._present
+            on_leave_count = sem._on_leave
 
             effective_total = total_sessions - on_leave_count
             
@@ -0,0 +1,135 @@
+import time
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class DashboardCacheService:
+    # Per-user payloads go stale quickly (today's classes), shared parts less so
+    STUDENT_TIMEOUT = 300
+    SHARED_TIMEOUT = 900
+
+    METRICS_PREFIX = "metrics:cache"
+
+    def _today(self):
+        return timezone.localtime(timezone.now()).date().isoformat()
+
+    def student_key(self, user_id):
+        return f"dashboard:student:{user_id}:{self._today()}"
+
+    def announcements_key(self):
+        return f"dashboard:announcements:{self._today()}"
+
+    def semester_key(self):
+        return f"dashboard:semester_range:{self._today()}"
+
+
+    def get_or_build(self, key, builder, timeout, namespace="dashboard"):
+        try:
+            payload = cache.get(key)
+        except Exception as e:
+            print(f"Cache Read Error: {e}")
+            return builder()
+
+        if payload is not None:
+            self.record(namespace, "hits")
+            return payload
+
+        self.record(namespace, "misses")
+        payload = builder()
+
+        try:
+            cache.set(key, payload, timeout)
+        except Exception as e:
+            print(f"Cache Write Error: {e}")
+
+        return payload
+
+
+    def get_student_payload(self, user_id, builder):
+        return self.get_or_build(self.student_key(user_id), builder, self.STUDENT_TIMEOUT)
+
+    def get_announcements(self, builder):
+        return self.get_or_build(self.announcements_key(), builder, self.SHARED_TIMEOUT)
+
+    def get_semester_range(self, builder):
+        return self.get_or_build(self.semester_key(), builder, self.SHARED_TIMEOUT)
+
+
+    # Invalidation (called from signals)
+    def invalidate_students(self, user_ids):
+        keys = [self.student_key(user_id) for user_id in user_ids]
+        if not keys:
+            return
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            print(f"Cache Invalidate Error: {e}")
+
+    def invalidate_announcements(self):
+        try:
+            cache.delete(self.announcements_key())
+        except Exception as e:
+            print(f"Cache Invalidate Error: {e}")
+
+    def invalidate_semester(self):
+        try:
+            cache.delete(self.semester_key())
+        except Exception as e:
+            print(f"Cache Invalidate Error: {e}")
+
+
+    # Metrics
+    def record(self, namespace, outcome):
+        key = f"{self.METRICS_PREFIX}:{namespace}:{outcome}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+        except Exception:
+            pass
+
+    def get_metrics(self, namespaces=("dashboard",)):
+        metrics = {}
+        for namespace in namespaces:
+            hits = cache.get(f"{self.METRICS_PREFIX}:{namespace}:hits") or 0
+            misses = cache.get(f"{self.METRICS_PREFIX}:{namespace}:misses") or 0
+            total = hits + misses
+
+            metrics[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / total, 4) if total else None
+            }
+        return metrics
+
+
+class ScheduleVersionService:
+    # A missing counter is re-seeded from the clock, so a bump is just a delete
+    # and an evicted key can never hand out a version that was already issued.
+
+    def key(self, user_id):
+        return f"schedule:version:{user_id}"
+
+    def get_version(self, user_id):
+        # None when the cache is unreachable: the caller then serves without an ETag
+        key = self.key(user_id)
+        try:
+            version = cache.get(key)
+
+            if version is None:
+                cache.add(key, time.time_ns() // 1000, None)
+                version = cache.get(key)
+        except Exception as e:
+            print(f"Schedule Version Error: {e}")
+            return None
+
+        return version
+
+    def bump(self, user_ids):
+        keys = [self.key(user_id) for user_id in user_ids if user_id]
+        if not keys:
+            return
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            print(f"Schedule Version Error: {e}")
@@ -28,7 +28,7 @@ class CommunicationService:
         ).exclude(
             status='cancelled'
         ).annotate(
-            joined_count=Count('students')
+            _total_student=Count('students')
         ).order_by('event_date')
 
         return news_object, events_object
@@ -42,7 +42,7 @@ class CommunicationService:
         count = Notification.objects.filter(
             recipient=user, 
             is_read=False
-        ).update(is_read=True)
+        ).update(is_read=True, updated_at=timezone.now())
 
         return count
     
@@ -51,7 +51,7 @@ class CommunicationService:
         notification = Notification.objects.filter(
             pk=notification_id,
             recipient=user
-        ).update(is_read=True)
+        ).update(is_read=True, updated_at=timezone.now())
 
 
     def check_event_status(self, user, data):
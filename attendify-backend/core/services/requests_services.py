@@ -1,7 +1,10 @@
 from rest_framework.response import Response
 from core.models import LeaveRequest, Student, AttendanceAppeal, ClassSession
 from core.logic.requests_logics import RequestLogic
+from core.logic.admin_logics import AdminLogic
 from core.services.storage_services import SupabaseStorageService
+from core.services.academics_services import AcademicService
+from django.db.models import Prefetch
 
 class RequestService:
     
@@ -70,7 +73,15 @@ class RequestService:
 
     def get_student_appeals(self, user):
         student = Student.objects.get(user=user)
-        return AttendanceAppeal.objects.filter(student=student).order_by('-created_at')
+
+        students = Student.objects.select_related('user', 'partner_uni')\
+            .annotate(**AdminLogic.get_query_plan('Student')['annotations'])
+        sessions = AcademicService().with_session_counts(ClassSession.objects.all())
+
+        return AttendanceAppeal.objects.filter(student=student).prefetch_related(
+            Prefetch('student', queryset=students),
+            Prefetch('session', queryset=sessions)
+        ).order_by('-created_at')
     
 
     def apply_appeals(self, user, data):
@@ -0,0 +1,142 @@
+from django.utils import timezone
+from django.db.models import Q, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from core.models import Notification, AttendanceRecord, SyncTombstone, SyncMarker, FaceEmbedding, Module, Student
+from core.logic.sync_logics import SyncLogic
+from core.services.academics_services import AcademicService
+
+
+class SyncService:
+
+    def sync(self, user, query_params):
+        resources = SyncLogic.get_requested_resources(query_params, user.role_type)
+        result = {}
+
+        for resource in resources:
+            is_valid, position = SyncLogic.decode_cursor(query_params.get(resource))
+            if not is_valid:
+                raise ValueError(position)
+
+            result[resource] = self.get_changes(user, resource, position)
+
+        return result
+    
+
+    def get_base_queryset(self, user, resource):
+        if resource == 'timetable':
+            return AcademicService().get_timetable_queryset(user)
+        elif resource == 'notifications':
+            return Notification.objects.filter(recipient=user)
+        elif resource == 'attendance':
+            return AttendanceRecord.objects.filter(student__user=user)
+        else:
+            raise ValueError(f"Unknown sync resource: {resource}")
+        
+
+    def get_changes(self, user, resource, position):
+        rows = self.get_base_queryset(user, resource)
+        stamp = 'updated_at'
+
+        if resource == 'timetable':
+            # Sessions of a module the user just got count as changed from that moment
+            added_at = SyncMarker.objects.filter(
+                user=user, module_id=OuterRef('module_id')
+            ).order_by('-added_at').values('added_at')[:1]
+            rows = rows.annotate(synced_at=Greatest('updated_at', Coalesce(Subquery(added_at), 'updated_at')))
+            stamp = 'synced_at'
+
+        return self.page_changes(
+            rows,
+            SyncTombstone.objects.filter(user=user, resource=resource),
+            position,
+            stamp
+        )
+    
+
+    def get_face_gallery(self, venue, position):
+        # Students taking a module taught at this venue this semester
+        today = timezone.localdate()
+        modules = Module.objects.filter(
+            sessions__venue__name=venue,
+            semester__start_date__lte=today,
+            semester__end_date__gte=today
+        )
+        students = Student.objects.filter(modules_enrolled__in=modules).values('pk')
+
+        return self.page_changes(
+            FaceEmbedding.objects.filter(student__in=students).select_related('student'),
+            SyncTombstone.objects.filter(resource='face_gallery').filter(
+                Q(venue__isnull=True) | Q(venue__name=venue)
+            ),
+            position
+        )
+    
+
+    def page_changes(self, rows, tombstones, position, stamp='updated_at'):
+        now = timezone.now()
+        high_water = now - SyncLogic.SAFETY_LAG
+
+        reset = SyncLogic.requires_reset(position, now)
+        if reset:
+            position = None
+
+        # Changed rows
+        rows = rows.filter(**{f'{stamp}__lte': high_water})
+
+        if position and position['row_ts']:
+            rows = rows.filter(
+                Q(**{f'{stamp}__gt': position['row_ts']}) |
+                Q(**{stamp: position['row_ts'], 'id__gt': position['row_id']})
+            )
+
+        rows = list(rows.order_by(stamp, 'id')[:SyncLogic.PAGE_SIZE + 1])
+        rows_more = len(rows) > SyncLogic.PAGE_SIZE
+        rows = rows[:SyncLogic.PAGE_SIZE]
+
+        if rows_more:
+            row_ts, row_id = getattr(rows[-1], stamp), rows[-1].id
+        else:
+            row_ts, row_id = high_water, 0
+
+        # Deleted rows (a fresh client has nothing to delete)
+        deleted = []
+        tombs_more = False
+        tomb_ts, tomb_id = high_water, 0
+
+        if position:
+            tombstones = tombstones.filter(deleted_at__lte=high_water)
+
+            if position['tomb_ts']:
+                tombstones = tombstones.filter(
+                    Q(deleted_at__gt=position['tomb_ts']) |
+                    Q(deleted_at=position['tomb_ts'], id__gt=position['tomb_id'])
+                )
+
+            tombstones = list(
+                tombstones.order_by('deleted_at', 'id')
+                .values('id', 'object_id', 'deleted_at')[:SyncLogic.PAGE_SIZE + 1]
+            )
+            tombs_more = len(tombstones) > SyncLogic.PAGE_SIZE
+            tombstones = tombstones[:SyncLogic.PAGE_SIZE]
+
+            if tombs_more:
+                tomb_ts, tomb_id = tombstones[-1]['deleted_at'], tombstones[-1]['id']
+            deleted = [tomb['object_id'] for tomb in tombstones]
+
+        return {
+            "changed": rows,
+            "deleted": deleted,
+            "cursor": SyncLogic.encode_cursor(row_ts, row_id, tomb_ts, tomb_id),
+            "has_more": rows_more or tombs_more,
+            "reset": reset
+        }
+    
+
+    def prune_tombstones(self):
+        cutoff = timezone.now() - SyncLogic.TOMBSTONE_RETENTION
+        count, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+
+        # Any cursor older than the retention resets anyway
+        SyncMarker.objects.filter(added_at__lt=cutoff).delete()
+
+        return f"Pruned {count} sync tombstones."
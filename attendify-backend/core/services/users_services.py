@@ -1,5 +1,6 @@
 from django.core.exceptions import ObjectDoesNotExist
 from core.logic.users_logics import UserLogic
+from core.logic.admin_logics import AdminLogic
 from core.models import Student, Lecturer, Module
 from django.utils import timezone
 from django.db.models import Count
@@ -18,6 +19,8 @@ class UserService:
                 status='active',
                 semester__start_date__lte=today,
                 semester__end_date__gte=today
+            ).select_related('semester').prefetch_related(
+                *AdminLogic.get_query_plan('Module')['prefetch_related']
             ).annotate(_student_count=Count('students'))
 
             total_students = active_modules.aggregate(
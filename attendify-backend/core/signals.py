@@ -1,8 +1,11 @@
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_save, pre_delete, m2m_changed
 from django.dispatch import receiver
 from core.models import LeaveRequest, AttendanceAppeal, News, Event, User, Notification
+from core.models import AttendanceRecord, ClassSession, ClassRoom, Announcement, Semester, Module, Student, SyncTombstone, SyncMarker, FaceEmbedding
+from django.utils import timezone
 from core.services.storage_services import SupabaseStorageService
 from core.services.communication_services import CommunicationService
+from core.services.cache_services import DashboardCacheService, ScheduleVersionService
 
 @receiver(post_delete, sender=News)
 def delete_news_image(sender, instance, **kwargs):
@@ -57,4 +60,283 @@ def auto_send_push_notification(sender, instance, created, **kwargs):
             title=instance.title,
             body=instance.description,
             data={"type": "notification", "id": instance.id}
-        )
\ No newline at end of file
+        )
+
+
+# Cache invalidation (dashboard payloads + timetable versions)
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+def invalidate_caches_on_attendance(sender, instance, **kwargs):
+    # Every dashboard showing the session carries its attendance counts, not just this student's
+    classmate_ids = list(Module.students.through.objects.filter(
+        module__sessions=instance.session_id
+    ).values_list('student_id', flat=True))
+
+    DashboardCacheService().invalidate_students(classmate_ids + [instance.student_id])
+    ScheduleVersionService().bump([instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=ClassSession)
+def invalidate_caches_on_session(sender, instance, **kwargs):
+    # A session moved to another module leaves the old module's timetables as well
+    previous_module_id = getattr(instance, '_previous_placement', (None, None))[0]
+    module_ids = [instance.module_id]
+    if previous_module_id and previous_module_id != instance.module_id:
+        module_ids.append(previous_module_id)
+
+    student_ids = list(Student.objects.filter(
+        modules_enrolled__id__in=module_ids
+    ).values_list('pk', flat=True).distinct())
+
+    lecturers = dict(Module.objects.filter(
+        pk__in=module_ids
+    ).values_list('pk', 'lecturer_id'))
+
+    DashboardCacheService().invalidate_students(student_ids)
+    ScheduleVersionService().bump(student_ids + list(lecturers.values()))
+
+    if len(module_ids) > 1:
+        # Delta sync: the session disappears for whoever only had it through the old module
+        remaining = set(Student.objects.filter(
+            modules_enrolled__id=instance.module_id
+        ).values_list('pk', flat=True))
+        remaining.add(lecturers.get(instance.module_id))
+        leaving = (set(student_ids) | {lecturers.get(previous_module_id)}) - remaining
+
+        SyncTombstone.objects.bulk_create([
+            SyncTombstone(user_id=user_id, resource='timetable', object_id=instance.pk)
+            for user_id in leaving if user_id
+        ])
+
+
+@receiver(pre_save, sender=ClassSession)
+def remember_session_placement(sender, instance, **kwargs):
+    instance._previous_placement = (None, None)
+    if instance.pk:
+        instance._previous_placement = ClassSession.objects.filter(
+            pk=instance.pk
+        ).values_list('module_id', 'venue_id').first() or (None, None)
+
+
+@receiver(post_save, sender=ClassSession)
+def track_module_venues(sender, instance, **kwargs):
+    # A module taught somewhere new brings its students into that venue's edge gallery
+    if getattr(instance, '_previous_placement', (None, None)) == (instance.module_id, instance.venue_id):
+        return
+
+    already_there = ClassSession.objects.filter(
+        module_id=instance.module_id, venue_id=instance.venue_id
+    ).exclude(pk=instance.pk).exists()
+    if not already_there:
+        touch_face_embeddings(Student.objects.filter(
+            modules_enrolled__id=instance.module_id
+        ).values_list('pk', flat=True))
+
+
+@receiver(pre_save, sender=Module)
+def remember_module_lecturer(sender, instance, **kwargs):
+    instance._previous_lecturer_id = None
+    instance._previous_display = None
+    if instance.pk:
+        previous = Module.objects.filter(pk=instance.pk).values_list('lecturer_id', 'code', 'name').first()
+        if previous:
+            instance._previous_lecturer_id = previous[0]
+            instance._previous_display = previous[1:]
+
+
+@receiver(post_save, sender=Module)
+def invalidate_caches_on_module(sender, instance, **kwargs):
+    # Lecturer reassignment moves the whole module between timetables
+    previous_lecturer_id = getattr(instance, '_previous_lecturer_id', None)
+    if previous_lecturer_id != instance.lecturer_id:
+        ScheduleVersionService().bump([previous_lecturer_id, instance.lecturer_id])
+        write_timetable_tombstones([previous_lecturer_id], [instance.pk])
+        write_timetable_markers([instance.lecturer_id], [instance.pk])
+
+    # Code and name are shown on every session of the module
+    previous_display = getattr(instance, '_previous_display', None)
+    if previous_display and previous_display != (instance.code, instance.name):
+        refresh_module_timetables([instance.pk])
+
+
+@receiver(pre_save, sender=ClassRoom)
+def remember_classroom_name(sender, instance, **kwargs):
+    instance._previous_name = None
+    if instance.pk:
+        instance._previous_name = ClassRoom.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=ClassRoom)
+def invalidate_caches_on_classroom(sender, instance, **kwargs):
+    # The venue name is shown on every session held there
+    previous_name = getattr(instance, '_previous_name', None)
+    if previous_name and previous_name != instance.name:
+        refresh_module_timetables(list(Module.objects.filter(
+            sessions__venue=instance
+        ).values_list('pk', flat=True).distinct()))
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+def invalidate_dashboard_on_announcement(sender, instance, **kwargs):
+    DashboardCacheService().invalidate_announcements()
+
+
+@receiver([post_save, post_delete], sender=Semester)
+def invalidate_dashboard_on_semester(sender, instance, **kwargs):
+    DashboardCacheService().invalidate_semester()
+
+
+@receiver(m2m_changed, sender=Module.students.through)
+def invalidate_caches_on_enrolment(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ['post_add', 'post_remove', 'pre_clear']:
+        return
+
+    if reverse:
+        # student.modules_enrolled.add(...)
+        student_ids = [instance.pk]
+    elif action == 'pre_clear':
+        student_ids = list(instance.students.values_list('pk', flat=True))
+    else:
+        student_ids = list(pk_set or [])
+
+    DashboardCacheService().invalidate_students(student_ids)
+    ScheduleVersionService().bump(student_ids)
+
+    # Delta sync: newly visible sessions must look changed to the new students only, hidden ones need tombstones
+    module_ids = list(pk_set or []) if reverse else [instance.pk]
+
+    if action == 'post_add':
+        write_timetable_markers(student_ids, module_ids)
+        touch_face_embeddings(student_ids)
+        return
+
+    if reverse and action == 'pre_clear':
+        module_ids = list(instance.modules_enrolled.values_list('pk', flat=True))
+    write_timetable_tombstones(student_ids, module_ids)
+    write_gallery_tombstones(student_ids, module_ids)
+
+
+# Delta sync change tracking
+def is_owner_deletion(origin):
+    # Skip tombstones when the owning user/student is itself being deleted
+    model = origin if isinstance(origin, type) else getattr(origin, 'model', type(origin))
+    return model in [User, Student]
+
+
+def refresh_module_timetables(module_ids):
+    # Sessions look different without having changed themselves: everyone who sees them resyncs them
+    if not module_ids:
+        return
+
+    pairs = list(Module.students.through.objects.filter(
+        module_id__in=module_ids
+    ).values_list('student_id', 'module_id'))
+    lecturers = list(Module.objects.filter(pk__in=module_ids).values_list('lecturer_id', 'pk'))
+
+    student_ids = list({student_id for student_id, _ in pairs})
+    DashboardCacheService().invalidate_students(student_ids)
+    ScheduleVersionService().bump(student_ids + [lecturer_id for lecturer_id, _ in lecturers])
+
+    SyncMarker.objects.bulk_create([
+        SyncMarker(user_id=user_id, module_id=module_id)
+        for user_id, module_id in pairs + lecturers if user_id
+    ])
+
+
+def write_timetable_markers(user_ids, module_ids):
+    SyncMarker.objects.bulk_create([
+        SyncMarker(user_id=user_id, module_id=module_id)
+        for user_id in user_ids if user_id
+        for module_id in module_ids
+    ])
+
+
+def write_gallery_tombstones(student_ids, module_ids):
+    # Venues the students only had through these modules drop their embeddings on the next delta sync
+    if not student_ids or not module_ids:
+        return
+
+    today = timezone.localdate()
+    sessions = ClassSession.objects.filter(
+        module__semester__start_date__lte=today,
+        module__semester__end_date__gte=today,
+        venue__isnull=False
+    )
+
+    venue_ids = set(sessions.filter(module_id__in=module_ids).values_list('venue_id', flat=True))
+    if not venue_ids:
+        return
+
+    kept = set(sessions.filter(
+        venue_id__in=venue_ids, module__students__in=student_ids
+    ).exclude(module_id__in=module_ids).values_list('module__students', 'venue_id').distinct())
+
+    embeddings = FaceEmbedding.objects.filter(student_id__in=student_ids).values_list('student_id', 'pk')
+
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(user_id=student_id, resource='face_gallery', object_id=embedding_id, venue_id=venue_id)
+        for student_id, embedding_id in embeddings
+        for venue_id in venue_ids
+        if (student_id, venue_id) not in kept
+    ])
+
+
+def touch_face_embeddings(student_ids):
+    # Edge galleries are scoped by enrolment, so embeddings older than a venue's cursor must look changed
+    FaceEmbedding.objects.filter(student_id__in=student_ids).update(updated_at=timezone.now())
+
+
+def write_timetable_tombstones(user_ids, module_ids):
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if not user_ids or not module_ids:
+        return
+
+    session_ids = list(ClassSession.objects.filter(
+        module_id__in=module_ids
+    ).values_list('pk', flat=True))
+
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(user_id=user_id, resource='timetable', object_id=session_id)
+        for user_id in user_ids
+        for session_id in session_ids
+    ])
+
+
+@receiver(pre_delete, sender=ClassSession)
+def track_session_deletion(sender, instance, origin=None, **kwargs):
+    # pre_delete: enrolment rows may be gone by the time post_delete runs
+    user_ids = list(Student.objects.filter(
+        modules_enrolled__id=instance.module_id
+    ).values_list('pk', flat=True))
+
+    lecturer_id = Module.objects.filter(
+        pk=instance.module_id
+    ).values_list('lecturer_id', flat=True).first()
+
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(user_id=user_id, resource='timetable', object_id=instance.pk)
+        for user_id in user_ids + [lecturer_id] if user_id
+    ])
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def track_attendance_deletion(sender, instance, origin=None, **kwargs):
+    if is_owner_deletion(origin):
+        return
+
+    SyncTombstone.objects.create(user_id=instance.student_id, resource='attendance', object_id=instance.pk)
+
+
+@receiver(post_delete, sender=Notification)
+def track_notification_deletion(sender, instance, origin=None, **kwargs):
+    if is_owner_deletion(origin):
+        return
+
+    SyncTombstone.objects.create(user_id=instance.recipient_id, resource='notifications', object_id=instance.pk)
+
+
+@receiver(post_delete, sender=FaceEmbedding)
+def track_face_embedding_deletion(sender, instance, origin=None, **kwargs):
+    # Edge galleries drop the row on their next delta sync, also when the whole student goes:
+    # the tombstone outlives its user (SET_NULL), and a user being deleted cannot be referenced
+    user_id = None if is_owner_deletion(origin) else instance.student_id
+    SyncTombstone.objects.create(user_id=user_id, resource='face_gallery', object_id=instance.pk)
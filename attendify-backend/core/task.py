@@ -1,5 +1,6 @@
 from core.services.academics_services import AcademicService
 from core.services.communication_services import CommunicationService
+from core.services.sync_services import SyncService
 from django.db import close_old_connections
 
 def task_auto_create_attendance():
@@ -54,4 +55,15 @@ def task_auto_send_attendance_warning():
         if "Sent 0" not in message:
             print(f"[Task] {message}")
     except Exception as e:
-        print(f"[Task Error] Attendance Warning Failed: {e}")
\ No newline at end of file
+        print(f"[Task Error] Attendance Warning Failed: {e}")
+
+
+def task_prune_sync_tombstones():
+    close_old_connections()
+    service = SyncService()
+    try:
+        message = service.prune_tombstones()
+        if "Pruned 0" not in message:
+            print(f"[Task] {message}")
+    except Exception as e:
+        print(f"[Task Error] Prune Sync Tombstones Failed: {e}")
\ No newline at end of file
@@ -0,0 +1,429 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, time as dt_time
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.logic.sync_logics import SyncLogic
+from core.models import (
+    User, Student, Lecturer, Admin, PartnerUni, Semester, Module, ClassRoom, ClassSession,
+    AttendanceRecord, Notification, News, Event, Announcement, LeaveRequest, AttendanceAppeal,
+    SyncMarker
+)
+
+
+# Ceilings, not exact counts. Each number is what the route costs today plus a
+# little headroom; N+1 regressions are caught separately by the scaling tests,
+# which require the count to stay flat as the dataset grows.
+QUERY_BUDGETS = {
+    # Auth
+    'login': 8,
+    'logout': 5,
+    'change-password': 3,
+    'request-otp': 2,
+    'verify-otp': 1,
+    'reset-password': 3,
+    'keep-redis-alive': 0,
+    'save-push-token': 3,
+    'remove-push-token': 3,
+
+    # Users
+    'profile': 12,
+    'edit-profile': 2,
+
+    # Academics
+    'dashboard-stats': 18,
+    'timetable': 5,
+    'class-details': 7,
+    'attendance-history': 3,
+    'get-reschedule-options': 9,
+    'reschedule-class': 15,
+    'mark-attendance': 14,
+    'session-roster': 3,
+    'venue-schedule': 1,
+    'face-embeddings': 2,
+    'identify-face': 3,
+
+    # Communication
+    'newsevent': 3,
+    'check-event-status': 5,
+    'join-event': 6,
+    'quit-event': 6,
+    'notifications': 2,
+    'mark-read': 2,
+    'mark-one-read': 2,
+
+    # Sync
+    'sync': 12,
+    'face-gallery': 2,
+
+    # Requests
+    'leaves': 2,
+    'appeals': 9,
+    'apply-leaves': 3,
+    'apply-appeals': 4,
+
+    # Admin
+    'student-semester-attendance': 3,
+    'cache-metrics': 0,
+    'crud-users-list': 4,
+    'crud-users-detail': 3,
+    'crud-students-list': 4,
+    'crud-students-detail': 3,
+    'crud-lecturers-list': 4,
+    'crud-lecturers-detail': 3,
+    'crud-admins-list': 4,
+    'crud-admins-detail': 3,
+    'crud-uni-list': 4,
+    'crud-uni-detail': 3,
+    'crud-semesters-list': 4,
+    'crud-semesters-detail': 3,
+    'crud-modules-list': 6,
+    'crud-modules-detail': 5,
+    'crud-sessions-list': 4,
+    'crud-sessions-detail': 3,
+    'crud-classrooms-list': 4,
+    'crud-classrooms-detail': 3,
+    'crud-records-list': 4,
+    'crud-records-detail': 3,
+    'crud-notifs-list': 4,
+    'crud-notifs-detail': 3,
+    'crud-news-list': 4,
+    'crud-news-detail': 3,
+    'crud-events-list': 5,
+    'crud-events-detail': 4,
+    'crud-announcements-list': 4,
+    'crud-announcements-detail': 3,
+    'crud-leaves-list': 4,
+    'crud-leaves-detail': 3,
+    'crud-appeals-list': 4,
+    'crud-appeals-detail': 3,
+}
+
+# Routes whose cost is dominated by a third party call, not by the database
+EXTERNAL_ROUTES = {
+    'register-face': "Uploads images to CompreFace",
+    'get-leave-document-url': "Signs a Supabase storage URL",
+    'get-appeal-document-url': "Signs a Supabase storage URL",
+    'get_secure_document_url': "Signs a Supabase storage URL",
+}
+
+# Side effect free routes: repeated for latency, re-run against a bigger dataset
+READ_ROUTES = {
+    # name: (role, method)
+    'keep-redis-alive': ('anonymous', 'get'),
+    'profile': ('student', 'get'),
+    'dashboard-stats': ('student', 'get'),
+    'timetable': ('student', 'get'),
+    'class-details': ('student', 'get'),
+    'attendance-history': ('student', 'get'),
+    'get-reschedule-options': ('lecturer', 'post'),
+    'session-roster': ('edge', 'get'),
+    'venue-schedule': ('edge', 'get'),
+    'newsevent': ('student', 'get'),
+    'check-event-status': ('student', 'post'),
+    'notifications': ('student', 'get'),
+    'sync': ('student', 'get'),
+    'face-gallery': ('edge', 'get'),
+    'leaves': ('student', 'get'),
+    'appeals': ('student', 'get'),
+    'student-semester-attendance': ('admin', 'get'),
+    'cache-metrics': ('admin', 'get'),
+}
+
+REPEATS = 5
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EDGE_API_KEY='edge-test-key',
+)
+class AttendifyTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localtime(timezone.now()).date()
+
+        cls.uni = PartnerUni.objects.create(name="University of Wollongong")
+        cls.semester = Semester.objects.create(
+            partner_uni=cls.uni,
+            name="Current Semester",
+            start_date=cls.today - timedelta(days=60),
+            end_date=cls.today + timedelta(days=60)
+        )
+        Semester.objects.create(
+            partner_uni=cls.uni,
+            name="Previous Semester",
+            start_date=cls.today - timedelta(days=240),
+            end_date=cls.today - timedelta(days=120)
+        )
+        cls.rooms = [ClassRoom.objects.create(name=f"A.2.{i}") for i in range(2)]
+
+        cls.lecturer_user = cls.create_user("lecturer", "lecturer")
+        cls.lecturer = Lecturer.objects.create(user=cls.lecturer_user, staff_id="L0001", partner_uni=cls.uni)
+
+        cls.admin_user = cls.create_user("admin", "admin")
+        cls.admin = Admin.objects.create(user=cls.admin_user, admin_id="A0001")
+
+        cls.modules = [
+            Module.objects.create(
+                semester=cls.semester,
+                lecturer=cls.lecturer,
+                code=f"CSIT{300 + i}",
+                name=f"Module {i}",
+                credit=6
+            )
+            for i in range(3)
+        ]
+
+        cls.student_user = cls.create_user("student0", "student")
+        cls.student = Student.objects.create(
+            user=cls.student_user, student_id="S0000", programme="Computer Science", partner_uni=cls.uni
+        )
+        cls.enrol([cls.student])
+
+        cls.sessions = []
+        cls.add_sessions(weeks_back=3)
+        cls.add_students(11)
+
+        cls.reschedulable = ClassSession.objects.create(
+            module=cls.modules[0],
+            venue=cls.rooms[0],
+            type='lecture',
+            name="Week 12 Lecture",
+            date=cls.today + timedelta(days=3),
+            start_time=dt_time(9, 0),
+            end_time=dt_time(11, 0),
+            status='upcoming'
+        )
+        cls.live_session = ClassSession.objects.create(
+            module=cls.modules[1],
+            venue=cls.rooms[1],
+            type='tutorial',
+            name="Live Lab",
+            date=cls.today,
+            start_time=dt_time(10, 0),
+            end_time=dt_time(12, 0),
+            status='in_progress'
+        )
+
+        cls.add_feed(3)
+
+        cls.record = AttendanceRecord.objects.filter(student=cls.student).first()
+        cls.notification = Notification.objects.filter(recipient=cls.student_user).first()
+        cls.news = News.objects.first()
+        cls.event = Event.objects.first()
+        cls.announcement = Announcement.objects.first()
+        cls.leave = LeaveRequest.objects.filter(user=cls.student_user).first()
+        cls.appeal = AttendanceAppeal.objects.filter(student=cls.student).first()
+
+    # Seeding helpers
+    @classmethod
+    def create_user(cls, username, role_type):
+        return User.objects.create_user(
+            username=username,
+            email=f"{username}@attendify.test",
+            password="password123",
+            role_type=role_type
+        )
+
+    @classmethod
+    def enrol(cls, students):
+        for module in cls.modules:
+            module.students.add(*students)
+
+    @classmethod
+    def add_students(cls, count):
+        start = Student.objects.count()
+        students = []
+        for i in range(start, start + count):
+            user = cls.create_user(f"student{i}", "student")
+            students.append(Student.objects.create(
+                user=user, student_id=f"S{i:04d}", programme="Computer Science", partner_uni=cls.uni
+            ))
+        cls.enrol(students)
+        cls.add_records(ClassSession.objects.filter(status='completed'), students)
+        return students
+
+    @classmethod
+    def add_sessions(cls, weeks_back):
+        created = []
+        for module in cls.modules:
+            for week in range(1, weeks_back + 1):
+                created.append(ClassSession(
+                    module=module, venue=cls.rooms[0], type='lecture', name=f"{module.code} W-{week}",
+                    date=cls.today - timedelta(days=7 * week),
+                    start_time=dt_time(9, 0), end_time=dt_time(11, 0), status='completed'
+                ))
+            for offset in range(0, 5):
+                created.append(ClassSession(
+                    module=module, venue=cls.rooms[1], type='tutorial', name=f"{module.code} D+{offset}",
+                    date=cls.today + timedelta(days=offset),
+                    start_time=dt_time(14, 0), end_time=dt_time(15, 0), status='upcoming'
+                ))
+        created = ClassSession.objects.bulk_create(created)
+        cls.sessions.extend(created)
+
+        completed = [session for session in created if session.status == 'completed']
+        cls.add_records(completed, Student.objects.all())
+        return created
+
+    @classmethod
+    def add_records(cls, sessions, students):
+        statuses = ['present', 'present', 'absent', 'on_leave']
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(session=session, student=student, status=statuses[(session.pk + student.pk) % 4])
+            for session in sessions
+            for student in students
+        ], ignore_conflicts=True)
+
+    @classmethod
+    def add_feed(cls, count):
+        now = timezone.now()
+        students = list(Student.objects.all())
+        completed = list(ClassSession.objects.filter(status='completed', module__students=cls.student)[:count])
+
+        for i in range(count):
+            News.objects.create(title=f"News {i}", message="Highlight", description="Full story")
+            event = Event.objects.create(
+                title=f"Event {i}", message="Teaser", description="Details", organizer="Student Council",
+                event_date=now + timedelta(days=i + 1), venue="Hall", slot_limit=100
+            )
+            event.students.add(*students[:5])
+            Announcement.objects.create(title=f"Announcement {i}", description="Notice", posted_by=cls.admin_user)
+            LeaveRequest.objects.create(
+                user=cls.student_user, start_date=cls.today, end_date=cls.today, reason="Medical"
+            )
+
+        for session in completed:
+            AttendanceAppeal.objects.create(student=cls.student, session=session, reason="Camera missed me")
+
+        Notification.objects.bulk_create([
+            Notification(recipient=student.user, title="Reminder", description="Class soon")
+            for student in students
+            for _ in range(count)
+        ])
+
+    # Request helpers
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Per class, only QueryBudgetTests reports them
+        cls.timings = defaultdict(list)
+        cls.query_counts = {}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login_as(self, role):
+        users = {
+            'student': self.student_user,
+            'lecturer': self.lecturer_user,
+            'admin': self.admin_user,
+            'anonymous': None,
+            'edge': None,
+        }
+        self.client.force_authenticate(user=users[role])
+        if role == 'edge':
+            self.client.credentials(HTTP_X_EDGE_KEY='edge-test-key')
+        else:
+            self.client.credentials()
+
+    def route_url(self, name):
+        kwargs = {
+            'class-details': {'session_id': self.sessions[0].pk},
+            'mark-one-read': {'pk': self.notification.pk},
+            'student-semester-attendance': {'student_id': self.student.student_id},
+            'crud-users-detail': {'pk': self.student_user.pk},
+            'crud-students-detail': {'pk': self.student.pk},
+            'crud-lecturers-detail': {'pk': self.lecturer.pk},
+            'crud-admins-detail': {'pk': self.admin.pk},
+            'crud-uni-detail': {'pk': self.uni.pk},
+            'crud-semesters-detail': {'pk': self.semester.pk},
+            'crud-modules-detail': {'pk': self.modules[0].pk},
+            'crud-sessions-detail': {'pk': self.sessions[0].pk},
+            'crud-classrooms-detail': {'pk': self.rooms[0].pk},
+            'crud-records-detail': {'pk': self.record.pk},
+            'crud-notifs-detail': {'pk': self.notification.pk},
+            'crud-news-detail': {'pk': self.news.pk},
+            'crud-events-detail': {'pk': self.event.pk},
+            'crud-announcements-detail': {'pk': self.announcement.pk},
+            'crud-leaves-detail': {'pk': self.leave.pk},
+            'crud-appeals-detail': {'pk': self.appeal.pk},
+        }
+        return reverse(name, kwargs=kwargs.get(name))
+
+    def route_data(self, name):
+        data = {
+            'get-reschedule-options': {'session_id': self.reschedulable.pk},
+            'check-event-status': {'event_id': self.event.pk},
+            'face-gallery': {'venue': self.live_session.venue.name},
+            'venue-schedule': {'venue': self.live_session.venue.name},
+            'session-roster': {
+                'venue': self.live_session.venue.name,
+                'at': timezone.make_aware(datetime.combine(self.today, dt_time(10, 5))).isoformat()
+            },
+        }
+        return data.get(name)
+
+    def call(self, name, method='get', data=None, path=None, role=None):
+        if role:
+            self.login_as(role)
+
+        url = path or self.route_url(name)
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            if method == 'get':
+                response = self.client.get(url, data)
+            else:
+                response = getattr(self.client, method)(url, data, format='json')
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.timings[name].append(elapsed_ms)
+        self.query_counts[name] = max(self.query_counts.get(name, 0), len(ctx))
+        return response, len(ctx), ctx
+
+    def assertQueryBudget(self, name, response, count, ctx):
+        self.assertLess(response.status_code, 400, f"{name}: {response.status_code} {getattr(response, 'data', '')}")
+
+        budget = QUERY_BUDGETS[name]
+        if count > budget:
+            statements = "\n".join(query['sql'] for query in ctx.captured_queries)
+            self.fail(f"{name} ran {count} queries, budget is {budget}:\n{statements}")
+
+    def call_within_budget(self, name, method='get', data=None, path=None, role=None):
+        response, count, ctx = self.call(name, method, data, path, role)
+        self.assertQueryBudget(name, response, count, ctx)
+        return response
+
+    # Sync helpers
+    def sync_timetable(self, user, cursor='', later=False):
+        # Walks every page; later=True syncs once rows touched just now are past the safety lag
+        self.client.force_authenticate(user=user)
+        self.client.credentials()
+
+        now = timezone.now() + (SyncLogic.SAFETY_LAG + timedelta(seconds=1) if later else timedelta(0))
+        changed, deleted, pages = [], [], 0
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            while True:
+                response = self.call_within_budget('sync', data={'timetable': cursor})
+                page = response.data['timetable']
+                changed += [row['id'] for row in page['changed']]
+                deleted += page['deleted']
+                cursor = page['cursor']
+                pages += 1
+                if not page['has_more']:
+                    return changed, deleted, cursor, pages
+
+    def backdate_timetables(self):
+        earlier = timezone.now() - timedelta(minutes=1)
+        ClassSession.objects.update(updated_at=earlier)
+        SyncMarker.objects.update(added_at=earlier)
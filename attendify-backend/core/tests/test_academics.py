@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, time as dt_time
+from unittest import mock
+from django.core.cache import cache
+from django.utils import timezone
+from core.logic.academics_logics import AcademicLogic
+from core.services.cache_services import DashboardCacheService
+from core.models import Student, AttendanceRecord, SyncTombstone
+from core.tests.base import AttendifyTestCase
+
+
+class DashboardCacheTests(AttendifyTestCase):
+    def test_attendance_change_invalidates_classmates_dashboards(self):
+        classmate = Student.objects.exclude(pk=self.student.pk).filter(modules_enrolled=self.modules[1]).first()
+        cache_service = DashboardCacheService()
+
+        self.client.force_authenticate(user=classmate.user)
+        self.client.get(self.route_url('dashboard-stats'))
+        self.assertIsNotNone(cache.get(cache_service.student_key(classmate.user_id)))
+
+        AttendanceRecord.objects.create(session=self.live_session, student=self.student, status='present')
+        self.assertIsNone(cache.get(cache_service.student_key(classmate.user_id)))
+
+
+class TimetableTests(AttendifyTestCase):
+    def test_timetable_etag_revalidates(self):
+        response = self.call_within_budget('timetable', role='student')
+        etag = response['ETag']
+
+        response = self.client.get(self.route_url('timetable'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Cache down: no version to compare against, so the full timetable and no ETag
+        with mock.patch.object(cache, 'get', side_effect=ConnectionError("cache down")):
+            response = self.client.get(self.route_url('timetable'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_timetable_etag_changes_with_the_payload_version(self):
+        etag = self.call_within_budget('timetable', role='student')['ETag']
+
+        with mock.patch.object(AcademicLogic, 'SCHEDULE_PAYLOAD_VERSION', AcademicLogic.SCHEDULE_PAYLOAD_VERSION + 1):
+            response = self.client.get(self.route_url('timetable'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_timetable_follows_module_and_room_renames(self):
+        self.backdate_timetables()
+        etag = self.call_within_budget('timetable', role='student')['ETag']
+        _, _, cursor, _ = self.sync_timetable(self.student_user)
+
+        self.modules[0].name = "Renamed Module"
+        self.modules[0].save()
+
+        self.login_as('student')
+        response = self.client.get(self.route_url('timetable'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        changed, _, _, _ = self.sync_timetable(self.student_user, cursor, later=True)
+        self.assertEqual(sorted(changed), sorted(self.modules[0].sessions.values_list('pk', flat=True)))
+
+        etag = response['ETag']
+        self.rooms[1].name = "B.1.1"
+        self.rooms[1].save()
+
+        self.login_as('student')
+        response = self.client.get(self.route_url('timetable'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        changed, _, _, _ = self.sync_timetable(self.student_user, cursor, later=True)
+        self.assertTrue(set(self.rooms[1].sessions_venue.values_list('pk', flat=True)) <= set(changed))
+
+    def test_session_moved_to_another_module_leaves_old_timetables(self):
+        newcomer = Student.objects.create(
+            user=self.create_user("newcomer", "student"), student_id="N0001", programme="Computer Science"
+        )
+        self.modules[0].students.add(newcomer)
+
+        self.client.force_authenticate(user=newcomer.user)
+        etag = self.client.get(self.route_url('timetable'))['ETag']
+
+        self.reschedulable.module = self.modules[2]
+        self.reschedulable.save()
+
+        response = self.client.get(self.route_url('timetable'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(SyncTombstone.objects.filter(
+            user=newcomer.user, resource='timetable', object_id=self.reschedulable.pk
+        ).exists())
+        self.assertFalse(SyncTombstone.objects.filter(
+            user=self.student_user, resource='timetable', object_id=self.reschedulable.pk
+        ).exists())
+
+
+class AttendanceTests(AttendifyTestCase):
+    def test_attendance_history_walks_pages_by_cursor(self):
+        response = self.call_within_budget('attendance-history', data={'page_size': 100}, role='student')
+        expected = [row['id'] for row in response.data['results']]
+        self.assertIsNone(response.data['next_cursor'])
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            data = {'page_size': 2, 'cursor': cursor} if cursor else {'page_size': 2}
+            response = self.call_within_budget('attendance-history', data=data)
+            seen += [row['id'] for row in response.data['results']]
+            pages += 1
+
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+            self.assertNotIn('://', cursor)
+
+        self.assertEqual(seen, expected)
+        self.assertGreater(pages, 2)
+
+    def test_mark_attendance_records_exit(self):
+        entry = timezone.make_aware(datetime.combine(self.today, dt_time(10, 5)))
+        exit_at = entry + timedelta(minutes=90)
+        self.login_as('anonymous')
+        for exit_time_stamp in [None, exit_at.isoformat()]:
+            response = self.client.post(self.route_url('mark-attendance'), {
+                'student_id': self.student.student_id,
+                'venue': self.live_session.venue.name,
+                'entry_time_stamp': entry.isoformat(),
+                'exit_time_stamp': exit_time_stamp
+            }, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+
+        record = AttendanceRecord.objects.get(session=self.live_session, student=self.student)
+        self.assertEqual(record.entry_time, entry)
+        self.assertEqual(record.exit_time, exit_at)
+        self.assertEqual(record.duration, 90 * 60)
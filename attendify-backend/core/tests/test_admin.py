@@ -0,0 +1,35 @@
+import math
+from unittest import mock
+from core.services.admin_services import AdminService
+from core.models import Student
+from core.tests.base import AttendifyTestCase
+
+
+class AdminPaginationTests(AttendifyTestCase):
+    def test_admin_estimated_count_corrects_itself(self):
+        self.login_as('admin')
+        url = self.route_url('crud-students-list')
+        total = Student.objects.count()
+        last_page = math.ceil(total / 5)
+
+        # Planner says fewer rows than there are: the real last page is still served
+        with mock.patch.object(AdminService, 'estimate_count', return_value=3):
+            response = self.client.get(url, {'count': 'estimate', 'page_size': 5, 'page': last_page})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), total - 5 * (last_page - 1))
+        self.assertEqual(response.data['count'], total)
+        self.assertFalse(response.data['count_is_estimate'])
+        self.assertIsNone(response.data['next'])
+
+        # Planner says more: the last page fixes the count, pages past it are not found
+        with mock.patch.object(AdminService, 'estimate_count', return_value=1000):
+            response = self.client.get(url, {'count': 'estimate', 'page_size': 5, 'page': last_page})
+            self.assertEqual(response.data['count'], total)
+            self.assertIsNone(response.data['next'])
+
+            response = self.client.get(url, {'count': 'estimate', 'page_size': 5, 'page': last_page + 1})
+            self.assertEqual(response.status_code, 404)
+
+            response = self.client.get(url, {'count': 'estimate', 'page_size': 5, 'page': 1})
+            self.assertEqual(response.data['count'], 1000)
+            self.assertTrue(response.data['count_is_estimate'])
@@ -0,0 +1,235 @@
+from datetime import datetime, timedelta, time as dt_time
+from unittest import mock
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from core.logic.sync_logics import SyncLogic
+from core.models import Student, ClassRoom, ClassSession, FaceEmbedding, SyncTombstone
+from core.tests.base import AttendifyTestCase
+
+
+class EdgeRouteTests(AttendifyTestCase):
+    def test_session_roster_matches_enrolment(self):
+        response = self.call_within_budget('session-roster', data=self.route_data('session-roster'), role='edge')
+
+        self.assertEqual(response.data['session']['id'], self.live_session.pk)
+        self.assertEqual(
+            sorted(response.data['students']),
+            sorted(self.modules[1].students.values_list('student_id', flat=True))
+        )
+
+        self.login_as('anonymous')
+        response = self.client.get(self.route_url('session-roster'), self.route_data('session-roster'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_venue_schedule_lists_todays_sessions(self):
+        response = self.call_within_budget('venue-schedule', data=self.route_data('venue-schedule'), role='edge')
+
+        expected = ClassSession.objects.filter(
+            venue=self.live_session.venue, date=self.today
+        ).exclude(status__in=['cancelled', 'rescheduled'])
+        self.assertEqual(
+            sorted(session['id'] for session in response.data['sessions']),
+            sorted(expected.values_list('pk', flat=True))
+        )
+        self.assertIn(self.live_session.pk, [session['id'] for session in response.data['sessions']])
+
+        live = next(session for session in response.data['sessions'] if session['id'] == self.live_session.pk)
+        self.assertEqual(live['end'] - live['opens_at'], timedelta(minutes=30) + (
+            datetime.combine(self.today, self.live_session.end_time) -
+            datetime.combine(self.today, self.live_session.start_time)
+        ))
+
+        self.login_as('anonymous')
+        response = self.client.get(self.route_url('venue-schedule'), self.route_data('venue-schedule'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_identify_face_limited_to_roster(self):
+        def unit_vector(axis):
+            vector = [0.0] * FaceEmbedding.DIMENSIONS
+            vector[axis] = 1.0
+            return vector
+
+        embeddings = [unit_vector(0), unit_vector(1), unit_vector(2)]
+        self.call_within_budget('face-embeddings', 'post', {'embeddings': embeddings}, role='student')
+        self.assertEqual(FaceEmbedding.objects.filter(student__user=self.student_user).count(), 3)
+
+        # Same face, but not enrolled in the class running at the venue
+        outsider = Student.objects.create(
+            user=self.create_user("outsider", "student"), student_id="X0001", programme="Business"
+        )
+        FaceEmbedding.objects.create(student=outsider, pose='center', embedding=unit_vector(0))
+
+        query = {'embeddings': [unit_vector(0)], 'limit': 2, 'threshold': 0.9}
+        response = self.call_within_budget('identify-face', 'post', query, role='edge')
+        self.assertCountEqual(
+            [match['subject'] for match in response.data['result'][0]['subjects']],
+            [self.student.student_id, "X0001"]
+        )
+
+        query.update(self.route_data('session-roster'))
+        response = self.call_within_budget('identify-face', 'post', query, role='edge')
+        self.assertEqual(response.data['session'], self.live_session.pk)
+        self.assertEqual(
+            [match['subject'] for match in response.data['result'][0]['subjects']],
+            [self.student.student_id]
+        )
+
+        # A venue with no class on matches nobody, rather than the whole gallery
+        query['at'] = timezone.make_aware(datetime.combine(self.today, dt_time(7, 0))).isoformat()
+        response = self.call_within_budget('identify-face', 'post', query, role='edge')
+        self.assertIsNone(response.data['session'])
+        self.assertEqual(response.data['result'][0]['subjects'], [])
+
+        self.login_as('anonymous')
+        response = self.client.post(self.route_url('identify-face'), query, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class FaceRegistrationTests(AttendifyTestCase):
+    def register_face(self, calculator):
+        def compreface(url, **kwargs):
+            if url == settings.COMPREFACE_DETECT_URL:
+                payload = {
+                    "result": [{"embedding": [0.1] * FaceEmbedding.DIMENSIONS}],
+                    "plugins_versions": {"calculator": calculator}
+                }
+            else:
+                payload = {"image_id": f"image-{len(uploads)}"}
+                uploads.append(url)
+            return mock.Mock(status_code=200, json=lambda: payload)
+
+        uploads = []
+        files = {
+            pose: SimpleUploadedFile(f"{pose}.jpg", b"jpeg", content_type="image/jpeg")
+            for pose in ['center', 'left', 'right']
+        }
+        self.login_as('student')
+        with mock.patch('core.services.academics_services.requests.post', side_effect=compreface):
+            response = self.client.post(self.route_url('register-face'), files, format='multipart')
+        return response, uploads
+
+    def test_register_face_stores_embeddings(self):
+        response, uploads = self.register_face(settings.COMPREFACE_CALCULATOR)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(uploads), 3)
+        self.assertEqual(
+            sorted(FaceEmbedding.objects.filter(student=self.student).values_list('pose', flat=True)),
+            ['center', 'left', 'right']
+        )
+
+    def test_register_face_rejects_another_calculator(self):
+        response, uploads = self.register_face("insightface.Calculator")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(uploads, [])
+        self.assertFalse(FaceEmbedding.objects.filter(student=self.student).exists())
+
+
+class FaceGalleryTests(AttendifyTestCase):
+    def gallery_after_lag(self, venue, cursor):
+        # Rows touched just now only pass the high water mark once the safety lag is over
+        later = timezone.now() + SyncLogic.SAFETY_LAG + timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.call_within_budget('face-gallery', data={'venue': venue, 'cursor': cursor}, role='edge')
+        return response.data
+
+    def gallery_cursor(self, venue):
+        return self.call_within_budget('face-gallery', data={'venue': venue}, role='edge').data['cursor']
+
+    def test_face_gallery_syncs_by_cursor(self):
+        embedding = [0.0] * FaceEmbedding.DIMENSIONS
+        FaceEmbedding.objects.create(student=self.student, pose='center', embedding=embedding)
+        FaceEmbedding.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        response = self.call_within_budget('face-gallery', data=self.route_data('face-gallery'), role='edge')
+        self.assertEqual([row['student_id'] for row in response.data['changed']], [self.student.student_id])
+        self.assertEqual(len(response.data['changed'][0]['embedding']), FaceEmbedding.DIMENSIONS)
+
+        data = dict(self.route_data('face-gallery'), cursor=response.data['cursor'])
+        response = self.call_within_budget('face-gallery', data=data, role='edge')
+        self.assertEqual(response.data['changed'], [])
+
+        self.login_as('anonymous')
+        response = self.client.get(self.route_url('face-gallery'), self.route_data('face-gallery'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_face_gallery_delivers_students_entering_its_scope(self):
+        def gallery_after_lag(venue, cursor):
+            return [row['student_id'] for row in self.gallery_after_lag(venue, cursor)['changed']]
+
+        newcomer = Student.objects.create(
+            user=self.create_user("newcomer", "student"), student_id="N0001", programme="Computer Science"
+        )
+        FaceEmbedding.objects.create(student=newcomer, pose='center', embedding=[0.0] * FaceEmbedding.DIMENSIONS)
+        FaceEmbedding.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        venue = self.live_session.venue.name
+        response = self.call_within_budget('face-gallery', data={'venue': venue}, role='edge')
+        self.assertEqual(response.data['changed'], [])
+
+        # Enrolment does not change the embedding, but the edge's cursor is already past it
+        self.modules[1].students.add(newcomer)
+        self.assertEqual(gallery_after_lag(venue, response.data['cursor']), ["N0001"])
+
+        # Same for a module that starts being taught at another venue
+        hall = ClassRoom.objects.create(name="Hall")
+        response = self.call_within_budget('face-gallery', data={'venue': hall.name}, role='edge')
+        self.assertEqual(response.data['changed'], [])
+
+        ClassSession.objects.create(
+            module=self.modules[1], venue=hall, type='lecture', name="Moved Lecture",
+            date=self.today + timedelta(days=1), start_time=dt_time(9, 0), end_time=dt_time(11, 0), status='upcoming'
+        )
+        self.assertEqual(gallery_after_lag(hall.name, response.data['cursor']), ["N0001"])
+
+    def test_face_gallery_tombstones_students_leaving_its_scope(self):
+        newcomer = Student.objects.create(
+            user=self.create_user("newcomer", "student"), student_id="N0001", programme="Computer Science"
+        )
+        embedding = FaceEmbedding.objects.create(
+            student=newcomer, pose='center', embedding=[0.0] * FaceEmbedding.DIMENSIONS
+        )
+
+        # Module 2 is the only one taught in the hall
+        hall = ClassRoom.objects.create(name="Hall")
+        ClassSession.objects.create(
+            module=self.modules[2], venue=hall, type='lecture', name="Hall Lecture",
+            date=self.today + timedelta(days=1), start_time=dt_time(9, 0), end_time=dt_time(11, 0), status='upcoming'
+        )
+        newcomer.modules_enrolled.add(self.modules[1], self.modules[2])
+
+        room = self.live_session.venue.name
+        room_cursor, hall_cursor = self.gallery_cursor(room), self.gallery_cursor(hall.name)
+
+        # Dropping module 2 leaves the hall, the room is still reached through module 1
+        newcomer.modules_enrolled.remove(self.modules[2])
+        self.assertEqual(self.gallery_after_lag(hall.name, hall_cursor)['deleted'], [embedding.pk])
+        self.assertEqual(self.gallery_after_lag(room, room_cursor)['deleted'], [])
+
+        newcomer.modules_enrolled.clear()
+        self.assertEqual(self.gallery_after_lag(room, room_cursor)['deleted'], [embedding.pk])
+
+    def test_face_gallery_tombstones_deleted_embeddings(self):
+        newcomer = Student.objects.create(
+            user=self.create_user("newcomer", "student"), student_id="N0001", programme="Computer Science"
+        )
+        self.modules[1].students.add(newcomer)
+        center, left = [
+            FaceEmbedding.objects.create(student=newcomer, pose=pose, embedding=[0.0] * FaceEmbedding.DIMENSIONS)
+            for pose in ['center', 'left']
+        ]
+
+        venue = self.live_session.venue.name
+        cursor = self.gallery_cursor(venue)
+
+        left.delete()
+        self.assertEqual(self.gallery_after_lag(venue, cursor)['deleted'], [left.pk])
+
+        # Deleting the student still reaches every edge, the tombstone outlives the user
+        newcomer.user.delete()
+        self.assertEqual(self.gallery_after_lag(venue, cursor)['deleted'], [left.pk, center.pk])
+        self.assertTrue(SyncTombstone.objects.filter(
+            user__isnull=True, resource='face_gallery', object_id=center.pk
+        ).exists())
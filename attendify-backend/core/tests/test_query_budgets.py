@@ -0,0 +1,182 @@
+import math
+import os
+from datetime import datetime, timedelta, time as dt_time
+from django.core import mail
+from django.core.cache import cache
+from django.utils import timezone
+from core.interface import urls as core_urls
+from core.models import Event
+from core.tests.base import AttendifyTestCase, QUERY_BUDGETS, EXTERNAL_ROUTES, READ_ROUTES, REPEATS
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class QueryBudgetTests(AttendifyTestCase):
+    # Coverage
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in core_urls.urlpatterns}
+
+        missing = names - set(QUERY_BUDGETS) - set(EXTERNAL_ROUTES)
+        self.assertFalse(missing, f"Routes without a query budget: {sorted(missing)}")
+
+        stale = (set(QUERY_BUDGETS) | set(EXTERNAL_ROUTES)) - names
+        self.assertFalse(stale, f"Budgets for routes that no longer exist: {sorted(stale)}")
+
+    # Read routes
+    def test_read_routes_within_budget(self):
+        for name, (role, method) in READ_ROUTES.items():
+            with self.subTest(route=name):
+                for _ in range(REPEATS):
+                    cache.clear()
+                    self.call_within_budget(name, method, self.route_data(name), role=role)
+
+    def test_lecturer_views_within_budget(self):
+        for name in ['profile', 'dashboard-stats', 'timetable']:
+            with self.subTest(route=name):
+                cache.clear()
+                self.call_within_budget(name, role='lecturer')
+
+    def test_read_routes_scale_flat(self):
+        baseline = {}
+        for name, (role, method) in READ_ROUTES.items():
+            cache.clear()
+            _, baseline[name], _ = self.call(name, method, self.route_data(name), role=role)
+
+        # Roughly double everything the serializers iterate over
+        self.add_students(12)
+        self.add_sessions(weeks_back=3)
+        self.add_feed(3)
+
+        for name, (role, method) in READ_ROUTES.items():
+            with self.subTest(route=name):
+                cache.clear()
+                _, count, ctx = self.call(name, method, self.route_data(name), role=role)
+                self.assertEqual(count, baseline[name], f"{name} grew from {baseline[name]} to {count} queries")
+
+    def test_dashboard_cache_hit_skips_database(self):
+        self.call_within_budget('dashboard-stats', role='student')
+        response, count, ctx = self.call('dashboard-stats', role='student')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(count, 2)
+
+    # Admin
+    def test_admin_routes_within_budget(self):
+        self.login_as('admin')
+        for name in QUERY_BUDGETS:
+            if not name.startswith('crud-'):
+                continue
+            with self.subTest(route=name):
+                self.call_within_budget(name)
+
+    def test_admin_lists_independent_of_page_size(self):
+        self.login_as('admin')
+        for name in QUERY_BUDGETS:
+            if not (name.startswith('crud-') and name.endswith('-list')):
+                continue
+            with self.subTest(route=name):
+                url = self.route_url(name)
+                _, small, _ = self.call(name, path=f"{url}?page_size=5")
+                _, large, _ = self.call(name, path=f"{url}?page_size=20")
+                self.assertEqual(small, large, f"{name}: {small} queries at 5 rows, {large} at 20")
+
+    # Mutating routes
+    def test_auth_routes_within_budget(self):
+        self.call_within_budget('login', 'post', {'username': 'student0', 'password': 'password123'}, role='anonymous')
+
+        self.login_as('student')
+        self.call_within_budget('save-push-token', 'post', {'expo_push_token': 'ExponentPushToken[test]'})
+        self.call_within_budget('remove-push-token', 'post')
+        self.call_within_budget('edit-profile', 'patch', {'phone_number': '91234567'})
+        self.call_within_budget('change-password', 'post', {
+            'current_password': 'password123',
+            'new_password': 'password456',
+            'confirm_password': 'password456'
+        })
+        self.call_within_budget('logout', 'post')
+
+    def test_password_reset_routes_within_budget(self):
+        email = self.student_user.email
+        self.call_within_budget('request-otp', 'post', {'email': email}, role='anonymous')
+        self.assertEqual(len(mail.outbox), 1)
+
+        otp = cache.get(f"password_reset_{email}")
+        self.call_within_budget('verify-otp', 'post', {'email': email, 'otp': otp})
+        self.call_within_budget('reset-password', 'post', {
+            'email': email,
+            'otp': otp,
+            'new_password': 'password456',
+            'confirm_password': 'password456'
+        })
+
+    def test_student_actions_within_budget(self):
+        open_event = Event.objects.create(
+            title="Open Day", message="Teaser", description="Details", organizer="Admissions",
+            event_date=timezone.now() + timedelta(days=7), venue="Hall", slot_limit=50
+        )
+
+        self.login_as('student')
+        self.call_within_budget('mark-one-read', 'post')
+        self.call_within_budget('mark-read', 'post')
+        self.call_within_budget('join-event', 'post', {'event_id': open_event.pk})
+        self.call_within_budget('quit-event', 'post', {'event_id': self.event.pk})
+        self.call_within_budget('apply-leaves', 'post', {
+            'start_date': self.today.isoformat(),
+            'end_date': self.today.isoformat(),
+            'reason': "Medical",
+            'description': "Clinic visit"
+        })
+        self.call_within_budget('apply-appeals', 'post', {
+            'session_id': self.sessions[0].pk,
+            'reason': "Camera missed me",
+            'description': "Was seated at the back"
+        })
+
+    def test_mark_attendance_within_budget(self):
+        entry = timezone.make_aware(datetime.combine(self.today, dt_time(10, 5)))
+
+        self.call_within_budget('mark-attendance', 'post', {
+            'student_id': self.student.student_id,
+            'venue': self.live_session.venue.name,
+            'entry_time_stamp': entry.isoformat(),
+            'exit_time_stamp': None
+        }, role='anonymous')
+        self.call_within_budget('mark-attendance', 'post', {
+            'student_id': self.student.student_id,
+            'venue': self.live_session.venue.name,
+            'entry_time_stamp': entry.isoformat(),
+            'exit_time_stamp': (entry + timedelta(minutes=90)).isoformat()
+        })
+
+    def test_reschedule_class_within_budget(self):
+        response = self.call_within_budget(
+            'get-reschedule-options', 'post', {'session_id': self.reschedulable.pk}, role='lecturer'
+        )
+        option = response.data['options'][0]
+
+        self.call_within_budget('reschedule-class', 'post', {
+            'session_id': self.reschedulable.pk,
+            'date': option['date'].isoformat(),
+            'start_time': option['start_time'].strftime("%H:%M:%S"),
+            'end_time': option['end_time'].strftime("%H:%M:%S")
+        })
+
+    # Report, opt-in with QUERY_BUDGET_REPORT=1
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        if os.environ.get('QUERY_BUDGET_REPORT') != '1' or not cls.timings:
+            return
+
+        print(f"\n{'route':<32}{'calls':>6}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'budget':>8}")
+        for name in sorted(cls.timings):
+            samples = cls.timings[name]
+            print(
+                f"{name:<32}{len(samples):>6}{percentile(samples, 50):>9.1f}{percentile(samples, 95):>9.1f}"
+                f"{cls.query_counts.get(name, 0):>9}{QUERY_BUDGETS.get(name, '-'):>8}"
+            )
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from unittest import mock
+from django.utils import timezone
+from core.logic.sync_logics import SyncLogic
+from core.models import Student, ClassSession
+from core.tests.base import AttendifyTestCase
+
+
+class TimetableSyncTests(AttendifyTestCase):
+    def test_timetable_syncs_by_cursor_in_pages(self):
+        self.backdate_timetables()
+        expected = sorted(ClassSession.objects.filter(module__students=self.student).values_list('pk', flat=True))
+
+        with mock.patch.object(SyncLogic, 'PAGE_SIZE', 4):
+            changed, deleted, cursor, pages = self.sync_timetable(self.student_user)
+        self.assertEqual(sorted(changed), expected)
+        self.assertEqual(deleted, [])
+        self.assertGreater(pages, 1)
+
+        # Nothing changed since the cursor
+        changed, deleted, _, pages = self.sync_timetable(self.student_user, cursor, later=True)
+        self.assertEqual((changed, deleted, pages), ([], [], 1))
+
+        # Only the edited session comes back
+        self.reschedulable.name = "Week 12 Lecture (moved)"
+        self.reschedulable.save()
+        changed, _, _, _ = self.sync_timetable(self.student_user, cursor, later=True)
+        self.assertEqual(changed, [self.reschedulable.pk])
+
+    def test_timetable_sync_enrolment_reaches_only_the_new_student(self):
+        newcomer = Student.objects.create(
+            user=self.create_user("newcomer", "student"), student_id="N0001", programme="Computer Science"
+        )
+        self.backdate_timetables()
+
+        _, _, enrolled_cursor, _ = self.sync_timetable(self.student_user)
+        changed, _, newcomer_cursor, _ = self.sync_timetable(newcomer.user)
+        self.assertEqual(changed, [])
+
+        self.modules[2].students.add(newcomer)
+        module_sessions = sorted(self.modules[2].sessions.values_list('pk', flat=True))
+
+        changed, deleted, _, _ = self.sync_timetable(newcomer.user, newcomer_cursor, later=True)
+        self.assertEqual(sorted(changed), module_sessions)
+        self.assertEqual(deleted, [])
+
+        # Students already enrolled do not download the module again
+        changed, deleted, _, _ = self.sync_timetable(self.student_user, enrolled_cursor, later=True)
+        self.assertEqual((changed, deleted), ([], []))
+
+        # Dropping the module tombstones its sessions, a page at a time
+        self.modules[2].students.remove(newcomer)
+        with mock.patch.object(SyncLogic, 'PAGE_SIZE', 4):
+            changed, deleted, _, pages = self.sync_timetable(newcomer.user, newcomer_cursor, later=True)
+        self.assertEqual(changed, [])
+        self.assertEqual(sorted(deleted), module_sessions)
+        self.assertGreater(pages, 1)
+
+    def test_timetable_sync_resets_stale_cursors(self):
+        self.backdate_timetables()
+        stale = timezone.now() - SyncLogic.TOMBSTONE_RETENTION - timedelta(days=1)
+        cursor = SyncLogic.encode_cursor(stale, 0, stale, 0)
+
+        self.client.force_authenticate(user=self.student_user)
+        response = self.call_within_budget('sync', data={'timetable': cursor})
+        page = response.data['timetable']
+
+        self.assertTrue(page['reset'])
+        self.assertEqual(page['deleted'], [])
+        self.assertEqual(
+            sorted(row['id'] for row in page['changed']),
+            sorted(ClassSession.objects.filter(module__students=self.student).values_list('pk', flat=True))
+        )
+
+        response, _, _ = self.call('sync', data={'timetable': 'not a cursor'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import cv2
+import httpx
+
+from edge_pipeline.metrics import COMPREFACE_MS, COMPREFACE_REQUESTS
+
+RECOGNIZE_PATH = "/api/v1/recognition/recognize"
+DETECTION_PATH = "/api/v1/detection/detect"
+NO_FACE_STATUS = 400    # CompreFace answers 400 (code 28) when there is no face in the image
+
+
+def query_params(options):
+    # Same encoding as the SDK: booleans go as "true"/"false"
+    return {key: str(value).lower() if isinstance(value, bool) else value for key, value in (options or {}).items()}
+
+
+class AsyncCompreFace:
+    """
+    CompreFace recognize/detect calls for every camera at once, over one
+    keep-alive connection pool instead of a new connection per request.
+
+    The client runs on an asyncio loop in a background thread, so the main
+    loop stays synchronous. recognize_all() encodes each frame in a worker
+    thread and posts it as soon as it is ready, so encoding one camera
+    overlaps the round trips of the others. At most max_in_flight requests
+    are out at a time. With an encoder (roi.FrameEncoder) frames are cropped
+    and downscaled before upload, and boxes are mapped back afterwards.
+
+    Every call is timed. stats keeps running totals and calls keeps the
+    recent ones as {"cam_id", "ms", "bytes", "status", "error"}. on_call, if
+    given, is called with (cam_id, ms, error) from the client's thread.
+    """
+
+    def __init__(self, host, port, api_key, options, detection_api_key=None, detection_options=None,
+                 max_in_flight=4, timeout=5, jpeg_quality=75, encoder=None, on_call=None):
+        self.base_url = f"{host}:{port}"
+        self.services = {False: (RECOGNIZE_PATH, api_key, query_params(options))}
+        if detection_api_key:
+            self.services[True] = (DETECTION_PATH, detection_api_key, query_params(detection_options))
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.jpeg_quality = jpeg_quality
+        self.encoder = encoder
+        self.on_call = on_call
+
+        self.stats = {"calls": 0, "errors": 0, "timeouts": 0}
+        self.calls = deque(maxlen=1000)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+
+    async def _open(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        )
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+
+    def latencies(self):
+        return [call["ms"] for call in self.calls if call["error"] is None]
+
+    def record(self, cam_id, endpoint, ms, size, status, error):
+        self.stats["calls"] += 1
+        if error:
+            self.stats["errors"] += 1
+            print(f"CompreFace error ({cam_id}): {error}")
+        else:
+            COMPREFACE_MS.observe(ms, camera=cam_id, endpoint=endpoint)
+        outcome = "timeout" if error and error.startswith("timeout") else "error" if error else "ok"
+        COMPREFACE_REQUESTS.inc(camera=cam_id, endpoint=endpoint, outcome=outcome)
+        if self.on_call:
+            self.on_call(cam_id, ms, error)
+        self.calls.append({"cam_id": cam_id, "ms": round(ms, 2), "bytes": size, "status": status, "error": error})
+
+    def encode(self, cam_id, frame):
+        if self.encoder:
+            return self.encoder.encode(cam_id, frame)
+        _, im_buf_arr = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        return im_buf_arr.tobytes(), None
+
+    async def _call(self, cam_id, frame, use_detection):
+        path, api_key, params = self.services[use_detection and True in self.services]
+        payload, transform = await asyncio.to_thread(self.encode, cam_id, frame)
+
+        async with self.in_flight:
+            started = time.perf_counter()
+            status, data, error = None, None, None
+            try:
+                response = await self.client.post(
+                    path,
+                    params=params,
+                    headers={"x-api-key": api_key},
+                    files={"file": ("frame.jpg", payload, "image/jpeg")}
+                )
+                status = response.status_code
+                if status == NO_FACE_STATUS:
+                    data = {"result": []}
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+            except httpx.TimeoutException as e:
+                self.stats["timeouts"] += 1
+                error = f"timeout: {e!r}"
+            except (httpx.HTTPError, ValueError) as e:
+                error = str(e) or repr(e)
+            endpoint = "detect" if path == DETECTION_PATH else "recognize"
+            self.record(cam_id, endpoint, (time.perf_counter() - started) * 1000, len(payload), status, error)
+
+        if data and self.encoder:
+            self.encoder.restore(data.get("result"), transform)
+        return cam_id, data
+
+    async def _recognize_all(self, frames, use_detection):
+        calls = [self._call(cam_id, frame, use_detection) for cam_id, frame in frames.items()]
+        return [(cam_id, data) for cam_id, data in await asyncio.gather(*calls) if data is not None]
+
+    def recognize_all(self, frames, use_detection=False):
+        """
+        {cam_id: frame} -> [(cam_id, CompreFace response)], in camera order.
+        Cameras whose call failed are left out.
+        """
+        if not frames:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self._recognize_all(frames, use_detection), self.loop)
+        return future.result()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
@@ -0,0 +1,263 @@
+# Offline benchmark for the recognition edge, run from facial-recognition-model/:
+#   python -m edge_pipeline.bench --source clips/lecture.mp4 --source frames/cam2 --speed max --latency-ms 120
+# Recorded footage stands in for the IP cameras and edge_pipeline.stub_server
+# stands in for CompreFace and the backend's /session-roster/ and /mark-attendance/.
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from edge_pipeline.replay import replay_factory
+from edge_pipeline.stub_server import StubServer, load_script
+
+EDGE_DIR = Path(__file__).resolve().parents[1]
+
+
+def load_edge_module():
+    # facial-recognition.py is a script with a dash in its name, so load it by path
+    spec = importlib.util.spec_from_file_location("facial_recognition", EDGE_DIR / "facial-recognition.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarise(samples):
+    return {
+        "count": len(samples),
+        "mean": round(statistics.fmean(samples), 2) if samples else 0.0,
+        "p50": round(percentile(samples, 50), 2),
+        "p95": round(percentile(samples, 95), 2),
+    }
+
+
+class Timed:
+    """Wraps a callable and records how long each call takes, in ms"""
+
+    def __init__(self, func, per_item=False):
+        self.func = func
+        self.per_item = per_item
+        self.samples = []
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = self.func(*args, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        # Liveness is called with a list of crops; report cost per face
+        if self.per_item and args and len(args[0]):
+            elapsed /= len(args[0])
+        self.samples.append(elapsed)
+        return result
+
+
+def run(args):
+    server = StubServer(load_script(args.script), args.latency_ms, args.jitter_ms).start()
+
+    # The pipeline reads these when it is constructed
+    os.environ["HOST"] = f"http://{server.host}"
+    os.environ["PORT"] = str(server.port)
+    os.environ["COMPR_FACE_API_KEY"] = "replay"
+    os.environ["BACKEND_API_URL"] = f"{server.base_url}/api/"
+    os.environ["ATTENDANCE_API_URL"] = f"{server.base_url}/api/mark-attendance/"
+    os.environ["EDGE_API_KEY"] = "replay"
+    if args.gallery:
+        # Detect + local gallery match instead of CompreFace recognition
+        os.environ["COMPR_FACE_DETECTION_API_KEY"] = "replay"
+        os.environ["GALLERY_CACHE_DIR"] = tempfile.mkdtemp(prefix="gallery_")
+    os.environ["COMPREFACE_MAX_IN_FLIGHT"] = str(args.in_flight)
+    if args.workers:
+        # Capture and inference move to worker processes, which open the sources themselves
+        os.environ["INFERENCE_WORKERS"] = str(args.workers)
+
+    sources = [str(Path(source).resolve()) for source in args.source]
+    os.chdir(EDGE_DIR)
+    edge = load_edge_module()
+    edge.recog_interval = args.recog_interval
+
+    if args.no_quality_gate:
+        # Scripted boxes may land on blank or blurry parts of the footage
+        edge.quality_thresholds = {"min_face_px": 0, "min_sharpness": 0.0, "min_brightness": 0,
+                                   "max_brightness": 255, "max_yaw": 90.0, "max_pitch": 90.0}
+
+    factory = replay_factory(speed=args.speed, fps=args.fps, loop=args.loop)
+    cameras = [{"id": f"replay{i}", "url": source} for i, source in enumerate(sources)]
+    if args.roi:
+        for cam in cameras:
+            cam["roi"] = [float(v) for v in args.roi.split(",")]
+    if args.door:
+        x0, y0, x1, y1, inside_x, inside_y = (float(v) for v in args.door.split(","))
+        for cam in cameras:
+            cam["door"] = {"line": [[x0, y0], [x1, y1]], "inside": [inside_x, inside_y]}
+    camera = edge.ThreadedCamera(args.venue, cameras, capture_factory=factory, display=args.display)
+    if camera.gallery:
+        camera.gallery.sync()
+    if camera.pool:
+        # Recognition runs in the workers, timed per frame there
+        recognize = match = Timed(None)
+    elif camera.gallery:
+        recognize = Timed(camera.detection.detect)
+        camera.detection.detect = recognize
+        match = Timed(camera.gallery.match)
+        camera.gallery.match = match
+    else:
+        recognize = Timed(camera.recognition.recognize)
+        camera.recognition.recognize = recognize
+        match = Timed(lambda results, *args: results)
+    # with workers this only sees gallery matches, CompreFace matches are checked in the workers
+    liveness = Timed(camera.liveness_predictor.predict, per_item=True)
+    camera.liveness_predictor.predict = liveness
+    duration = args.duration or (30 if camera.pool else 0)
+
+    if camera.liveness_predictor:
+        # the model loads in the background; start the clock once it can run
+        camera.liveness_predictor.loaded.wait()
+    started = time.perf_counter()
+    update_samples = []
+    try:
+        while camera.is_active() and (camera.pool or any(cap.isOpened() for cap in factory.captures)):
+            if duration and time.perf_counter() - started > duration:
+                break
+            tick = time.perf_counter()
+            camera.update()
+            update_samples.append((time.perf_counter() - tick) * 1000)
+            time.sleep(args.loop_sleep)
+    except KeyboardInterrupt:
+        pass
+
+    # Let in-flight attendance posts land before reading the sink
+    time.sleep(0.5)
+    elapsed = time.perf_counter() - started
+    client_stats = None
+    if camera.compreface_client:
+        # CompreFace calls go through the async client, which times them itself
+        recognize.samples = camera.compreface_client.latencies()
+        client_stats = dict(camera.compreface_client.stats)
+        camera.compreface_client.close()
+    pool_stats = None
+    if camera.pool:
+        pool_stats = dict(camera.pool.stats, worker_ms=summarise(list(camera.pool.worker_ms)))
+        camera.pool.close()
+    server.stop()
+
+    frames = sum(cap.frames_read for cap in factory.captures)
+    skipped = sum(cap.frames_skipped for cap in factory.captures)
+    events = server.state.events
+
+    # Entry events are stamped when the face is confirmed; exit events carry the
+    # last sighting, so their latency includes the absence threshold
+    entry_latency, exit_latency = [], []
+    for event in events:
+        entry = event.get("entry_time_stamp")
+        exit = event.get("exit_time_stamp")
+        entry_ts = datetime.fromisoformat(entry).timestamp() if entry else None
+        exit_ts = datetime.fromisoformat(exit).timestamp() if exit else None
+
+        if entry_ts and (exit_ts is None or entry_ts > exit_ts):
+            entry_latency.append((event["received_at"] - entry_ts) * 1000)
+        elif exit_ts:
+            exit_latency.append((event["received_at"] - exit_ts) * 1000)
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "sources": len(cameras),
+        "speed": args.speed,
+        "frames": frames,
+        "frames_skipped": skipped,
+        "frames_per_s": round(frames / elapsed, 2) if elapsed else 0.0,
+        "recognition_calls": server.state.recognize_calls,
+        "recognition_calls_per_s": round(server.state.recognize_calls / elapsed, 2) if elapsed else 0.0,
+        "mode": "gallery" if camera.gallery else "compreface",
+        "recognize_ms": summarise(recognize.samples),
+        "gallery_match_ms": summarise(match.samples),
+        "liveness_ms_per_face": summarise(liveness.samples),
+        "update_ms": summarise(update_samples),
+        "upload_bytes": summarise(list(camera.encoder.uploads)),
+        "compreface_client": client_stats,
+        "pool": pool_stats,
+        "events": len(events),
+        "motion": {cam_id: dict(gate.counts) for cam_id, gate in camera.motion.items()},
+        "startup_s": camera.startup.report()["stages"],
+        "fusion": dict(camera.fusion.counts),
+        "door_crossings": dict(camera.doors.counts) if camera.doors else None,
+        "recognition_interval_s": {cam_id: round(camera.rate.interval(cam_id), 2) for cam_id in camera.motion},
+        "quality_passed": camera.quality.passed,
+        "quality_rejected": dict(camera.quality.rejected),
+        "entry_event_latency_ms": summarise(entry_latency),
+        "exit_event_latency_ms": summarise(exit_latency),
+    }
+
+
+def print_report(report):
+    print(f"\n=== Replay benchmark ({report['sources']} source(s), {report['mode']}, speed={report['speed']}, {report['elapsed_s']}s) ===")
+    print(f"Frames          : {report['frames']} read, {report['frames_skipped']} skipped, {report['frames_per_s']} fps")
+    print(f"Recognition     : {report['recognition_calls']} calls, {report['recognition_calls_per_s']} calls/s")
+    for key, label in [("recognize_ms", "Recognize ms"), ("gallery_match_ms", "Gallery match ms"),
+                       ("liveness_ms_per_face", "Liveness ms/face"), ("upload_bytes", "Upload bytes"),
+                       ("update_ms", "update() ms"), ("entry_event_latency_ms", "Entry latency ms"),
+                       ("exit_event_latency_ms", "Exit latency ms")]:
+        stats = report[key]
+        print(f"{label:<16}: n={stats['count']} mean={stats['mean']} p50={stats['p50']} p95={stats['p95']}")
+    for cam_id, counts in report["motion"].items():
+        print(f"Motion {cam_id:<9}: {counts['motion']} on motion, {counts['keepalive']} keep-alive, {counts['skipped']} skipped")
+    print(f"Quality gate    : {report['quality_passed']} passed, rejected {report['quality_rejected']}")
+    print(f"Startup s       : {report['startup_s']}")
+    print(f"Rate intervals  : {report['recognition_interval_s']}")
+    if report["door_crossings"]:
+        print(f"Door crossings  : {report['door_crossings']['entry']} in, {report['door_crossings']['exit']} out")
+    fusion = report["fusion"]
+    print(f"Fusion          : {fusion['sightings']} sightings, {fusion['merged']} merged, {fusion['observations']} observations")
+    if report["compreface_client"]:
+        client = report["compreface_client"]
+        print(f"Async client    : {client['calls']} calls, {client['errors']} errors, {client['timeouts']} timeouts")
+    if report["pool"]:
+        pool = report["pool"]
+        print(f"Inference pool  : {pool['dispatched']} dispatched, {pool['completed']} completed, "
+              f"{pool['dropped']} stale, {pool['errors']} errors")
+        stats = pool["worker_ms"]
+        print(f"{'Worker ms/frame':<16}: n={stats['count']} mean={stats['mean']} p50={stats['p50']} p95={stats['p95']}")
+    print(f"Events          : {report['events']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the recognition edge on recorded footage")
+    parser.add_argument("--source", action="append", required=True, help="Video file or image folder; repeat for more cameras")
+    parser.add_argument("--speed", choices=["real", "max"], default="real")
+    parser.add_argument("--fps", type=float, help="Override source fps (image folders default to 10)")
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--duration", type=float, default=0, help="Stop after N seconds (0 = until sources end)")
+    parser.add_argument("--script", help="Scripted faces JSON for the stub recognizer")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Stub recognize latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--recog-interval", type=float, default=0)
+    parser.add_argument("--loop-sleep", type=float, default=0.1, help="Sleep between update() calls, as in the main loop")
+    parser.add_argument("--venue", default="REPLAY")
+    parser.add_argument("--gallery", action="store_true", help="Match against the local face gallery")
+    parser.add_argument("--no-quality-gate", action="store_true", help="Accept every face regardless of quality")
+    parser.add_argument("--door", help="x0,y0,x1,y1,inside_x,inside_y: door line and a point on the room side, for every source")
+    parser.add_argument("--roi", help="x0,y0,x1,y1 fractions of the frame, applied to every source")
+    parser.add_argument("--in-flight", type=int, default=4,
+                        help="Concurrent CompreFace calls (0 = one camera at a time through the SDK)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Inference worker processes (video files only, read at full speed; default duration 30s)")
+    parser.add_argument("--display", action="store_true")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
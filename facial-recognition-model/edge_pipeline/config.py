@@ -0,0 +1,88 @@
+import json
+import os
+import time
+
+
+def parse_config(config):
+    """
+    {venue: [camera, ...]} from config.json. Either one venue:
+        {"venue": "BLK A 5.05", "cameras": [...]}
+    or several served by the same process:
+        {"venues": [{"venue": "BLK A 5.05", "cameras": [...]}, ...]}
+    Camera ids default to cam_<n>, numbered across the whole file. They key
+    frame rings, rate control and metrics, so they must be unique across venues.
+    """
+    venues = config.get("venues")
+    if venues is None:
+        venues = [{"venue": config.get("venue", "Unknown"), "cameras": config.get("cameras", [])}]  # venue = unknown if no venue
+
+    parsed = {}
+    seen = set()
+    n = 0
+    for entry in venues:
+        venue = entry.get("venue", "Unknown")
+        if venue in parsed:
+            raise ValueError(f"venue {venue} is listed twice")
+        cameras = []
+        for cam in entry.get("cameras", []):
+            cam = dict(cam, id=cam.get("id", f"cam_{n}"))
+            n += 1
+            if not cam.get("url"):
+                raise ValueError(f"camera {cam['id']} ({venue}) has no url")
+            if cam["id"] in seen:
+                raise ValueError(f"camera id {cam['id']} is used twice")
+            seen.add(cam["id"])
+            cameras.append(cam)
+        parsed[venue] = cameras
+    return parsed
+
+
+def diff_cameras(old, new):
+    """-> (added, removed, changed) camera lists between two camera lists of a venue, matched by id"""
+    old_by_id = {cam["id"]: cam for cam in old}
+    new_by_id = {cam["id"]: cam for cam in new}
+    added = [cam for cam_id, cam in new_by_id.items() if cam_id not in old_by_id]
+    removed = [cam for cam_id, cam in old_by_id.items() if cam_id not in new_by_id]
+    changed = [cam for cam_id, cam in new_by_id.items() if cam_id in old_by_id and old_by_id[cam_id] != cam]
+    return added, removed, changed
+
+
+class ConfigWatcher:
+    """
+    Re-reads config.json when its modification time changes, checked at most
+    every interval seconds from the main loop. A file that does not parse
+    (e.g. caught halfway through being saved) is reported and skipped, the
+    last good config stays in use until the file is fixed.
+    """
+
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = interval
+        self.mtime = None
+        self.checked = 0.0
+        self.config = self.load()
+
+    def load(self):
+        self.mtime = os.stat(self.path).st_mtime
+        with open(self.path, "r") as f:
+            return parse_config(json.load(f))
+
+    def poll(self, now_ts=None):
+        """The new {venue: cameras} if config.json changed since the last load, else None"""
+        now_ts = now_ts or time.time()
+        if now_ts - self.checked < self.interval:
+            return None
+        self.checked = now_ts
+
+        try:
+            if os.stat(self.path).st_mtime == self.mtime:
+                return None
+            config = self.load()
+        except (OSError, ValueError) as e:     # json.JSONDecodeError is a ValueError
+            print(f"Config not reloaded, keeping the previous one: {e}")
+            return None
+
+        if config == self.config:
+            return None
+        self.config = config
+        return config
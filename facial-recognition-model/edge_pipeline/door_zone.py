@@ -0,0 +1,88 @@
+from edge_pipeline.metrics import DOOR_CROSSINGS
+
+INSIDE = 1
+OUTSIDE = -1
+
+
+class DoorLine:
+    """
+    A line across a camera's doorway, in fractions of the frame, plus a point
+    anywhere on the room side of it. Points within margin of the line, or
+    beyond its ends, are on neither side.
+    """
+
+    def __init__(self, line, inside, margin=0.03, overhang=0.15):
+        (self.x0, self.y0), (self.x1, self.y1) = line
+        self.length = ((self.x1 - self.x0) ** 2 + (self.y1 - self.y0) ** 2) ** 0.5
+        self.margin = margin
+        self.overhang = overhang
+        if self.length == 0:
+            raise ValueError("door line needs two different points")
+        self.inside_sign = 1 if self.signed_distance(*inside) > 0 else -1
+
+    def signed_distance(self, x, y):
+        # cross product of the line and the point, scaled to frame fractions
+        return ((self.x1 - self.x0) * (y - self.y0) - (self.y1 - self.y0) * (x - self.x0)) / self.length
+
+    def side(self, x, y):
+        # how far along the line the point falls, 0 at one end and 1 at the other
+        along = ((x - self.x0) * (self.x1 - self.x0) + (y - self.y0) * (self.y1 - self.y0)) / self.length ** 2
+        if not -self.overhang <= along <= 1 + self.overhang:
+            return None
+        distance = self.signed_distance(x, y)
+        if abs(distance) < self.margin:
+            return None
+        return INSIDE if distance * self.inside_sign > 0 else OUTSIDE
+
+
+class DoorZone:
+    """
+    Entry/exit from students crossing door lines, instead of inferring exits
+    from how long someone has not been seen.
+
+    Cameras with a "door" in config.json ({"line": [[x, y], [x, y]],
+    "inside": [x, y]}) remember which side each recognised student was last
+    on. A change of side within max_gap seconds is a crossing: inward is
+    "entry", outward is "exit". Sightings on the outside of a door do not
+    count as being in the room, so people passing in the corridor are not
+    marked present.
+    """
+
+    def __init__(self, cameras, max_gap=3.0, margin=0.03):
+        self.doors = {
+            cam["id"]: DoorLine(cam["door"]["line"], cam["door"]["inside"], margin)
+            for cam in cameras if cam.get("door")
+        }
+        self.max_gap = max_gap
+        self.last = {}      # (cam_id, student_id) -> (side, ts)
+        self.counts = {"entry": 0, "exit": 0}
+
+    def __bool__(self):
+        return bool(self.doors)
+
+    def observe(self, cam_id, student_id, box, width, height, now_ts):
+        """-> (side, crossing). side is INSIDE, OUTSIDE or None; crossing is "entry", "exit" or None"""
+        door = self.doors.get(cam_id)
+        if door is None or not box:
+            return None, None
+
+        x = (box["x_min"] + box["x_max"]) / 2 / width
+        y = (box["y_min"] + box["y_max"]) / 2 / height
+        side = door.side(x, y)
+        if side is None:
+            return None, None
+
+        key = (cam_id, student_id)
+        previous = self.last.get(key)
+        self.last[key] = (side, now_ts)
+        if previous is None or previous[0] == side or now_ts - previous[1] > self.max_gap:
+            return side, None
+
+        crossing = "entry" if side == INSIDE else "exit"
+        self.counts[crossing] += 1
+        DOOR_CROSSINGS.inc(camera=cam_id, direction=crossing)
+        return side, crossing
+
+    def prune(self, now_ts):
+        # a side older than max_gap can no longer make a crossing
+        self.last = {key: value for key, value in self.last.items() if now_ts - value[1] <= self.max_gap}
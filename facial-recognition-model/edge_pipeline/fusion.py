@@ -0,0 +1,66 @@
+class SightingFusion:
+    """
+    Merges sightings of the same student across the venue's cameras.
+
+    Sightings of a student less than window seconds after the first one form
+    one observation, whichever cameras they came from. flush() returns the
+    best sighting of each observation once its window has closed (highest
+    quality score, then similarity). So an observation costs one liveness
+    check and adds one entry to the student's liveness history, and entry and
+    exit events come from a single stream per student for the venue.
+    """
+
+    def __init__(self, window=0.3):
+        self.window = window
+        self.pending = {}   # student_id -> {"first": ts, "best": sighting, "cameras": set}
+        self.counts = {"sightings": 0, "merged": 0, "observations": 0}
+
+    def __len__(self):
+        return len(self.pending)
+
+    @staticmethod
+    def rank(sighting):
+        return sighting["score"], sighting["similarity"]
+
+    def add(self, student_id, cam_id, result, similarity, seen_at, crop=None):
+        """crop is the face cut from the frame, when liveness still has to run on it"""
+        sighting = {
+            "student_id": student_id,
+            "cam_id": cam_id,
+            "result": result,
+            "similarity": similarity,
+            "score": (result.get("quality") or {}).get("score", 0.0),
+            "seen_at": seen_at,
+            "crop": crop,
+        }
+        self.counts["sightings"] += 1
+
+        group = self.pending.get(student_id)
+        if group is None:
+            self.pending[student_id] = {"first": seen_at.timestamp(), "best": sighting, "cameras": {cam_id}}
+            return
+
+        self.counts["merged"] += 1
+        group["cameras"].add(cam_id)
+        if self.rank(sighting) > self.rank(group["best"]):
+            group["best"] = sighting
+
+    def flush(self, now_ts, force=False):
+        """Best sighting of every observation whose window has closed, oldest first"""
+        ready = [
+            student_id for student_id, group in self.pending.items()
+            if force or now_ts - group["first"] >= self.window
+        ]
+        observations = []
+        for student_id in ready:
+            group = self.pending.pop(student_id)
+            observations.append(dict(group["best"], cameras=group["cameras"]))
+        observations.sort(key=lambda sighting: sighting["seen_at"])
+        self.counts["observations"] += len(observations)
+        return observations
+
+    def discard(self, student_id):
+        self.pending.pop(student_id, None)
+
+    def clear(self):
+        self.pending = {}
@@ -0,0 +1,286 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+
+class FaceGallery:
+    """
+    Local copy of the face embeddings for the students taking classes at this
+    venue, synced by cursor from the backend's face-gallery/ endpoint.
+
+    Embeddings live L2-normalised in a memory-mapped float32 matrix on disk, so
+    a restart (or a WAN outage) keeps the last synced gallery. identify() scores
+    a batch of faces against every row with one matrix product, instead of an
+    HTTP round trip per frame.
+
+    Rows are kept dense: a deleted embedding is replaced by the last row. Each
+    full sync (first run, every full_sync_interval, or when the backend asks
+    for a reset) is built into a fresh matrix and swapped in, which also drops
+    students whose enrolment moved away from this venue.
+    """
+
+    def __init__(self, api_url, venue, edge_key, cache_dir="gallery_cache",
+                 sync_interval=60, full_sync_interval=24 * 3600, timeout=10):
+        self.url = api_url.rstrip("/") + "/face-gallery/"
+        self.venue = venue
+        self.headers = {"X-Edge-Key": edge_key}
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+        self.timeout = timeout
+
+        safe_venue = "".join(c if c.isalnum() else "_" for c in venue)
+        self.cache_dir = Path(cache_dir)
+        self.matrix_path = self.cache_dir / f"{safe_venue}.f32"
+        self.meta_path = self.cache_dir / f"{safe_venue}.json"
+
+        self.lock = threading.Lock()
+        self.matrix = None      # np.memmap, capacity x dims
+        self.dims = 0
+        self.count = 0
+        self.ids = []           # row -> embedding id
+        self.labels = []        # row -> student id
+        self.rows = {}          # embedding id -> row
+        self.cursor = None
+        self.synced_at = 0.0
+        self.full_synced_at = 0.0
+        self._roster_mask = (None, None)
+
+        self.active = False
+        self.load()
+
+    @property
+    def ready(self):
+        return self.count > 0
+
+    def __len__(self):
+        return self.count
+
+    # ---- persistence ----
+    def load(self):
+        if not (self.meta_path.exists() and self.matrix_path.exists()):
+            return
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            capacity = meta["capacity"]
+            self.dims = meta["dims"]
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dims))
+            self.ids = meta["ids"]
+            self.labels = meta["labels"]
+            self.count = len(self.ids)
+            self.rows = {embedding_id: row for row, embedding_id in enumerate(self.ids)}
+            self.cursor = meta.get("cursor")
+            self.full_synced_at = meta.get("full_synced_at", 0.0)
+            print(f"Gallery: loaded {self.count} embeddings for {self.venue} from {self.matrix_path}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Gallery cache unreadable, starting empty: {e}")
+            self.matrix, self.dims, self.count = None, 0, 0
+            self.ids, self.labels, self.rows, self.cursor = [], [], {}, None
+
+    def save(self):
+        if self.matrix is None:
+            # Nothing enrolled here any more, don't reload a stale gallery on restart
+            self.meta_path.unlink(missing_ok=True)
+            return
+        self.matrix.flush()
+        meta = {
+            "capacity": self.matrix.shape[0],
+            "dims": self.dims,
+            "ids": self.ids,
+            "labels": self.labels,
+            "cursor": self.cursor,
+            "full_synced_at": self.full_synced_at,
+        }
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _allocate(self, path, capacity, dims):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return np.memmap(path, dtype=np.float32, mode="w+", shape=(max(capacity, 1), dims))
+
+    # ---- updates ----
+    def _grow(self, needed):
+        capacity = self.matrix.shape[0]
+        if needed <= capacity:
+            return
+        grown_path = self.matrix_path.with_suffix(".grow")
+        grown = self._allocate(grown_path, max(needed, capacity * 2), self.dims)
+        grown[:self.count] = self.matrix[:self.count]
+        grown.flush()
+        del self.matrix
+        os.replace(grown_path, self.matrix_path)
+        self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=grown.shape)
+
+    def _upsert(self, changed):
+        if not changed:
+            return
+        vectors = np.asarray([row["embedding"] for row in changed], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+
+        if self.matrix is None or vectors.shape[1] != self.dims:
+            if self.count:
+                raise ValueError(f"Embedding size changed from {self.dims} to {vectors.shape[1]}, full sync needed")
+            self.dims = vectors.shape[1]
+            self.matrix = self._allocate(self.matrix_path, len(changed), self.dims)
+
+        self._grow(self.count + len(changed))
+        for row_data, vector in zip(changed, vectors):
+            row = self.rows.get(row_data["id"])
+            if row is None:
+                row = self.count
+                self.count += 1
+                self.ids.append(row_data["id"])
+                self.labels.append(row_data["student_id"])
+                self.rows[row_data["id"]] = row
+            else:
+                self.labels[row] = row_data["student_id"]
+            self.matrix[row] = vector
+
+    def _delete(self, deleted):
+        for embedding_id in deleted:
+            row = self.rows.pop(embedding_id, None)
+            if row is None:
+                continue
+            last = self.count - 1
+            if row != last:
+                # Move the last row into the hole to keep the matrix dense
+                self.matrix[row] = self.matrix[last]
+                self.ids[row] = self.ids[last]
+                self.labels[row] = self.labels[last]
+                self.rows[self.ids[row]] = row
+            self.ids.pop()
+            self.labels.pop()
+            self.count -= 1
+
+    # ---- sync ----
+    def fetch(self, cursor):
+        response = requests.get(
+            self.url,
+            params={"venue": self.venue, "cursor": cursor or ""},
+            headers=self.headers,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def sync(self, full=False):
+        started = time.time()
+        full = full or self.cursor is None or started - self.full_synced_at >= self.full_sync_interval
+        cursor = None if full else self.cursor
+
+        # Full syncs are staged separately so identify() keeps the old gallery meanwhile
+        pages = []
+        try:
+            while True:
+                page = self.fetch(cursor)
+                if page.get("reset") and not full:
+                    return self.sync(full=True)
+                pages.append(page)
+                cursor = page["cursor"]
+                if not page.get("has_more"):
+                    break
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"Gallery sync error ({self.venue}), keeping {self.count} cached embeddings: {e}")
+            return False
+
+        with self.lock:
+            if full:
+                self.matrix, self.dims, self.count = None, 0, 0
+                self.ids, self.labels, self.rows = [], [], {}
+            try:
+                for page in pages:
+                    self._upsert(page.get("changed", []))
+                    self._delete(page.get("deleted", []))
+            except ValueError as e:
+                print(f"Gallery sync error ({self.venue}): {e}")
+                self.cursor = None
+                return False
+            self.cursor = cursor
+            if full:
+                self.full_synced_at = started
+            self._roster_mask = (None, None)
+            self.save()
+
+        self.synced_at = started
+        changed = sum(len(page.get("changed", [])) for page in pages)
+        deleted = sum(len(page.get("deleted", [])) for page in pages)
+        if full or changed or deleted:
+            print(f"Gallery: {'full' if full else 'delta'} sync, +{changed} -{deleted}, {self.count} embeddings")
+        return True
+
+    def start(self):
+        self.active = True
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.active = False
+
+    def _run(self):
+        while self.active:
+            self.sync()
+            time.sleep(self.sync_interval)
+
+    # ---- matching ----
+    def _mask_for(self, roster):
+        cached_roster, mask = self._roster_mask
+        if roster is cached_roster and mask is not None:
+            return mask
+        mask = np.fromiter((label in roster for label in self.labels), dtype=bool, count=self.count)
+        self._roster_mask = (roster, mask)
+        return mask
+
+    def identify(self, embeddings, k=1, roster=None):
+        """
+        Top-k students per face, as CompreFace-style subject lists sorted by
+        similarity. roster (a set of student ids) restricts the candidates.
+        """
+        if not embeddings:
+            return []
+
+        with self.lock:
+            if not self.count:
+                return [[] for _ in embeddings]
+
+            queries = np.asarray(embeddings, dtype=np.float32)
+            queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+            scores = queries @ self.matrix[:self.count].T   # faces x rows, cosine similarity
+
+            if roster is not None:
+                scores[:, ~self._mask_for(roster)] = -np.inf
+
+            # A student has one row per pose, so take extra rows to fill k distinct students
+            take = min(self.count, k * 3)
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+
+            results = []
+            for face_scores, rows in zip(scores, top):
+                subjects = []
+                seen = set()
+                for row in rows[np.argsort(-face_scores[rows])]:
+                    similarity = float(face_scores[row])
+                    if similarity == -np.inf or self.labels[row] in seen:
+                        continue
+                    seen.add(self.labels[row])
+                    subjects.append({"subject": self.labels[row], "similarity": round(similarity, 5)})
+                    if len(subjects) == k:
+                        break
+                results.append(subjects)
+        return results
+
+    def match(self, results, k=1, roster=None):
+        # Fills "subjects" on CompreFace detection results that carry an "embedding"
+        faces = [result for result in results or [] if result.get("embedding")]
+        subjects = self.identify([face.pop("embedding") for face in faces], k, roster)
+        for face, face_subjects in zip(faces, subjects):
+            face["subjects"] = face_subjects
+        return results
@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BYTES_BUCKETS = (5_000, 10_000, 20_000, 40_000, 60_000, 100_000, 200_000, 500_000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+class Registry:
+    """
+    Metrics of this process, rendered in the Prometheus text format.
+    Collectors are called just before rendering, for values that are cheaper
+    to read on scrape than to keep up to date (e.g. shared-memory ring heads).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def remove_collector(self, collector):
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    def render(self):
+        for collector in list(self.collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        return "".join(metric.render() for metric in self.metrics)
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}    # label values -> value
+        self.lock = threading.Lock()
+        registry.register(self)
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def remove(self, **labels):
+        # for a camera or venue that is gone, rather than exporting its last value forever
+        with self.lock:
+            self.values.pop(self.key(labels), None)
+
+    def header(self):
+        return f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+
+    def render(self):
+        with self.lock:
+            values = dict(self.values)
+        lines = [f"{self.name}{format_labels(self.labelnames, key)} {value}\n" for key, value in values.items()]
+        return self.header() + "".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=MS_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                # one count per bucket, then sum and count
+                series = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self.lock:
+            values = {key: list(series) for key, series in self.values.items()}
+        lines = []
+        for key, series in values.items():
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', bound)])} {count}\n")
+            lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', '+Inf')])} {series[-1]}\n")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {round(series[-2], 3)}\n")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {series[-1]}\n")
+        return self.header() + "".join(lines)
+
+
+class Timer:
+    """with Timer(histogram, camera="cam1"): ... observes the block's duration in ms"""
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.started) * 1000
+        self.histogram.observe(self.ms, **self.labels)
+        return False
+
+
+# ---- edge pipeline metrics ----
+CAPTURE_FRAMES = Counter("edge_capture_frames_total", "Frames read from the camera", ["camera"])
+CAPTURE_DROPPED = Counter("edge_capture_dropped_frames_total", "Failed camera reads", ["camera"])
+CAMERA_LAST_FRAME = Gauge("edge_camera_last_frame_timestamp_seconds", "Unix time of the camera's last frame", ["camera"])
+RECOGNITION_INTERVAL = Gauge("edge_recognition_interval_seconds", "Current recognition interval from the rate controller", ["camera"])
+RECOGNITION_SKIPPED = Counter("edge_recognition_skipped_total", "Frames not sent for recognition", ["camera", "reason"])
+ENCODE_MS = Histogram("edge_encode_ms", "Crop, downscale and JPEG encode time per upload", ["camera"])
+UPLOAD_BYTES = Histogram("edge_upload_bytes", "Bytes uploaded to CompreFace per call", ["camera"], BYTES_BUCKETS)
+COMPREFACE_MS = Histogram("edge_compreface_request_ms", "CompreFace request latency", ["camera", "endpoint"])
+COMPREFACE_REQUESTS = Counter("edge_compreface_requests_total", "CompreFace requests by outcome", ["camera", "endpoint", "outcome"])
+INFERENCE_MS = Histogram("edge_inference_worker_ms", "Per-frame time in an inference worker", ["camera"])
+INFERENCE_STALE = Counter("edge_inference_stale_total", "Worker results dropped for a newer frame", ["camera"])
+LIVENESS_BATCH = Histogram("edge_liveness_batch_size", "Faces per liveness forward pass", buckets=BATCH_BUCKETS)
+LIVENESS_MS = Histogram("edge_liveness_ms", "Liveness forward pass time")
+QUALITY_REJECTED = Counter("edge_quality_rejected_total", "Faces rejected by the quality gate", ["reason"])
+DOOR_CROSSINGS = Counter("edge_door_crossings_total", "Students crossing a door line", ["camera", "direction"])
+TRACKED_STUDENTS = Gauge("edge_tracked_students", "Students tracked in the current session", ["venue"])
+PRESENT_STUDENTS = Gauge("edge_present_students", "Students confirmed present and still in the room", ["venue"])
+FUSION_PENDING = Gauge("edge_fusion_pending", "Students with sightings waiting for their fusion window", ["venue"])
+ATTENDANCE_POSTS = Counter("edge_attendance_posts_total", "Attendance events posted to the backend", ["outcome"])
+STARTUP_SECONDS = Gauge("edge_startup_seconds", "Seconds from process start until each startup stage was done", ["stage"])
+ATTENDANCE_ACK_MS = Histogram("edge_attendance_ack_ms", "Time from the event to the backend acknowledging it",
+                              buckets=MS_BUCKETS + (30000, 60000))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+    readiness = None    # callable -> {"ready": bool, ...}
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            self.send_body(200, self.registry.render().encode(), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/ready" and self.readiness:
+            report = self.readiness()
+            self.send_body(200 if report["ready"] else 503, json.dumps(report).encode(), "application/json")
+        else:
+            self.send_body(404, b"", "text/plain")
+
+
+def start_server(port, host="0.0.0.0", registry=REGISTRY, readiness=None):
+    """Serves /metrics (and /ready, given a readiness callable) from a daemon thread, returns the server"""
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {
+        "registry": registry, "readiness": staticmethod(readiness) if readiness else None
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+MOTION_WIDTH = 160      # frames are compared at this width, enough for people moving
+
+
+class MotionGate:
+    """
+    Per-camera frame differencing against a running background. should_recognize()
+    is True when enough of the frame (or of the camera's entry zone) changed,
+    or when keepalive seconds have passed since the last recognition, so people
+    sitting still are still re-identified now and then.
+
+    entry_zone is [x0, y0, x1, y1] as fractions of the frame, e.g. the doorway.
+    """
+
+    def __init__(self, min_motion=0.01, min_zone_motion=0.02, keepalive=4.0,
+                 pixel_threshold=25, learning_rate=0.05, entry_zone=None):
+        self.min_motion = min_motion
+        self.min_zone_motion = min_zone_motion
+        self.keepalive = keepalive
+        self.pixel_threshold = pixel_threshold
+        self.learning_rate = learning_rate
+        self.entry_zone = entry_zone
+
+        self.background = None
+        self.last_recognition = None
+        self.last_motion = 0.0
+        self.counts = {"motion": 0, "keepalive": 0, "skipped": 0}
+
+    def measure(self, frame):
+        """Fraction of changed pixels in the frame and in the entry zone"""
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (MOTION_WIDTH, max(1, int(height * MOTION_WIDTH / width))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        gray = cv2.GaussianBlur(gray, (5, 5), 0).astype(np.float32)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray
+            return 1.0, 1.0
+
+        changed = cv2.absdiff(gray, self.background) > self.pixel_threshold
+        # Slow running average, so lighting drift becomes background but people do not
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        motion = float(changed.mean())
+        zone_motion = motion
+        if self.entry_zone:
+            x0, y0, x1, y1 = self.entry_zone
+            rows, cols = changed.shape
+            zone = changed[int(y0 * rows):max(int(y1 * rows), int(y0 * rows) + 1),
+                           int(x0 * cols):max(int(x1 * cols), int(x0 * cols) + 1)]
+            zone_motion = float(zone.mean())
+        return motion, zone_motion
+
+    def should_recognize(self, frame, now):
+        motion, zone_motion = self.measure(frame)
+        self.last_motion = motion
+
+        if motion >= self.min_motion or (self.entry_zone and zone_motion >= self.min_zone_motion):
+            reason = "motion"
+        elif self.last_recognition is None or now - self.last_recognition >= self.keepalive:
+            reason = "keepalive"
+        else:
+            self.counts["skipped"] += 1
+            return False
+
+        self.counts[reason] += 1
+        self.last_recognition = now
+        return True
@@ -0,0 +1,114 @@
+import heapq
+from collections import deque
+
+
+class PresenceTracker:
+    """
+    Per-session attendance state with exit detection driven by a min-heap.
+
+    Every tracked student has one live deadline in the heap:
+      - present and in the room: exit + absence_threshold (leaver check)
+      - left, or never confirmed live: last_seen + evict_after (forget them)
+    Re-sightings only push the deadline later, which is handled lazily when the
+    old one pops. Only a deadline that moves earlier (entry, re-entry) is pushed
+    straight away. A tick costs O(expired * log n) instead of a scan over every
+    student ever seen, and memory is bounded by the students in the current session.
+    """
+
+    def __init__(self, absence_threshold, liveness_history_len, evict_after=3 * 3600):
+        self.absence_threshold = absence_threshold
+        self.liveness_history_len = liveness_history_len
+        self.evict_after = evict_after
+        self.states = {}
+        self.heap = []
+        self.session_key = None
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, student_id):
+        return student_id in self.states
+
+    def set_absence_threshold(self, absence_threshold):
+        # deadlines already queued for students in the room move with it
+        self.absence_threshold = absence_threshold
+        for student_id, state in self.states.items():
+            state["timer"] = None
+            self.reschedule(student_id)
+
+    def start_session(self, session_key):
+        """
+        A new session starts from a clean slate. Returns [(student_id, state)]
+        for students still in the room, so their exit can be recorded first.
+        """
+        if session_key == self.session_key:
+            return []
+
+        leavers = []
+        for student_id, state in self.states.items():
+            if state["present"] and not state["has_left"] and state["exit"]:
+                state["has_left"] = True
+                leavers.append((student_id, state))
+
+        self.session_key = session_key
+        self.states = {}
+        self.heap = []
+        return leavers
+
+    def track(self, student_id, now):
+        state = self.states.get(student_id)
+        if state is None:
+            state = {
+                "entry" : None,    # Needs to check for liveness
+                "exit" : None,     # used to check the last time student is in class
+                "present" : False,      # False until liveness checked
+                "liveness_history": deque(maxlen = self.liveness_history_len),   # 0 == live, 1 == spoof
+                "has_left" : False,     # used as a flag
+                "last_seen" : now,  # mainly used for student return to class
+                "curr_entry" : None,    # Datetime for tracking duration stayed in class
+                "timer" : None          # deadline currently queued in the heap
+            }
+            self.states[student_id] = state
+            self.reschedule(student_id)
+
+        state["last_seen"] = now
+        return state
+
+    def reschedule(self, student_id):
+        # Call after entry/exit changes; only an earlier deadline needs a new heap entry
+        state = self.states[student_id]
+        deadline = self._deadline(state)
+        if state["timer"] is None or deadline < state["timer"]:
+            state["timer"] = deadline
+            heapq.heappush(self.heap, (deadline, student_id))
+
+    def _deadline(self, state):
+        if state["present"] and not state["has_left"] and state["exit"]:
+            return state["exit"].timestamp() + self.absence_threshold
+        return state["last_seen"].timestamp() + self.evict_after
+
+    def expire(self, now):
+        """Pops due deadlines; returns [(student_id, state)] for students who just left"""
+        leavers = []
+        current = now.timestamp()
+
+        while self.heap and self.heap[0][0] <= current:
+            queued, student_id = heapq.heappop(self.heap)
+            state = self.states.get(student_id)
+            if state is None or state["timer"] != queued:
+                continue    # superseded by an earlier deadline, or already evicted
+
+            state["timer"] = None
+            if self._deadline(state) > current:
+                # Seen again since this deadline was queued
+                self.reschedule(student_id)
+                continue
+
+            if state["present"] and not state["has_left"] and state["exit"]:
+                state["has_left"] = True
+                leavers.append((student_id, state))
+                self.reschedule(student_id)
+            else:
+                del self.states[student_id]
+
+        return leavers
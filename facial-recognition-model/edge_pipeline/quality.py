@@ -0,0 +1,124 @@
+import math
+
+import cv2
+import numpy as np
+
+from edge_pipeline.metrics import QUALITY_REJECTED
+
+SHARPNESS_WIDTH = 112   # crops are resized to this width so blur scores compare across face sizes
+
+
+def head_pose(landmarks):
+    """
+    Approximate (pitch, yaw) in degrees from CompreFace's five landmarks
+    (left eye, right eye, nose, left mouth corner, right mouth corner).
+    Same idea as get_head_pose in face-registration, but five points are too
+    few for a stable solvePnP, so it uses where the nose sits between the eyes
+    and the mouth instead. 0, 0 is a frontal face.
+    """
+    left_eye, right_eye, nose, left_mouth, right_mouth = (np.asarray(p, dtype=float) for p in landmarks[:5])
+    eye_mid = (left_eye + right_eye) / 2
+    mouth_mid = (left_mouth + right_mouth) / 2
+
+    eye_distance = np.linalg.norm(right_eye - left_eye)
+    face_height = mouth_mid[1] - eye_mid[1]
+    if eye_distance < 1 or face_height < 1:
+        return 90.0, 90.0
+
+    # The nose tip sticks out about half an eye distance, so its sideways
+    # offset over that depth gives the turn angle
+    yaw = math.degrees(math.atan2(nose[0] - eye_mid[0], eye_distance * 0.5))
+    # On a frontal face the nose tip sits a little over halfway down from eyes to mouth
+    pitch = math.degrees(math.atan2((nose[1] - eye_mid[1]) / face_height - 0.55, 0.5))
+    return pitch, yaw
+
+
+class QualityGate:
+    """
+    Scores each detected face on size, sharpness (variance of the Laplacian),
+    exposure and head pose. Faces that fail any threshold are not used for
+    identification or liveness. score is 0-1, higher is better, and picks
+    the best crop when a student is seen more than once.
+    """
+
+    def __init__(self, min_face_px=60, min_sharpness=40.0, min_brightness=40, max_brightness=220,
+                 max_yaw=30.0, max_pitch=25.0):
+        self.min_face_px = min_face_px
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_yaw = max_yaw
+        self.max_pitch = max_pitch
+        self.passed = 0
+        self.rejected = {}      # reason -> count
+
+    def assess(self, frame, box, landmarks=None):
+        x_min, y_min = max(box["x_min"], 0), max(box["y_min"], 0)
+        x_max, y_max = box["x_max"], box["y_max"]
+        width, height = x_max - x_min, y_max - y_min
+        reasons = []
+
+        size = min(width, height)
+        if size < self.min_face_px:
+            reasons.append("small")
+
+        crop = frame[y_min:y_max, x_min:x_max]
+        if crop.size == 0:
+            return {"passed": False, "reasons": ["empty"], "score": 0.0}
+
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+        scale = SHARPNESS_WIDTH / gray.shape[1]
+        gray = cv2.resize(gray, (SHARPNESS_WIDTH, max(1, int(gray.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if sharpness < self.min_sharpness:
+            reasons.append("blurry")
+
+        brightness = float(gray.mean())
+        if not self.min_brightness <= brightness <= self.max_brightness:
+            reasons.append("exposure")
+
+        pitch = yaw = 0.0
+        if landmarks and len(landmarks) >= 5:
+            pitch, yaw = head_pose(landmarks)
+            if abs(yaw) > self.max_yaw or abs(pitch) > self.max_pitch:
+                reasons.append("pose")
+
+        # Each term is 1 when comfortably good, so the product ranks crops of the same face
+        score = (
+            min(1.0, size / (2 * self.min_face_px)) *
+            min(1.0, sharpness / (3 * self.min_sharpness)) *
+            max(0.0, 1 - abs(brightness - 128) / 128) *
+            max(0.0, 1 - abs(yaw) / 90) *
+            max(0.0, 1 - abs(pitch) / 90)
+        )
+
+        return {
+            "passed": not reasons,
+            "reasons": reasons,
+            "score": round(score, 4),
+            "size": size,
+            "sharpness": round(sharpness, 1),
+            "brightness": round(brightness, 1),
+            "yaw": round(yaw, 1),
+            "pitch": round(pitch, 1),
+        }
+
+    def filter(self, frame, results):
+        """Annotates results with "quality" and returns the ones that pass, best first"""
+        passed = []
+        for result in results or []:
+            box = result.get("box")
+            if not box:
+                continue
+            quality = self.assess(frame, box, result.get("landmarks"))
+            result["quality"] = quality
+            if quality["passed"]:
+                self.passed += 1
+                passed.append(result)
+            else:
+                for reason in quality["reasons"]:
+                    self.rejected[reason] = self.rejected.get(reason, 0) + 1
+                    QUALITY_REJECTED.inc(reason=reason)
+        passed.sort(key=lambda result: result["quality"]["score"], reverse=True)
+        return passed
@@ -0,0 +1,98 @@
+import threading
+import time
+
+
+class RateController:
+    """
+    Per-camera recognition interval, adjusted from what the pipeline
+    observes (backs off multiplicatively, idles additively):
+
+    - a failed call doubles the interval, and a call slower than
+      target_latency_ms (smoothed) stretches it by a quarter, so a struggling
+      CompreFace gets fewer requests instead of a growing backlog
+    - a frame with faces in it, while latency is fine, halves the distance to
+      max rate (at least step), so people walking into an idle room are
+      picked up within a few frames
+    - an empty frame with nobody tracked adds idle_step, so an empty room
+      slowly drops to the floor rate
+
+    The interval stays within [min_interval, max_interval]. Keep max_interval
+    under the absence threshold, or seated students get marked as left.
+    When more than max_pending frames are already waiting on recognition,
+    due() says no for every camera: frames are skipped, never queued.
+    """
+
+    def __init__(self, min_interval=0.2, max_interval=4.0, target_latency_ms=500, step=0.1,
+                 idle_step=0.25, backoff=2.0, slow_backoff=1.25, smoothing=0.3, max_pending=8):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_latency_ms = target_latency_ms
+        self.step = step
+        self.idle_step = idle_step
+        self.backoff = backoff
+        self.slow_backoff = slow_backoff
+        self.smoothing = smoothing
+        self.max_pending = max_pending
+
+        self.lock = threading.Lock()    # calls are observed from the async client's thread too
+        self.cameras = {}       # cam_id -> {"interval", "last_run", "latency_ms"}
+        self.pending = 0
+
+    def state(self, cam_id):
+        state = self.cameras.get(cam_id)
+        if state is None:
+            state = self.cameras[cam_id] = {"interval": self.min_interval, "last_run": 0.0, "latency_ms": None}
+        return state
+
+    def forget(self, cam_id):
+        with self.lock:
+            self.cameras.pop(cam_id, None)
+
+    def interval(self, cam_id):
+        return self.state(cam_id)["interval"]
+
+    def _clamp(self, state, interval):
+        state["interval"] = min(self.max_interval, max(self.min_interval, interval))
+
+    def due(self, cam_id, now_ts=None):
+        """True if cam_id should be recognised now, and marks it as run"""
+        now_ts = now_ts or time.time()
+        with self.lock:
+            if self.pending >= self.max_pending:
+                return False
+            state = self.state(cam_id)
+            if now_ts - state["last_run"] < state["interval"]:
+                return False
+            state["last_run"] = now_ts
+            return True
+
+    def next_due(self):
+        """Unix time the next camera becomes due, None before any camera ran"""
+        with self.lock:
+            if not self.cameras:
+                return None
+            return min(state["last_run"] + state["interval"] for state in self.cameras.values())
+
+    def set_pending(self, pending):
+        self.pending = pending
+
+    def observe_call(self, cam_id, latency_ms, error=None):
+        with self.lock:
+            state = self.state(cam_id)
+            if error:
+                self._clamp(state, state["interval"] * self.backoff)
+                return
+            previous = state["latency_ms"]
+            state["latency_ms"] = latency_ms if previous is None else \
+                previous + self.smoothing * (latency_ms - previous)
+            if state["latency_ms"] > self.target_latency_ms:
+                self._clamp(state, state["interval"] * self.slow_backoff)
+
+    def observe_scene(self, cam_id, faces, active_tracks):
+        with self.lock:
+            state = self.state(cam_id)
+            latency_ok = state["latency_ms"] is None or state["latency_ms"] <= self.target_latency_ms
+            if faces and latency_ok:
+                self._clamp(state, state["interval"] - max(self.step, (state["interval"] - self.min_interval) / 2))
+            elif not faces and not active_tracks:
+                self._clamp(state, state["interval"] + self.idle_step)
@@ -0,0 +1,118 @@
+import cv2
+import time
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+class ReplayCapture:
+    """
+    Drop-in for cv2.VideoCapture that plays back a recorded video file or a
+    folder of images. speed="real" paces frames at the source fps and skips
+    ahead when the reader falls behind, like a live IP camera would.
+    speed="max" hands out frames as fast as they are read.
+    """
+
+    def __init__(self, source, speed="real", fps=None, loop=False):
+        self.source = str(source)
+        self.speed = speed
+        self.loop = loop
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self.opened = True
+
+        path = Path(self.source)
+        if path.is_dir():
+            self.images = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+            self.video = None
+            self.fps = fps or 10
+            self.opened = bool(self.images)
+        else:
+            self.images = None
+            self.video = cv2.VideoCapture(self.source)
+            self.fps = fps or self.video.get(cv2.CAP_PROP_FPS) or 25
+            self.opened = self.video.isOpened()
+
+        self.index = 0
+        self.start = None
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0
+
+    def release(self):
+        self.opened = False
+        if self.video is not None:
+            self.video.release()
+
+    def _next_frame(self):
+        if self.images is not None:
+            if self.index >= len(self.images):
+                return None
+            return cv2.imread(str(self.images[self.index]))
+
+        ok, frame = self.video.read()
+        return frame if ok else None
+
+    def _rewind(self):
+        self.index = 0
+        self.start = time.perf_counter()
+        if self.video is not None:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def _skip_to(self, due):
+        # Live cameras drop frames the reader was too slow for
+        while self.index < due:
+            if self.video is not None:
+                if not self.video.grab():
+                    return
+            self.index += 1
+            self.frames_skipped += 1
+
+    def read(self):
+        if not self.opened:
+            return False, None
+
+        if self.start is None:
+            self.start = time.perf_counter()
+
+        if self.speed == "real":
+            elapsed = time.perf_counter() - self.start
+            due = int(elapsed * self.fps)
+            if due > self.index:
+                self._skip_to(due)
+            else:
+                time.sleep(max(0.0, self.start + self.index / self.fps - time.perf_counter()))
+
+        frame = self._next_frame()
+        if frame is None:
+            if self.loop and self.index > 0:
+                self._rewind()
+                frame = self._next_frame()
+            if frame is None:
+                self.opened = False
+                return False, None
+
+        self.index += 1
+        self.frames_read += 1
+        return True, frame
+
+
+def replay_factory(speed="real", fps=None, loop=False):
+    # Matches the cv2.VideoCapture(url) signature ThreadedCamera expects
+    captures = []
+
+    def factory(url):
+        capture = ReplayCapture(url, speed=speed, fps=fps, loop=loop)
+        captures.append(capture)
+        return capture
+
+    factory.captures = captures
+    return factory
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from edge_pipeline.metrics import ENCODE_MS, UPLOAD_BYTES
+
+CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+class FrameEncoder:
+    """
+    Shrinks what each camera uploads to CompreFace:
+
+    1. crop to the camera's roi, [x0, y0, x1, y1] as fractions of the frame
+       (e.g. the doorway), or the whole frame without one
+    2. inside that, crop to the faces a local Haar cascade finds, padded by
+       face_margin. The whole roi goes up when it finds none, since it misses
+       turned faces that CompreFace still detects
+    3. downscale so the smallest face is about target_face_px wide (the
+       recognizer works on ~112-160px crops anyway), and the long side fits
+       max_side. Never upscales
+    4. pick the JPEG quality that fits byte_budget, starting from the quality
+       that fitted this camera's last frame, so usually one encode is enough
+
+    restore() maps boxes and landmarks in CompreFace's answer back onto the
+    full frame, so the quality gate and liveness still crop full resolution.
+    """
+
+    def __init__(self, rois=None, target_face_px=160, max_side=960, byte_budget=60_000,
+                 min_quality=50, max_quality=90, local_faces=True, face_margin=0.6, detect_width=480):
+        self.rois = rois or {}      # cam_id -> [x0, y0, x1, y1]
+        self.target_face_px = target_face_px
+        self.max_side = max_side
+        self.byte_budget = byte_budget
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        # OpenCV 5 dropped the Haar cascades, the roi and downscale still apply there
+        self.local_faces = local_faces and hasattr(cv2, "CascadeClassifier")
+        self.face_margin = face_margin
+        self.detect_width = detect_width
+
+        self.quality = {}           # cam_id -> JPEG quality to start from
+        self.uploads = deque(maxlen=1000)   # recent upload sizes, bytes
+        self.cascades = threading.local()   # detectMultiScale is not safe to share across threads
+
+    def region(self, cam_id, frame):
+        height, width = frame.shape[:2]
+        roi = self.rois.get(cam_id)
+        if not roi:
+            return 0, 0, width, height
+        x0, y0, x1, y1 = roi
+        left, top = int(x0 * width), int(y0 * height)
+        return left, top, max(int(x1 * width), left + 1), max(int(y1 * height), top + 1)
+
+    def find_faces(self, image):
+        if not hasattr(self.cascades, "detector"):
+            self.cascades.detector = cv2.CascadeClassifier(CASCADE_PATH)
+
+        height, width = image.shape[:2]
+        scale = min(1.0, self.detect_width / width)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        if scale < 1:
+            gray = cv2.resize(gray, (int(width * scale), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        found = self.cascades.detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(20, 20))
+        return [tuple(int(v / scale) for v in face) for face in found]
+
+    def compress(self, cam_id, image):
+        quality = self.quality.get(cam_id, self.max_quality)
+        while True:
+            _, buf = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+            if buf.size <= self.byte_budget or quality <= self.min_quality:
+                break
+            # Size falls roughly in proportion to quality in this range
+            quality = max(self.min_quality, min(quality - 5, int(quality * self.byte_budget / buf.size)))
+
+        # Creep back up when well under budget, e.g. once the room empties
+        self.quality[cam_id] = min(self.max_quality, quality + 5) if buf.size < 0.6 * self.byte_budget else quality
+        return buf.tobytes()
+
+    def encode(self, cam_id, frame):
+        """frame -> (JPEG bytes, transform for restore())"""
+        started = time.perf_counter()
+        left, top, right, bottom = self.region(cam_id, frame)
+        image = frame[top:bottom, left:right]
+
+        faces = self.find_faces(image) if self.local_faces else []
+        scale = 1.0
+        if faces:
+            pad = max(int(self.face_margin * max(w, h)) for _, _, w, h in faces)
+            x0 = max(0, min(x for x, _, _, _ in faces) - pad)
+            y0 = max(0, min(y for _, y, _, _ in faces) - pad)
+            x1 = min(image.shape[1], max(x + w for x, _, w, _ in faces) + pad)
+            y1 = min(image.shape[0], max(y + h for _, y, _, h in faces) + pad)
+            image = image[y0:y1, x0:x1]
+            left, top = left + x0, top + y0
+            scale = min(1.0, self.target_face_px / min(w for _, _, w, _ in faces))
+
+        scale = min(scale, self.max_side / max(image.shape[:2]))
+        if scale < 1:
+            image = cv2.resize(image, (max(1, int(image.shape[1] * scale)), max(1, int(image.shape[0] * scale))),
+                               interpolation=cv2.INTER_AREA)
+
+        payload = self.compress(cam_id, image)
+        self.uploads.append(len(payload))
+        ENCODE_MS.observe((time.perf_counter() - started) * 1000, camera=cam_id)
+        UPLOAD_BYTES.observe(len(payload), camera=cam_id)
+        return payload, (left, top, scale)
+
+    @staticmethod
+    def restore(results, transform):
+        left, top, scale = transform
+        for result in results or []:
+            box = result.get("box")
+            if box:
+                for key, offset in (("x_min", left), ("x_max", left), ("y_min", top), ("y_max", top)):
+                    box[key] = int(round(box[key] / scale)) + offset
+            if result.get("landmarks"):
+                result["landmarks"] = [[int(round(x / scale)) + left, int(round(y / scale)) + top]
+                                       for x, y in result["landmarks"]]
+        return results
@@ -0,0 +1,85 @@
+import time
+from datetime import date, datetime, time as dt_time, timezone
+
+import requests
+
+
+class RosterClient:
+    """
+    Keeps the enrolment list of the class currently held at this venue, from
+    the backend's session-roster/ endpoint. The roster is refetched when the
+    backend says it expires (end of class, or just before the next one opens).
+
+    current() returns a frozenset of student ids, or None when the roster is
+    unknown (backend unreachable). Callers treat None as "do not constrain"
+    so a backend outage never blocks attendance.
+    """
+
+    def __init__(self, api_url, venue, edge_key, timeout=2, retry_after=30):
+        self.url = api_url.rstrip("/") + "/session-roster/"
+        self.venue = venue
+        self.headers = {"X-Edge-Key": edge_key}
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self.session = None
+        self.students = None
+        self.valid_until = 0.0
+
+    def refresh(self, now):
+        try:
+            response = requests.get(
+                self.url,
+                params={"venue": self.venue, "at": now.isoformat()},
+                headers=self.headers,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Roster fetch error ({self.venue}): {e}")
+            self.valid_until = time.time() + self.retry_after
+            return
+
+        previous = self.session
+        self.session = data.get("session")
+        self.students = frozenset(data.get("students") or [])
+
+        valid_until = data.get("valid_until")
+        if valid_until:
+            self.valid_until = datetime.fromisoformat(valid_until.replace("Z", "+00:00")).timestamp()
+        else:
+            self.valid_until = time.time() + self.retry_after
+
+        if self.session != previous:
+            name = self.session["name"] if self.session else "no class"
+            print(f"Roster: {self.venue} -> {name} ({len(self.students)} students)")
+
+    def current(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        if now.timestamp() >= self.valid_until:
+            self.refresh(now)
+        return self.students
+
+    @property
+    def session_key(self):
+        return self.session["id"] if self.session else None
+
+    def ends_at(self):
+        """End of the current class as an aware datetime, None if there is none or it is not known"""
+        if not self.session or not self.session.get("date") or not self.session.get("end_time"):
+            return None
+        # the backend sends venue local date and time
+        return datetime.combine(
+            date.fromisoformat(self.session["date"]), dt_time.fromisoformat(self.session["end_time"])
+        ).astimezone()
+
+
+def pick_subject(subjects, roster, threshold):
+    """Best match above threshold that is enrolled in the current class"""
+    for candidate in subjects or []:
+        if candidate["similarity"] < threshold:
+            break   # CompreFace returns subjects sorted by similarity
+        if roster is None or candidate["subject"] in roster:
+            return candidate
+    return None
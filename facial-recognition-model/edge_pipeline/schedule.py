@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+ACTIVE = "active"   # inside a session's attendance window: full rate
+IDLE = "idle"       # between classes: occasional recognition
+SLEEP = "sleep"     # nothing left today (or not yet): cameras released
+
+
+class VenueSchedule:
+    """
+    Day schedule of the venue from the backend's venue-schedule/ endpoint,
+    turned into a duty cycle. Each session is active from its attendance
+    window opening (30 min early) to its end. The venue is idle between
+    sessions, and asleep from wake_margin after the last session until
+    wake_margin before the first one.
+
+    If the schedule cannot be fetched the venue is treated as active, so a
+    backend outage never stops attendance from being taken.
+    """
+
+    def __init__(self, api_url, venue, edge_key, wake_margin=15 * 60, refresh_interval=15 * 60, retry_after=60, timeout=5):
+        self.url = api_url.rstrip("/") + "/venue-schedule/"
+        self.venue = venue
+        self.headers = {"X-Edge-Key": edge_key}
+        self.wake_margin = timedelta(seconds=wake_margin)
+        self.refresh_interval = refresh_interval
+        self.retry_after = retry_after
+        self.timeout = timeout
+
+        self.day = None
+        self.windows = None     # [(opens_at, end)] for the day, None if unknown
+        self.next_refresh = 0.0
+
+    def refresh(self, now):
+        local_now = now.astimezone()
+        try:
+            response = requests.get(
+                self.url,
+                params={"venue": self.venue, "at": local_now.isoformat()},
+                headers=self.headers,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            sessions = response.json().get("sessions") or []
+            windows = sorted(
+                (parse_time(session["opens_at"]), parse_time(session["end"])) for session in sessions
+            )
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"Schedule fetch error ({self.venue}): {e}")
+            # Keep today's schedule through a blip, but a new day needs a fresh one
+            if self.day != local_now.date():
+                self.windows = None
+            self.next_refresh = time.time() + self.retry_after
+            return
+
+        if self.day != local_now.date() or windows != self.windows:
+            print(f"Schedule: {self.venue} has {len(windows)} session(s) on {local_now.date()}")
+        self.day = local_now.date()
+        self.windows = windows
+        self.next_refresh = time.time() + self.refresh_interval
+
+    def mode(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        if time.time() >= self.next_refresh or self.day != now.astimezone().date():
+            self.refresh(now)
+
+        if self.windows is None:
+            return ACTIVE
+        if not self.windows:
+            return SLEEP
+
+        for opens_at, end in self.windows:
+            if opens_at <= now <= end:
+                return ACTIVE
+
+        first_open = self.windows[0][0]
+        last_end = max(end for _, end in self.windows)
+        if first_open - self.wake_margin <= now <= last_end + self.wake_margin:
+            return IDLE
+        return SLEEP
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from edge_pipeline.metrics import STARTUP_SECONDS
+
+PROCESS_STARTED = time.time()   # facial-recognition.py imports this first, so stage times include its imports
+
+
+class Startup:
+    """
+    How long each part of the edge took to come up after a (re)start, in
+    seconds since the process started. The edge is ready once every required
+    stage is done; later stages such as first_recognition are only timed.
+    """
+
+    def __init__(self, required):
+        self.required = list(required)
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.ready_event = threading.Event()
+
+    @property
+    def ready(self):
+        return self.ready_event.is_set()
+
+    def done(self, stage):
+        return stage in self.stages
+
+    def mark(self, stage):
+        with self.lock:
+            if stage in self.stages:
+                return
+            self.stages[stage] = round(time.time() - PROCESS_STARTED, 3)
+            became_ready = not self.ready and all(s in self.stages for s in self.required)
+            if became_ready:
+                self.stages["ready"] = self.stages[stage]
+                self.ready_event.set()
+
+        print(f"Startup: {stage} after {self.stages[stage]}s")
+        STARTUP_SECONDS.set(self.stages[stage], stage=stage)
+        if became_ready:
+            print(f"Startup: ready after {self.stages['ready']}s")
+            STARTUP_SECONDS.set(self.stages["ready"], stage="ready")
+
+    def wait(self, timeout=None):
+        return self.ready_event.wait(timeout)
+
+    def report(self):
+        return {
+            "ready": self.ready,
+            "stages": dict(self.stages),
+            "waiting": [stage for stage in self.required if stage not in self.stages],
+        }
+
+
+class LazyModel:
+    """
+    Builds a model on a background thread, torch import included, so the
+    cameras and CompreFace come up meanwhile. Check ready before predict(),
+    which otherwise waits for the load to finish.
+    """
+
+    def __init__(self, factory, on_ready=None):
+        self.model = None
+        self.error = None
+        self.loaded = threading.Event()
+        threading.Thread(target=self._load, args=(factory, on_ready), daemon=True).start()
+
+    def _load(self, factory, on_ready):
+        try:
+            self.model = factory()
+        except Exception as e:
+            self.error = e
+            print(f"Model load failed: {e}")
+        self.loaded.set()
+        if self.model is not None and on_ready:
+            on_ready()
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    def predict(self, images):
+        self.loaded.wait()
+        if self.model is None:
+            raise RuntimeError(f"Model failed to load: {self.error}")
+        return self.model.predict(images)
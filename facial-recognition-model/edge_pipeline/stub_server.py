@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+RECOGNIZE_PATH = "/api/v1/recognition/recognize"
+DETECTION_PATH = "/api/v1/detection/detect"
+GALLERY_PATH = "/api/face-gallery/"
+ATTENDANCE_PATH = "/api/mark-attendance/"
+ROSTER_PATH = "/api/session-roster/"
+SCHEDULE_PATH = "/api/venue-schedule/"
+EMBEDDING_DIMS = 512
+POSES = ["center", "left", "right"]
+
+# Two students: one stays, one leaves after 20s so exit events are exercised too
+DEFAULT_SCRIPT = {
+    "faces": [
+        {"subject": "S0001", "similarity": 0.97, "box": [0.15, 0.20, 0.40, 0.70], "start": 0, "end": 1e9},
+        {"subject": "S0002", "similarity": 0.93, "box": [0.55, 0.20, 0.80, 0.70], "start": 2, "end": 20},
+    ]
+}
+
+
+def load_script(path):
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def subject_embedding(subject):
+    # Stable per subject, so gallery rows and detected faces agree across runs
+    seed = int(hashlib.md5(subject.encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).normal(size=EMBEDDING_DIMS)
+
+
+def image_size(body, content_type):
+    # Pulls the uploaded file out of the multipart body the CompreFace SDK sends
+    boundary = content_type.split("boundary=")[-1].encode()
+    for part in body.split(b"--" + boundary):
+        if b"filename=" not in part:
+            continue
+        payload = part.split(b"\r\n\r\n", 1)[-1].rstrip(b"\r\n")
+        image = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if image is not None:
+            return image.shape[1] * 8, image.shape[0] * 8
+    return 640, 480
+
+
+class StubState:
+    def __init__(self, script, latency_ms=0, jitter_ms=0, seed=0):
+        self.script = script
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.recognize_calls = 0
+        self.events = []
+
+    def faces_at(self, elapsed, width, height, embeddings=False):
+        results = []
+        for face in self.script.get("faces", []):
+            if not face["start"] <= elapsed < face["end"]:
+                continue
+            x0, y0, x1, y1 = face["box"]
+            # Frontal five point landmarks: eyes, nose, mouth corners
+            landmarks = [
+                [int((x0 + (x1 - x0) * fx) * width), int((y0 + (y1 - y0) * fy) * height)]
+                for fx, fy in [(0.3, 0.35), (0.7, 0.35), (0.5, 0.53), (0.35, 0.7), (0.65, 0.7)]
+            ]
+            results.append({
+                "box": {
+                    "probability": 1.0,
+                    "x_min": int(x0 * width), "y_min": int(y0 * height),
+                    "x_max": int(x1 * width), "y_max": int(y1 * height)
+                },
+                "landmarks": landmarks,
+                "subjects": [{"subject": face["subject"], "similarity": face.get("similarity", 0.95)}]
+            })
+            if embeddings:
+                # Detection does not match, it returns the face's embedding instead
+                noise = np.random.default_rng(self.rng.getrandbits(32)).normal(0, 0.3, EMBEDDING_DIMS)
+                results[-1]["embedding"] = (subject_embedding(face["subject"]) + noise).tolist()
+                del results[-1]["subjects"]
+        return results
+
+    def schedule(self):
+        # One session that is already open and outlasts any replay, so the edge stays at full rate
+        opened = datetime.fromtimestamp(self.started, timezone.utc) - timedelta(minutes=1)
+        return {
+            "venue": "REPLAY",
+            "date": opened.date().isoformat(),
+            "sessions": [{
+                "id": 1,
+                "name": "Replay session",
+                "module": "REPLAY",
+                "opens_at": opened.isoformat(),
+                "start": (opened + timedelta(minutes=30)).isoformat(),
+                "end": (opened + timedelta(hours=12)).isoformat()
+            }]
+        }
+
+    def gallery(self, cursor):
+        # Everything on the first sync, nothing changes after that
+        subjects = sorted({face["subject"] for face in self.script.get("faces", [])})
+        changed = [] if cursor else [
+            {"id": i * len(POSES) + j, "student_id": subject, "pose": pose,
+             "embedding": subject_embedding(subject).tolist()}
+            for i, subject in enumerate(subjects)
+            for j, pose in enumerate(POSES)
+        ]
+        return {"changed": changed, "deleted": [], "cursor": "replay", "has_more": False, "reset": False}
+
+    def roster(self):
+        # Every scripted subject is enrolled in one long replay session
+        students = sorted({face["subject"] for face in self.script.get("faces", [])})
+        valid_until = datetime.now(timezone.utc) + timedelta(minutes=5)
+        return {
+            "venue": "REPLAY",
+            "session": {"id": 1, "name": "Replay session"},
+            "students": students,
+            "valid_until": valid_until.isoformat()
+        }
+
+    def delay(self):
+        latency = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState = None
+    protocol_version = "HTTP/1.1"   # keep-alive, like CompreFace behind nginx
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if path in (RECOGNIZE_PATH, DETECTION_PATH):
+            self.state.delay()
+            width, height = image_size(body, self.headers.get("Content-Type", ""))
+            with self.state.lock:
+                self.state.recognize_calls += 1
+                elapsed = time.time() - self.state.started
+                faces = self.state.faces_at(elapsed, width, height, embeddings=path == DETECTION_PATH)
+            self.send_json({"result": faces})
+
+        elif path == ATTENDANCE_PATH:
+            event = json.loads(body or b"{}")
+            event["received_at"] = time.time()
+            with self.state.lock:
+                self.state.events.append(event)
+            self.send_json({"status": "success"})
+
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        if path == "/stats":
+            with self.state.lock:
+                self.send_json({"recognize_calls": self.state.recognize_calls, "events": self.state.events})
+        elif path == ROSTER_PATH:
+            self.send_json(self.state.roster())
+        elif path == SCHEDULE_PATH:
+            self.send_json(self.state.schedule())
+        elif path == GALLERY_PATH:
+            cursor = parse_qs(url.query).get("cursor", [""])[0]
+            self.send_json(self.state.gallery(cursor))
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+
+class StubServer:
+    """
+    Local CompreFace recognize/detect endpoints plus the backend's /session-roster/,
+    /venue-schedule/, /face-gallery/ and a /mark-attendance/ sink
+    """
+
+    def __init__(self, script=None, latency_ms=0, jitter_ms=0, host="127.0.0.1", port=0):
+        self.state = StubState(script or DEFAULT_SCRIPT, latency_ms, jitter_ms)
+        handler = type("BoundStubHandler", (StubHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.host = host
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub CompreFace + attendance sink for offline runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--script", help="JSON file of scripted faces (see DEFAULT_SCRIPT)")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = StubServer(load_script(args.script), args.latency_ms, args.jitter_ms, args.host, args.port).start()
+    print(f"Stub server on {server.base_url} (recognize: {RECOGNIZE_PATH}, sink: {ATTENDANCE_PATH})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
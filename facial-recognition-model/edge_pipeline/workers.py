@@ -0,0 +1,485 @@
+import multiprocessing as mp
+import queue
+import sys
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from edge_pipeline.metrics import (REGISTRY, CAMERA_LAST_FRAME, CAPTURE_FRAMES, INFERENCE_MS, INFERENCE_STALE,
+                                   LIVENESS_BATCH, LIVENESS_MS)
+from edge_pipeline.quality import QualityGate
+from edge_pipeline.roi import FrameEncoder
+
+EDGE_DIR = Path(__file__).resolve().parents[1]
+
+
+class FrameRing:
+    """
+    Ring of fixed-size frames in shared memory, written by one capture process.
+
+    Header (int64): seq of each slot, then the latest seq, then a pin flag per
+    slot. The writer skips pinned slots, so a frame handed to an inference
+    worker is not overwritten while it is being read. Readers get numpy views
+    straight onto the shared buffer, no copy.
+    """
+
+    def __init__(self, shape, slots, name=None, create=False):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = create
+
+        header = 8 * (2 * slots + 1)
+        frame_bytes = int(np.prod(self.shape))
+        # Workers are spawned by the pool and share its resource tracker, so only
+        # the creator unlinks and the segment is cleaned up if the edge crashes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=header + frame_bytes * slots)
+
+        self.header = np.ndarray((2 * slots + 1,), dtype=np.int64, buffer=self.shm.buf[:header])
+        self.seqs = self.header[:slots]
+        self.pins = self.header[slots + 1:]
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf[header:])
+        if create:
+            self.seqs[:] = -1
+            self.header[slots] = -1
+            self.pins[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def latest(self):
+        return int(self.header[self.slots])
+
+    def write(self, frame):
+        seq = self.latest() + 1
+        slot = seq % self.slots
+        for _ in range(self.slots):
+            if not self.pins[slot]:
+                break
+            slot = (slot + 1) % self.slots
+        else:
+            return None     # every slot is being read, drop this frame
+
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+        self.seqs[slot] = -1    # torn while writing
+        self.frames[slot] = frame
+        self.seqs[slot] = seq
+        self.header[self.slots] = seq
+        return seq
+
+    def slot_of(self, seq):
+        for slot in range(self.slots):
+            if self.seqs[slot] == seq:
+                return slot
+        return None
+
+    def view(self, seq):
+        slot = self.slot_of(seq)
+        return None if slot is None else self.frames[slot]
+
+    def pin(self, seq):
+        slot = self.slot_of(seq)
+        if slot is None:
+            return None
+        self.pins[slot] = 1
+        # The writer may have started on this slot before the pin landed
+        if self.seqs[slot] != seq:
+            self.pins[slot] = 0
+            return None
+        return slot
+
+    def unpin(self, slot):
+        self.pins[slot] = 0
+
+    def close(self):
+        # numpy views must go before the buffer can be released
+        del self.header, self.seqs, self.pins, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def capture_loop(cam_id, url, ring_name, shape, slots, stop):
+    ring = FrameRing(shape, slots, ring_name)
+    cap = cv2.VideoCapture(url)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+    if not cap.isOpened():
+        print(f"[!] Could not open camera {cam_id} ({url})")
+
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                time.sleep(0.05)
+                continue
+            ring.write(cv2.flip(frame, 1))
+    finally:
+        cap.release()
+        ring.close()
+
+
+def inference_loop(worker_id, tasks, results, options, stop, ring_idle=60.0):
+    """
+    Consumes (cam_id, ring, seq, slot, use_detection, roi) tasks: recognises
+    the frame, scores face quality and runs liveness on the faces worth
+    keeping. Results go back to the process that owns attendance state.
+
+    In detection mode the faces are only matched against the gallery back in
+    that process, so instead of liveness for every face (most of which match
+    nobody) the quality-passing faces carry their crop, and liveness runs
+    there once per fused sighting.
+
+    ring is (name, shape, slots). Rings are attached on first use and closed
+    after ring_idle seconds without a task, so cameras can come and go without
+    restarting the workers (and their liveness model).
+
+    Each task is claimed (info {"claimed": True}) before it is worked on, so
+    the pool can release it if this worker dies halfway. A frame overwritten
+    before it could be read comes back as {"skipped": "overwritten"}: nothing
+    failed, there was just nothing left to recognise.
+    """
+    sys.path.insert(0, str(EDGE_DIR.parents[1]))
+    import torch
+    from compreface import CompreFace
+    from liveness_detection.tsn_predict import TSNPredictor
+
+    torch.set_num_threads(options.get("torch_threads", 1))
+    frames = {}     # ring name -> (FrameRing, last used)
+    compre_face = CompreFace(options["host"], options["port"], options["recognition_options"])
+    recognition = compre_face.init_face_recognition(options["api_key"])
+    detection = None
+    if options.get("detection_api_key"):
+        detection = compre_face.init_face_detection(options["detection_api_key"])
+    liveness_predictor = TSNPredictor()
+    quality = QualityGate(**options["quality"])
+    encoder = FrameEncoder(**options["encoder"])
+    threshold = options["similarity_threshold"]
+
+    try:
+        while not stop.is_set():
+            try:
+                cam_id, (name, shape, slots), seq, slot, use_detection, roi = tasks.get(timeout=0.5)
+            except queue.Empty:
+                close_idle_rings(frames, ring_idle)
+                continue
+
+            results.put((cam_id, name, seq, slot, None, {"worker": worker_id, "claimed": True}))
+            started = time.perf_counter()
+            if name not in frames:
+                try:
+                    frames[name] = (FrameRing(shape, slots, name), started)
+                except FileNotFoundError:
+                    # camera removed before this task was picked up
+                    results.put((cam_id, name, seq, slot, None, {"worker": worker_id, "skipped": "removed"}))
+                    continue
+            ring = frames[name][0]
+            frames[name] = (ring, started)
+            if ring.seqs[slot] != seq:
+                results.put((cam_id, name, seq, slot, None, {"worker": worker_id, "skipped": "overwritten"}))
+                continue
+            frame = ring.frames[slot]
+            if roi:
+                encoder.rois[cam_id] = roi
+            else:
+                encoder.rois.pop(cam_id, None)
+
+            try:
+                payload, transform = encoder.encode(cam_id, frame)
+                if use_detection and detection:
+                    data = detection.detect(payload, options["detection_options"])
+                else:
+                    data = recognition.recognize(payload)
+                faces = encoder.restore(data.get("result") or [], transform)
+
+                # Liveness only for faces that could become attendance
+                passed = quality.filter(frame, faces)
+                if not use_detection:
+                    passed = [face for face in passed
+                              if any(s["similarity"] >= threshold for s in face.get("subjects") or [])]
+                pairs = [(face, frame[face["box"]["y_min"]:face["box"]["y_max"], face["box"]["x_min"]:face["box"]["x_max"]])
+                         for face in passed]
+                pairs = [(face, crop) for face, crop in pairs if crop.size]
+                liveness_ms = None
+                if use_detection:
+                    # copied, a view would pin the ring and cannot be pickled on its own
+                    for face, crop in pairs:
+                        face["crop"] = crop.copy()
+                    pairs = []
+                elif pairs:
+                    # One batched forward pass for every face in the frame
+                    liveness_started = time.perf_counter()
+                    scores = liveness_predictor.predict([crop for _, crop in pairs])
+                    liveness_ms = (time.perf_counter() - liveness_started) * 1000
+                    for (face, _), (live, spoof) in zip(pairs, scores):
+                        face["liveness"] = [float(live), float(spoof)]
+                error = None
+            except Exception as e:
+                faces, error, pairs, liveness_ms = None, str(e), [], None
+
+            # The pin should prevent this, but never report on a torn frame (the call itself went fine)
+            skipped = None
+            if ring.seqs[slot] != seq:
+                faces, skipped = None, "overwritten"
+
+            results.put((cam_id, name, seq, slot, faces, {
+                "worker": worker_id,
+                "ms": (time.perf_counter() - started) * 1000,
+                "liveness_batch": len(pairs),
+                "liveness_ms": liveness_ms,
+                "error": error,
+                "skipped": skipped
+            }))
+            frame = pairs = None    # views onto the ring, it cannot be closed while they are around
+            close_idle_rings(frames, ring_idle)
+    finally:
+        for ring, _ in frames.values():
+            ring.close()
+
+
+def close_idle_rings(frames, ring_idle):
+    now = time.perf_counter()
+    for name, (ring, used) in list(frames.items()):
+        if now - used > ring_idle:
+            ring.close()
+            del frames[name]
+
+
+class InferencePool:
+    """
+    Capture processes write each camera into its own FrameRing. A pool of
+    inference worker processes picks up the latest frame of each camera.
+    dispatch() and poll() run in the process that owns attendance state, so
+    presence tracking stays single-threaded.
+
+    Up to max_in_flight frames per camera are out at once. A result older than
+    one already processed for that camera is dropped.
+
+    Cameras can be added and removed while the workers keep running, and
+    dispatch()/poll() take the camera ids to work on, so one pool (and one
+    liveness model per worker) can serve several venues.
+
+    A worker that dies is restarted by poll(), and the frame it had claimed is
+    released, so its camera does not stay stuck at max_in_flight.
+    """
+
+    def __init__(self, cameras, workers, options, resolution=(1280, 720), max_in_flight=None, on_result=None):
+        self.ctx = mp.get_context("spawn")
+        self.workers = workers
+        self.options = options
+        self.resolution = resolution
+        self.fixed_in_flight = max_in_flight
+        self.stop_workers = self.ctx.Event()
+        self.tasks = self.ctx.Queue()
+        self.results = self.ctx.Queue()
+
+        self.cameras = {}
+        self.rings = {}
+        self.in_flight = {}
+        self.dispatched = {}
+        self.processed = {}
+        self.finished = {}      # cam_id -> results polled but not yet collected for that camera
+        self.on_result = {}     # cam_id -> called with (cam_id, ms, error) for every finished frame
+        self.stats = {"dispatched": 0, "completed": 0, "dropped": 0, "errors": 0, "skipped": 0, "restarts": 0}
+        self.worker_ms = deque(maxlen=1000)    # recent per-frame inference times
+        self.counted = {}       # cam_id -> ring seq already counted in the frame metrics
+        self.capture_processes = {}     # cam_id -> (process, stop event)
+        self.claims = {}        # worker id -> (cam_id, ring name, seq, slot) it is working on
+
+        self.worker_processes = [self.start_worker(i) for i in range(workers)]
+
+        for cam in cameras:
+            self.set_camera(cam, on_result)
+        REGISTRY.add_collector(self.collect_metrics)
+
+    def start_worker(self, worker_id):
+        process = self.ctx.Process(
+            target=inference_loop,
+            args=(worker_id, self.tasks, self.results, self.options, self.stop_workers),
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def restart_dead_workers(self):
+        for worker_id, process in enumerate(self.worker_processes):
+            if process.is_alive():
+                continue
+            print(f"Inference worker {worker_id} died (exit code {process.exitcode}), restarting")
+            claim = self.claims.pop(worker_id, None)
+            if claim:
+                self.release(*claim)
+            self.worker_processes[worker_id] = self.start_worker(worker_id)
+            self.stats["restarts"] += 1
+
+    def release(self, cam_id, name, seq, slot):
+        """Frees the frame's slot and in-flight entry, False if it was not (or no longer) out"""
+        ring = self.rings.get(cam_id)
+        if ring is None or ring.name != name:
+            return False    # the camera was removed or re-pointed since this frame went out
+        if self.in_flight[cam_id].pop(seq, None) is None:
+            return False    # already released, the slot may be pinned for another frame by now
+        ring.unpin(slot)
+        return True
+
+    @property
+    def max_in_flight(self):
+        return self.fixed_in_flight or max(1, self.workers // max(1, len(self.rings)))
+
+    def set_camera(self, cam, on_result=None, capture=True):
+        """Adds the camera, or updates it: a new url or resolution gets a new ring and capture process"""
+        cam_id = cam["id"]
+        old = self.cameras.get(cam_id)
+        if old is not None:
+            if (cam["url"], cam.get("resolution")) == (old["url"], old.get("resolution")):
+                self.cameras[cam_id] = cam  # roi and the like go out with the next task
+                self.on_result[cam_id] = on_result
+                return
+            self.remove_camera(cam_id)
+        width, height = cam.get("resolution", self.resolution)
+        slots = 2 * (self.fixed_in_flight or max(1, self.workers // (len(self.rings) + 1))) + 2
+        self.cameras[cam_id] = cam
+        self.rings[cam_id] = FrameRing((height, width, 3), slots, create=True)
+        self.in_flight[cam_id] = {}
+        self.dispatched[cam_id] = -1
+        self.processed[cam_id] = -1
+        self.counted[cam_id] = -1
+        self.finished[cam_id] = []
+        self.on_result[cam_id] = on_result
+        if capture:
+            self.start_capture([cam_id])
+
+    def remove_camera(self, cam_id):
+        # results still out for this ring are ignored when they come back
+        self.pause_capture([cam_id])
+        ring = self.rings.pop(cam_id, None)
+        if ring:
+            ring.close()
+        for state in (self.cameras, self.in_flight, self.dispatched, self.processed, self.counted,
+                      self.finished, self.on_result):
+            state.pop(cam_id, None)
+
+    def collect_metrics(self):
+        # Capture runs in other processes; the ring head says how many frames they wrote
+        for cam_id, ring in list(self.rings.items()):
+            seq = ring.latest()
+            counted = self.counted.get(cam_id, -1)
+            if seq > counted:
+                CAPTURE_FRAMES.inc(seq - counted, camera=cam_id)
+                CAMERA_LAST_FRAME.set(time.time(), camera=cam_id)
+                self.counted[cam_id] = seq
+
+    def start_capture(self, cam_ids=None):
+        for cam_id in self.rings if cam_ids is None else cam_ids:
+            if cam_id in self.capture_processes:
+                continue
+            cam, ring = self.cameras[cam_id], self.rings[cam_id]
+            stop = self.ctx.Event()
+            process = self.ctx.Process(
+                target=capture_loop,
+                args=(cam_id, cam["url"], ring.name, ring.shape, ring.slots, stop),
+                daemon=True
+            )
+            process.start()
+            self.capture_processes[cam_id] = (process, stop)
+
+    def pause_capture(self, cam_ids=None):
+        # Releases the cameras; inference workers stay loaded
+        cam_ids = list(self.capture_processes) if cam_ids is None else cam_ids
+        stopping = [self.capture_processes.pop(cam_id) for cam_id in cam_ids if cam_id in self.capture_processes]
+        for _, stop in stopping:
+            stop.set()
+        for process, _ in stopping:
+            process.join(timeout=5)
+
+    def dispatch(self, should_recognize=None, use_detection=False, cam_ids=None):
+        limit = self.max_in_flight
+        for cam_id in self.rings if cam_ids is None else cam_ids:
+            ring = self.rings[cam_id]
+            if len(self.in_flight[cam_id]) >= min(limit, ring.slots // 2 - 1):
+                continue
+            seq = ring.latest()
+            if seq <= self.dispatched[cam_id]:
+                continue
+
+            slot = ring.pin(seq)
+            if slot is None:
+                continue
+            if should_recognize and not should_recognize(cam_id, ring.frames[slot]):
+                ring.unpin(slot)
+                self.dispatched[cam_id] = seq
+                continue
+
+            spec = (ring.name, ring.shape, ring.slots)
+            self.tasks.put((cam_id, spec, seq, slot, use_detection, self.cameras[cam_id].get("roi")))
+            self.in_flight[cam_id][seq] = slot
+            self.dispatched[cam_id] = seq
+            self.stats["dispatched"] += 1
+
+    def poll(self, cam_ids=None):
+        """[(cam_id, seq, faces)] finished since the last call for these cameras, oldest first per camera"""
+        while True:
+            try:
+                cam_id, name, seq, slot, faces, info = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if info.get("claimed"):
+                self.claims[info["worker"]] = (cam_id, name, seq, slot)
+                continue
+            self.claims.pop(info.get("worker"), None)
+
+            if not self.release(cam_id, name, seq, slot):
+                continue
+
+            self.stats["completed"] += 1
+            if "ms" in info:
+                self.worker_ms.append(info["ms"])
+                INFERENCE_MS.observe(info["ms"], camera=cam_id)
+                # only frames that went to CompreFace tell the rate controller anything
+                if self.on_result[cam_id]:
+                    self.on_result[cam_id](cam_id, info["ms"], info.get("error"))
+            if info.get("liveness_batch"):
+                LIVENESS_BATCH.observe(info["liveness_batch"])
+                LIVENESS_MS.observe(info["liveness_ms"])
+
+            if info.get("skipped"):
+                self.stats["skipped"] += 1
+                continue
+            if info.get("error"):
+                self.stats["errors"] += 1
+                print(f"Inference error ({cam_id}): {info['error']}")
+                continue
+            if seq <= self.processed[cam_id]:
+                self.stats["dropped"] += 1   # a newer frame of this camera already landed
+                INFERENCE_STALE.inc(camera=cam_id)
+                continue
+            self.processed[cam_id] = seq
+            self.finished[cam_id].append((cam_id, seq, faces))
+
+        self.restart_dead_workers()
+
+        done = []
+        for cam_id in self.rings if cam_ids is None else cam_ids:
+            done.extend(self.finished[cam_id])
+            self.finished[cam_id] = []
+        return done
+
+    def cameras_started(self, cam_ids=None):
+        return all(self.rings[cam_id].latest() >= 0 for cam_id in (self.rings if cam_ids is None else cam_ids))
+
+    def pending(self, cam_ids=None):
+        return sum(len(self.in_flight[cam_id]) for cam_id in (self.rings if cam_ids is None else cam_ids))
+
+    def close(self):
+        REGISTRY.remove_collector(self.collect_metrics)
+        self.pause_capture()
+        self.stop_workers.set()
+        for process in self.worker_processes:
+            process.join(timeout=5)
+        for ring in self.rings.values():
+            ring.close()
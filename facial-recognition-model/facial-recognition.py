@@ -1,13 +1,26 @@
+from edge_pipeline.startup import Startup, LazyModel    # first, it stamps when the process started
 import cv2
 import time
 from threading import Thread 
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from datetime import datetime, timezone
 import sys
-import json
 from pathlib import Path 
-from liveness_detection.tsn_predict import TSNPredictor
+from edge_pipeline.presence import PresenceTracker
+from edge_pipeline.roster import RosterClient, pick_subject
+from edge_pipeline.gallery import FaceGallery
+from edge_pipeline.schedule import VenueSchedule, ACTIVE, IDLE, SLEEP
+from edge_pipeline.quality import QualityGate
+from edge_pipeline.motion import MotionGate
+from edge_pipeline.workers import InferencePool
+from edge_pipeline.async_client import AsyncCompreFace
+from edge_pipeline.roi import FrameEncoder
+from edge_pipeline.fusion import SightingFusion
+from edge_pipeline.rate_control import RateController
+from edge_pipeline.door_zone import DoorZone, OUTSIDE
+from edge_pipeline.config import ConfigWatcher, diff_cameras
+from edge_pipeline import metrics
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(BASE_DIR))
@@ -22,37 +35,130 @@ load_dotenv(dotenv_path=env_path)
 
 # Global vars
 recog_interval = 0          # does reognition every x seconds
+idle_recog_interval = 30    # between classes, recognition only every x seconds
+loop_sleep = {ACTIVE: 0.5, IDLE: 1, SLEEP: 30}     # main loop sleep per schedule mode, active wakes early when a camera is due
 absence_threshold = 5       # y seconds of not seen, will update leave time, RMB TO CHANGE 
+rate_settings = {           # per camera recognition rate, adapted to CompreFace latency and the scene
+    "min_interval": 0.2,    # seconds, fastest a camera is recognised
+    "max_interval": absence_threshold - 1,     # slowest, under the absence threshold so seated students stay present
+    "target_latency_ms": 500,   # slower calls than this back the rate off
+    "max_pending": 8        # frames waiting on recognition before new ones are skipped
+}
 liveness_history_len = 5    # stores how many history??
 spoof_threshold = 0.2       # can only be detected as spoof x% of the time
-
-def load_config():
-    config_file = Path("config.json")
-    with open(config_file, 'r') as f:
-        config = json.load(f)
-
-    venue = config.get("venue", "Unknown")  # venue = unknow if no venue
-    cameras = config.get("cameras", [])
-    return venue , cameras
+similarity_threshold = 0.8  # minimum similarity to accept a match
+candidate_count = 5         # matches CompreFace returns per face, the best enrolled one is used
+evict_after = 3 * 60 * 60   # forget students not seen for z seconds, longer than any class
+fusion_window = 0.3         # sightings of a student this close together, on any camera, count once
+gallery_sync_interval = 60  # seconds between gallery delta syncs
+motion_settings = {         # recognition runs only when the scene changes
+    "min_motion": 0.01,     # fraction of the frame that changed
+    "min_zone_motion": 0.02,    # fraction of the camera's entry_zone that changed
+    "keepalive": absence_threshold - 1    # recognise anyway, so seated students are not marked as left
+}
+quality_thresholds = {      # faces failing any of these skip identification and liveness
+    "min_face_px": 60,      # shorter side of the face box
+    "min_sharpness": 40.0,  # variance of the Laplacian, lower is blurrier
+    "min_brightness": 40,
+    "max_brightness": 220,
+    "max_yaw": 30.0,        # degrees
+    "max_pitch": 25.0
+}
+upload_settings = {         # what goes up to CompreFace, cameras can add "roi": [x0, y0, x1, y1] in config.json
+    "target_face_px": 160,  # downscale until the smallest face is about this wide
+    "max_side": 960,        # longest side of an upload
+    "byte_budget": 60_000,  # JPEG quality drops until an upload fits
+    "local_faces": True     # crop to faces found by a local Haar cascade when there are any
+}
+
+backend_api_url = os.getenv("BACKEND_API_URL", "https://attendify-ekg6.onrender.com/api/")
+attendance_api_url = os.getenv("ATTENDANCE_API_URL", backend_api_url.rstrip("/") + "/mark-attendance/")
+edge_api_key = os.getenv("EDGE_API_KEY")     # authenticates the edge to the backend's roster, schedule and face gallery
+gallery_cache_dir = os.getenv("GALLERY_CACHE_DIR", "gallery_cache")
+inference_workers = int(os.getenv("INFERENCE_WORKERS", "0"))   # 0 = capture and inference in this process
+metrics_port = int(os.getenv("METRICS_PORT", "9108"))    # Prometheus /metrics, 0 = off
+compreface_in_flight = int(os.getenv("COMPREFACE_MAX_IN_FLIGHT", "4"))  # concurrent CompreFace calls, 0 = one camera at a time
+config_path = Path(os.getenv("EDGE_CONFIG", Path(__file__).resolve().parent / "config.json"))
+config_reload_interval = 5  # seconds between checks for config.json changes
+recognition_options = {
+    "limit": 0,
+    "det_prob_threshold": 0.8,
+    "prediction_count": candidate_count,
+    "face_plugins": "age,gender,landmarks",
+    "status": False
+}
+detection_options = {
+    "limit": 0,
+    "det_prob_threshold": 0.8,
+    "face_plugins": "calculator,landmarks",
+    "status": False
+}
+
+def load_liveness_model():
+    # torch is only imported here, on the LazyModel thread
+    from liveness_detection.tsn_predict import TSNPredictor
+    return TSNPredictor()
+
+def cameras_stage(venue):
+    return f"cameras {venue}"
+
+def startup_stages(venues):
+    # the edge is ready once every venue's cameras have a frame and liveness can run
+    # (with workers also here: gallery matches come back as crops and are checked in this process)
+    return [cameras_stage(venue) for venue in venues] + (["workers", "liveness"] if inference_workers else ["liveness"])
+
+def worker_options():
+    # the same for every venue, so one pool serves them all
+    detection_api_key = os.getenv("COMPR_FACE_DETECTION_API_KEY")
+    return {
+        "host": os.getenv("HOST"),
+        "port": os.getenv("PORT"),
+        "api_key": os.getenv("COMPR_FACE_API_KEY"),
+        "recognition_options": recognition_options,
+        "detection_api_key": detection_api_key if edge_api_key else None,
+        "detection_options": detection_options,
+        "quality": quality_thresholds,
+        "encoder": upload_settings,
+        "similarity_threshold": similarity_threshold
+    }
 
 class ThreadedCamera:
-    def __init__(self, venue, cameras):
+    # capture_factory / display let the replay harness swap in recorded sources and run headless
+    # liveness_predictor / pool are shared between the venues of one process (see Venues), made here if not given
+    def __init__(self, venue, cameras, capture_factory=cv2.VideoCapture, display=True, startup=None,
+                 liveness_predictor=None, pool=None):
+        self.startup = startup or Startup(startup_stages([venue]))
+        # the model loads in the background while the cameras open
+        # with inference workers it only runs on gallery matches, the workers check CompreFace matches themselves
+        self.liveness_predictor = liveness_predictor
+        if liveness_predictor is None:
+            self.liveness_predictor = LazyModel(load_liveness_model, on_ready=lambda: self.startup.mark("liveness"))
+
         self.active = True
+        self.display = display
         self.frames = {}
         self.results = {}
         self.last_recog_time = datetime.now(timezone.utc)  # stores in datetime format
-        self.attendance_state = {}              # For writing to DB
+        self.cameras = [dict(cam, id=cam.get("id", f"cam_{i}")) for i, cam in enumerate(cameras)]
+        # door mode: cameras with a "door" line emit entry/exit on crossings,
+        # so seated students do not have to be re-recognised to stay present
+        self.doors = DoorZone(self.cameras)
+        self.absence = self.absence_timeout()
+        self.session_ends = None    # end of the roster session attendance is being kept for, if known
+        self.presence = PresenceTracker(self.absence, liveness_history_len, evict_after)  # For writing to DB
+        self.fusion = SightingFusion(fusion_window)     # merges the venue's cameras before presence is updated
+        self.rate = RateController(**rate_settings)
+        self.active_tracks = 0
+        self.capture_factory = capture_factory
         self.capture = {}
-        for cam in cameras:
-            cam_id = cam.get("id", f"cam_{len(self.capture)}")
-            cam_url = cam.get("url")
-            cap = cv2.VideoCapture(cam_url)  
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
-            if not cap.isOpened():
-                print(f"[!] Could not open camera {cam_id} ({cam_url})")
-            self.capture[cam_id] = cap
+        self.retired = []   # captures of removed cameras, released by show_frame once it is done with them
+        self.motion = {}    # per camera motion gate, kept across sleep so counters add up
+        self.pool = pool
+        self.owns_pool = pool is None
 
-        self.liveness_predictor = TSNPredictor()
+        self.quality = QualityGate(**quality_thresholds)
+        self.encoder = FrameEncoder(self.rois(), **upload_settings)
+        self.roster = RosterClient(backend_api_url, venue, edge_api_key)   # only students enrolled in the class here can match
 
         # API SETTINGS
         self.api_key = os.getenv("COMPR_FACE_API_KEY")
@@ -60,26 +166,209 @@ class ThreadedCamera:
         self.port = os.getenv("PORT")
         self.venue = venue
 
-        compre_face: CompreFace = CompreFace(self.host, self.port, {
-            "limit": 0,
-            "det_prob_threshold": 0.8,
-            "prediction_count": 1,
-            "face_plugins": "age,gender",
-            "status": False
-        })
+        self.recognition_options = recognition_options
+        compre_face: CompreFace = CompreFace(self.host, self.port, self.recognition_options)
 
         self.recognition: RecognitionService = compre_face.init_face_recognition(self.api_key)
+
+        # Local gallery: CompreFace only detects faces and computes embeddings, matching happens here
+        # Falls back to CompreFace recognition until the gallery has synced at least once
+        self.gallery = None
+        detection_api_key = os.getenv("COMPR_FACE_DETECTION_API_KEY")
+        if edge_api_key and detection_api_key:
+            self.detection = compre_face.init_face_detection(detection_api_key)
+            self.detection_options = detection_options
+            self.gallery = FaceGallery(
+                backend_api_url, venue, edge_api_key, gallery_cache_dir, sync_interval=gallery_sync_interval
+            ).start()
         self.FPS = 1/30
 
-        # Start frame retrieval thread
+        # all cameras are sent to CompreFace together over kept-alive connections
+        self.compreface_client = None
+        if compreface_in_flight and not inference_workers:
+            self.compreface_client = AsyncCompreFace(
+                self.host, self.port, self.api_key, self.recognition_options,
+                detection_api_key if self.gallery else None, getattr(self, "detection_options", None),
+                max_in_flight=compreface_in_flight, encoder=self.encoder, on_call=self.rate.observe_call
+            )
+
+        # Full rate only while a class is on, cameras are released overnight
+        self.schedule = VenueSchedule(backend_api_url, venue, edge_api_key)
+        self.mode = ACTIVE
+
+        for cam in self.cameras:
+            self.motion[cam["id"]] = self.motion_gate(cam)
+
+        if self.pool:
+            for cam in self.cameras:
+                self.pool.set_camera(cam, on_result=self.rate.observe_call)
+        elif inference_workers:
+            # capture and inference run in their own processes, this one only owns attendance state
+            self.pool = InferencePool(
+                self.cameras, inference_workers, worker_options(), on_result=self.rate.observe_call
+            )
+        else:
+            # Start frame retrieval thread
+            self.open_cameras()
+            self.start_capture_thread()
+
+    def rois(self):
+        return {cam["id"]: cam["roi"] for cam in self.cameras if cam.get("roi")}
+
+    def cam_ids(self):
+        return [cam["id"] for cam in self.cameras]
+
+    def absence_timeout(self):
+        # door mode: exits come from outward crossings and the end of the session, never from not being seen,
+        # since seated students are not re-identified once they are past the door
+        return float("inf") if self.doors else absence_threshold
+
+    def motion_gate(self, cam):
+        # the keep-alive stays finite in door mode too: a class sitting still is still re-identified now and then
+        return MotionGate(entry_zone=cam.get("entry_zone"), **motion_settings)
+
+    def set_cameras(self, cameras):
+        # config.json changed: only cameras that were added, removed or re-pointed are touched,
+        # attendance state and the other cameras carry on
+        cameras = [dict(cam, id=cam.get("id", f"cam_{i}")) for i, cam in enumerate(cameras)]
+        added, removed, changed = diff_cameras(self.cameras, cameras)
+        if not (added or removed or changed):
+            return
+        print(f"Cameras of {self.venue}: added {[cam['id'] for cam in added]}, "
+              f"removed {[cam['id'] for cam in removed]}, changed {[cam['id'] for cam in changed]}")
+
+        old = {cam["id"]: cam for cam in self.cameras}
+        repointed = [cam for cam in changed
+                     if (cam.get("url"), cam.get("resolution")) != (old[cam["id"]].get("url"), old[cam["id"]].get("resolution"))]
+        self.cameras = cameras
+        self.doors = DoorZone(self.cameras)
+        self.absence = self.absence_timeout()
+        self.presence.set_absence_threshold(self.absence)
+        self.encoder.rois = self.rois()
+
+        for cam in removed:
+            self.drop_camera(cam["id"])
+        for cam in added + changed:
+            self.motion[cam["id"]] = self.motion_gate(cam)  # new view, new background
+            if self.pool:
+                self.pool.set_camera(cam, on_result=self.rate.observe_call, capture=self.mode != SLEEP)
+        if self.pool or self.mode == SLEEP:
+            return  # asleep, open_cameras() picks up the new list on wake
+
+        # threaded capture: swap in the new captures, show_frame releases the old ones after its pass
+        reopen = added + repointed
+        for cam in reopen:
+            self.frames.pop(cam["id"], None)
+            self.results.pop(cam["id"], None)
+        capture = {cam_id: cap for cam_id, cap in self.capture.items() if cam_id in self.motion}
+        self.retired.extend(capture.pop(cam["id"]) for cam in repointed if cam["id"] in capture)
+        self.retired.extend(cap for cam_id, cap in self.capture.items() if cam_id not in self.motion)
+        capture.update(self.open_captures(reopen))
+        self.capture = capture
+        if not self.thread.is_alive():
+            self.release_retired()
+            self.start_capture_thread()
+
+    def drop_camera(self, cam_id):
+        self.motion.pop(cam_id, None)
+        self.frames.pop(cam_id, None)
+        self.results.pop(cam_id, None)
+        self.rate.forget(cam_id)
+        metrics.RECOGNITION_INTERVAL.remove(camera=cam_id)
+        if self.pool:
+            self.pool.remove_camera(cam_id)
+
+    def release_retired(self):
+        while self.retired:
+            self.retired.pop().release()
+
+    def close(self):
+        # venue taken out of config.json: record the exits of whoever is still in, then let go of everything
+        self.end_session(None, datetime.now(timezone.utc))
+        for cam_id in self.cam_ids():
+            self.drop_camera(cam_id)
+        self.cameras = []
+        if self.pool and self.owns_pool:
+            self.pool.close()
+        elif not self.pool and self.mode != SLEEP:
+            self.capturing = False
+            self.thread.join(timeout=2)
+            self.retired.extend(self.capture.values())
+            self.capture = {}
+            self.release_retired()
+        if self.compreface_client:
+            self.compreface_client.close()
+        if self.gallery:
+            self.gallery.stop()
+        for gauge in (metrics.TRACKED_STUDENTS, metrics.PRESENT_STUDENTS, metrics.FUSION_PENDING):
+            gauge.remove(venue=self.venue)
+
+    def open_camera(self, cam):
+        cam_url = cam.get("url")
+        cap = self.capture_factory(cam_url)  
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+        if not cap.isOpened():
+            print(f"[!] Could not open camera {cam['id']} ({cam_url})")
+        return cap
+
+    def open_captures(self, cameras):
+        # IP cameras can take seconds each to connect, so open them all at once
+        with ThreadPoolExecutor(max_workers=max(1, len(cameras))) as executor:
+            caps = list(executor.map(self.open_camera, cameras))
+        return {cam["id"]: cap for cam, cap in zip(cameras, caps)}
+
+    def open_cameras(self):
+        self.capture = self.open_captures(self.cameras)
+        for cam_id in self.capture:
+            self.motion[cam_id].background = None  # the scene may have changed while asleep
+
+    def start_capture_thread(self):
+        self.capturing = True
         self.thread = Thread(target=self.show_frame, args=())
         self.thread.daemon = True
         self.thread.start()
 
+    def set_mode(self, mode):
+        if mode == self.mode:
+            return
+        print(f"Schedule mode: {self.mode} -> {mode}")
+
+        if self.pool:
+            if mode == SLEEP:
+                self.pool.pause_capture(self.cam_ids())
+            elif self.mode == SLEEP:
+                for gate in self.motion.values():
+                    gate.background = None
+                self.pool.start_capture(self.cam_ids())
+        elif mode == SLEEP:
+            # stop show_frame before releasing, so no read is in flight
+            self.capturing = False
+            self.thread.join(timeout=2)
+            for cap in self.capture.values():
+                cap.release()
+            self.frames = {}
+            self.results = {}
+            if self.display:
+                cv2.destroyAllWindows()
+        elif self.mode == SLEEP:
+            self.open_cameras()
+            self.start_capture_thread()
+        self.mode = mode
+
+    def loop_interval(self):
+        if self.mode != ACTIVE:
+            return loop_sleep[self.mode]
+        # sleep until the next camera is due, pool results are picked up at least that often too
+        longest = min(loop_sleep[ACTIVE], rate_settings["min_interval"]) if self.pool else loop_sleep[ACTIVE]
+        next_due = self.rate.next_due()
+        if next_due is None:
+            return longest
+        return min(longest, max(0.01, next_due - time.time()))
+
     def send_request(self, student_id, entry_timestamp, exit_timestamp):
         try:
-            requests.post(
-                "https://attendify-ekg6.onrender.com/api/mark-attendance/",
+            response = requests.post(
+                attendance_api_url,
                 json={
                     "student_id": student_id,
                     "venue" : self.venue,
@@ -88,21 +377,37 @@ class ThreadedCamera:
                 },
                 timeout = 2
             )
+            stamps = [t for t in (entry_timestamp, exit_timestamp) if t]
+            if response.ok and stamps:
+                # the later stamp is what this event reports (an entry, or the last sighting before leaving)
+                metrics.ATTENDANCE_ACK_MS.observe((datetime.now(timezone.utc) - max(stamps)).total_seconds() * 1000)
+            metrics.ATTENDANCE_POSTS.inc(outcome="ok" if response.ok else f"http_{response.status_code}")
             
         except requests.RequestException as e:
+            metrics.ATTENDANCE_POSTS.inc(outcome="error")
             print(f"Attendance API error: {student_id}: {e}")
         print("SENT", 'EnTRY: ', entry_timestamp , 'EXIT: ', exit_timestamp)
 
 
     def show_frame(self):
-        while any(cap.isOpened() for cap in self.capture.values()):
-            for cam_id, cap in self.capture.items():
+        while self.capturing and any(cap.isOpened() for cap in self.capture.values()):
+            self.release_retired()
+            for cam_id, cap in list(self.capture.items()):
                 ret, frame_raw = cap.read()
                 if not ret:
+                    if cap.isOpened():
+                        metrics.CAPTURE_DROPPED.inc(camera=cam_id)
                     continue
                 frame = cv2.flip(frame_raw, 1)
                 self.frames[cam_id] = frame
+                metrics.CAPTURE_FRAMES.inc(camera=cam_id)
+                metrics.CAMERA_LAST_FRAME.set(time.time(), camera=cam_id)
+                if not self.startup.done(cameras_stage(self.venue)) and len(self.frames) == len(self.capture):
+                    self.startup.mark(cameras_stage(self.venue))
                 
+                if not self.display:
+                    continue
+
 
                 if self.results.get(cam_id):
                     results = self.results[cam_id]
@@ -148,7 +453,7 @@ class ThreadedCamera:
                                 
                 cv2.imshow(f"{self.venue} - {cam_id}", frame)
 
-            if cv2.waitKey(1) & 0xFF == 27:
+            if self.display and cv2.waitKey(1) & 0xFF == 27:
                 for cap in self.capture.values():
                     cap.release()
                 cv2.destroyAllWindows()
@@ -158,29 +463,123 @@ class ThreadedCamera:
         return self.active
 
     def update(self):
-        if not self.frames:
-            return
-
         now = datetime.now(timezone.utc)
 
-        # throttle recognition 
-        if (now - self.last_recog_time).total_seconds() < recog_interval:
+        self.set_mode(self.schedule.mode(now))
+        if self.mode == SLEEP or not (self.frames or self.pool):
+            return
+
+        # throttle recognition, much slower between classes
+        interval = recog_interval if self.mode == ACTIVE else idle_recog_interval
+        if (now - self.last_recog_time).total_seconds() < interval:
             return 
 
         # Updates the time the last recognition is done, to apply the throttling  
         self.last_recog_time = now
 
-        for cam_id, frame in self.frames.items():
-            _, im_buf_arr = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 75])
-            byte_im = im_buf_arr.tobytes()
-            data = self.recognition.recognize(byte_im)
+        # attendance state only lives for the class (or the day if the roster is unavailable)
+        roster = self.roster.current(now)
+        session_key = self.roster.session_key if roster is not None else now.astimezone().date()
+        if session_key != self.presence.session_key:
+            self.fusion.clear()
+            self.end_session(session_key, now)
+            self.session_ends = self.roster.ends_at() if roster is not None else None
+
+        if self.pool:
+            self.rate.set_pending(self.pool.pending(self.cam_ids()))
+            self.update_from_pool(now, roster)
+
+        # static scene: nothing new to recognise since the last pass on this camera
+        frames = {
+            cam_id: frame for cam_id, frame in list(self.frames.items())
+            if cam_id in self.motion and self.should_recognize(cam_id, frame, now)
+        }
+        use_detection = bool(self.gallery and self.gallery.ready)
+
+        for cam_id, data in self.recognize_frames(frames, use_detection):
+            self.startup.mark("first_recognition")
+            frame = frames[cam_id]
+            faces = self.quality.filter(frame, data.get('result'))
+            if use_detection:
+                self.gallery.match(faces, candidate_count, roster)
             self.results[cam_id] = data.get('result')
-
-            self.process_attendance(self.results[cam_id], now, frame)
-            self.check_leavers(now)
-
-    # results contains all recognized faces in the frame
-    def process_attendance(self, results, now, frame):
+            self.rate.observe_scene(cam_id, len(data.get('result') or []), self.active_tracks)
+
+            self.process_attendance(faces, now, frame, roster, cam_id)
+
+        # one liveness check and one presence update per student, however many cameras saw them
+        for sighting in self.fusion.flush(now.timestamp()):
+            self.confirm_presence(sighting)
+
+        # once per pass, not once per camera
+        self.check_leavers(now)
+        self.doors.prune(now.timestamp())
+
+        # students still around, the rate controller keeps their cameras from idling
+        self.active_tracks = sum(1 for state in self.presence.states.values() if not state["has_left"])
+        metrics.TRACKED_STUDENTS.set(len(self.presence), venue=self.venue)
+        metrics.PRESENT_STUDENTS.set(sum(
+            1 for state in self.presence.states.values() if state["present"] and not state["has_left"]
+        ), venue=self.venue)
+        metrics.FUSION_PENDING.set(len(self.fusion), venue=self.venue)
+        for cam_id in self.motion:
+            metrics.RECOGNITION_INTERVAL.set(self.rate.interval(cam_id), camera=cam_id)
+
+    def should_recognize(self, cam_id, frame, now):
+        # rate controller first: too soon for this camera, or too much work already waiting
+        if not self.rate.due(cam_id, now.timestamp()):
+            metrics.RECOGNITION_SKIPPED.inc(camera=cam_id, reason="rate")
+            return False
+        if self.motion[cam_id].should_recognize(frame, now.timestamp()):
+            return True
+        metrics.RECOGNITION_SKIPPED.inc(camera=cam_id, reason="static")
+        return False
+
+    def recognize_frames(self, frames, use_detection):
+        if self.compreface_client:
+            return self.compreface_client.recognize_all(frames, use_detection)
+
+        responses = []
+        for cam_id, frame in frames.items():
+            byte_im, transform = self.encoder.encode(cam_id, frame)
+            endpoint = "detect" if use_detection else "recognize"
+            with metrics.Timer(metrics.COMPREFACE_MS, camera=cam_id, endpoint=endpoint) as timer:
+                if use_detection:
+                    data = self.detection.detect(byte_im, self.detection_options)
+                else:
+                    data = self.recognition.recognize(byte_im)
+            metrics.COMPREFACE_REQUESTS.inc(camera=cam_id, endpoint=endpoint, outcome="ok")
+            self.rate.observe_call(cam_id, timer.ms)
+            self.encoder.restore(data.get('result'), transform)
+            responses.append((cam_id, data))
+        return responses
+
+    def update_from_pool(self, now, roster):
+        # hand the newest frames to idle workers, then apply whatever came back
+        self.pool.dispatch(
+            lambda cam_id, frame: self.should_recognize(cam_id, frame, now),
+            use_detection=bool(self.gallery and self.gallery.ready),
+            cam_ids=self.cam_ids()
+        )
+
+        if not self.startup.done(cameras_stage(self.venue)) and self.pool.cameras_started(self.cam_ids()):
+            self.startup.mark(cameras_stage(self.venue))
+
+        for cam_id, seq, results in self.pool.poll(self.cam_ids()):
+            self.startup.mark("workers")
+            self.startup.mark("first_recognition")
+            faces = [result for result in results if result.get("quality", {}).get("passed")]
+            faces.sort(key=lambda result: result["quality"]["score"], reverse=True)
+            if self.gallery:
+                self.gallery.match(faces, candidate_count, roster)
+            self.results[cam_id] = results
+            self.rate.observe_scene(cam_id, len(results), self.active_tracks)
+
+            self.process_attendance(faces, now, None, roster, cam_id)
+
+    # results contains the recognized faces in the frame that passed the quality gate
+    # each match becomes a sighting, confirm_presence() runs on the best one per student
+    def process_attendance(self, results, now, frame, roster=None, cam_id=None):
         if not results:
             return  # nothing to process
 
@@ -191,85 +590,176 @@ class ThreadedCamera:
             if not subjects:
                 continue
             
-            # sort with the highest similarity first. As we only take the match with the highest confidence
-            #subjects = sorted(subjects, key = lambda k: k['similarity'], reverse = True)
-            
-            # Skips everything if similarity less than threshold
-            if subjects[0]['similarity'] < 0.8:
+            # CompreFace sorts subjects by similarity, take the best one enrolled in the class here
+            # Skips everything if no candidate passes the threshold
+            match = pick_subject(subjects, roster, similarity_threshold)
+            if match is None:
                 continue
 
-            student_id = subjects[0]['subject'] # subject will be using student id
-            
-            # Detects recognition for the first time
-            if student_id not in self.attendance_state:   
-                self.attendance_state[student_id] = {
-                    "entry" : None,    # Needs to check for liveness
-                    "exit" : None,     # used to check the last time student is in class
-                    "present" : False,      # False until liveness checked
-                    "liveness_history": deque(maxlen = liveness_history_len),   # 0 == live, 1 == spoof
-                    "has_left" : False,     # used as a flag
-                    "last_seen" : None,  # mainly used for student return to class
-                    "curr_entry" : None     # Datetime for tracking duration stayed in class
-                }
-
-            # Check for liveness before confirming attendance
-            student_state = self.attendance_state[student_id] # curr student based on result
-            
-            # crops the face that was detected
-            x_min, y_min, x_max, y_max = box['x_min'], box['y_min'] , box['x_max'], box['y_max']
-            face_crop = [frame[y_min:y_max, x_min:x_max]]
-            liveness = self.liveness_predictor.predict(face_crop)
-            if liveness[0][0] > liveness[0][1]:
-                print("Live", student_id)   # for debug
-                isLive = 0
-            else:
-                print("Spoof", student_id)  # for debug
-                isLive = 1
-            
-            live_hist = student_state["liveness_history"]
-            live_hist.append(isLive)
-            
-            # If is live, add to DB
-            if (len(live_hist) == liveness_history_len and \
-                (sum(live_hist) / len(live_hist)) <= spoof_threshold):
-
-                # entry time only needs to be updated the first time
-                if not student_state["entry"]:
-                    student_state["entry"] = now
-                    student_state["curr_entry"] = now
-                    student_state["present"] = True
-                    self.send_request(student_id, student_state["entry"], student_state["exit"])    # Updates entry time in DB
-
-                # Student re-entry, exit would have data
-                if student_state["has_left"]:
-                    student_state["curr_entry"] = now
-                    student_state["has_left"] = False
-                    self.send_request(student_id, student_state["curr_entry"], student_state["exit"])
-                    # sets exit time back to '-'
-                student_state["exit"] = now   
+            student_id = match['subject'] # subject will be using student id
+
+            side, crossing = self.doors.observe(cam_id, student_id, box, *self.frame_size(cam_id, frame), now.timestamp())
+            if crossing == "exit":
+                self.record_exit(student_id, now)
+            if side == OUTSIDE:
+                continue    # outside the door is not in the room
+
+            # inference workers send liveness along with a CompreFace match, or the crop of a gallery match
+            crop = result.pop("crop", None)
+            if crop is None and "liveness" not in result:
+                if frame is None:
+                    continue
+                # crops the face that was detected, copied so the frame can go
+                x_min, y_min, x_max, y_max = box['x_min'], box['y_min'] , box['x_max'], box['y_max']
+                crop = frame[y_min:y_max, x_min:x_max].copy()
+            self.fusion.add(student_id, cam_id, result, match['similarity'], now, crop)
+
+    def frame_size(self, cam_id, frame):
+        height, width = frame.shape[:2] if frame is not None else self.pool.rings[cam_id].shape[:2]
+        return width, height
+
+    def record_exit(self, student_id, now):
+        # walked out through the door, no need to wait for the absence timer
+        self.fusion.discard(student_id)     # sightings from just before the door must not re-enter them
+        student_state = self.presence.states.get(student_id)
+        if not student_state or not student_state["present"] or student_state["has_left"]:
+            return
+        student_state["exit"] = now
+        student_state["has_left"] = True
+        student_state["liveness_history"].clear()
+        self.send_request(student_id, student_state["curr_entry"], student_state["exit"])
+        self.presence.reschedule(student_id)
+
+    def confirm_presence(self, sighting):
+        student_id = sighting["student_id"]
+        now = sighting["seen_at"]
+
+        # Check for liveness before confirming attendance
+        student_state = self.presence.track(student_id, now) # curr student based on result, created on first recognition
+
+        if sighting["crop"] is None:
+            liveness = [sighting["result"]["liveness"]]
+        elif not self.liveness_predictor.ready:
+            return  # still loading, seen but not counted towards liveness yet
+        else:
+            with metrics.Timer(metrics.LIVENESS_MS):
+                liveness = self.liveness_predictor.predict([sighting["crop"]])
+            metrics.LIVENESS_BATCH.observe(1)
+        if liveness[0][0] > liveness[0][1]:
+            print("Live", student_id)   # for debug
+            isLive = 0
+        else:
+            print("Spoof", student_id)  # for debug
+            isLive = 1
+        
+        live_hist = student_state["liveness_history"]
+        live_hist.append(isLive)
+        
+        # If is live, add to DB
+        if (len(live_hist) == liveness_history_len and \
+            (sum(live_hist) / len(live_hist)) <= spoof_threshold):
+
+            # entry time only needs to be updated the first time
+            if not student_state["entry"]:
+                student_state["entry"] = now
+                student_state["curr_entry"] = now
+                student_state["present"] = True
+                self.send_request(student_id, student_state["entry"], student_state["exit"])    # Updates entry time in DB
+
+            # Student re-entry, exit would have data
+            if student_state["has_left"]:
+                student_state["curr_entry"] = now
+                student_state["has_left"] = False
+                self.send_request(student_id, student_state["curr_entry"], student_state["exit"])
+                # sets exit time back to '-'
+            student_state["exit"] = now   
+            self.presence.reschedule(student_id)
 
     # leavers: present = True, and left halfway
     # do not need to check for absent, there is no record anyway
+    def end_session(self, session_key, now):
+        # students still in the room get their exit posted before the state is dropped
+        # door mode: nobody saw them cross out, so they stayed until the class ended, not just their last sighting
+        ended_at = min(now, self.session_ends) if self.session_ends else now
+        for student_id, state in self.presence.start_session(session_key):
+            if self.doors:
+                state["exit"] = max(state["exit"], ended_at)
+            self.send_request(student_id, state.get("curr_entry"), state.get("exit"))
+
     def check_leavers(self, now):
-        # to be included in self.attendance means they are already present and recorded entry time
-        for student_id, state in self.attendance_state.items():
-            exit_time = state.get("exit")
-            present = state.get("present")
-            has_left = state.get("has_left")
-
-            if exit_time and present and not has_left:
-                delta_seconds = (now - exit_time).total_seconds()
-                if delta_seconds > absence_threshold:
-                    self.send_request(student_id, state.get("curr_entry"), exit_time)
-                    state["liveness_history"].clear()
-                    state["has_left"] = True    # set flag to True
+        # only students whose exit deadline has passed come back from the tracker
+        for student_id, state in self.presence.expire(now):
+            self.send_request(student_id, state.get("curr_entry"), state.get("exit"))
+            state["liveness_history"].clear()
+
+class Venues:
+    """
+    Every venue in config.json, served by one process. The venues share the
+    liveness model (or the inference pool, whose workers each load it once),
+    so another venue costs its cameras and attendance state, not another
+    copy of the model.
+
+    config.json is re-read when it changes. Venues and cameras that were
+    added, removed or re-pointed are set up or torn down in place, the rest
+    keep their captures and attendance state.
+    """
+
+    def __init__(self, watcher, startup, capture_factory=cv2.VideoCapture, display=True):
+        self.watcher = watcher
+        self.startup = startup
+        self.capture_factory = capture_factory
+        self.display = display
+        self.pool = None
+        if inference_workers:
+            self.pool = InferencePool([], inference_workers, worker_options())
+        self.liveness_predictor = LazyModel(load_liveness_model, on_ready=lambda: self.startup.mark("liveness"))
+        self.venues = {}
+        self.apply(watcher.config)
+
+    def apply(self, config):
+        for venue in [venue for venue in self.venues if venue not in config]:
+            print(f"Venue removed: {venue}")
+            self.venues.pop(venue).close()
+
+        # removals first, a camera moved to another venue must be gone from the old one before it is added
+        for venue, threaded_camera in self.venues.items():
+            ids = {cam["id"] for cam in config[venue]}
+            threaded_camera.set_cameras([cam for cam in threaded_camera.cameras if cam["id"] in ids])
+
+        for venue, cameras in config.items():
+            if venue in self.venues:
+                self.venues[venue].set_cameras(cameras)
+            else:
+                print(f"Venue added: {venue}")
+                self.venues[venue] = ThreadedCamera(
+                    venue, cameras, self.capture_factory, self.display, self.startup,
+                    liveness_predictor=self.liveness_predictor, pool=self.pool
+                )
+
+    def is_active(self):
+        return all(threaded_camera.is_active() for threaded_camera in self.venues.values())
+
+    def update(self):
+        config = self.watcher.poll()
+        if config is not None:
+            self.apply(config)
+        for threaded_camera in self.venues.values():
+            threaded_camera.update()
+
+    def loop_interval(self):
+        # the soonest any venue needs the loop again, config.json is still checked while they sleep
+        return min([threaded_camera.loop_interval() for threaded_camera in self.venues.values()] + [self.watcher.interval])
 
 #=====================================================================
 if __name__ == '__main__':
     #args = parseArguments()
     #threaded_camera = ThreadedCamera(args.api_key, args.host, args.port)
-    venue, cameras = load_config()
-    threaded_camera = ThreadedCamera(venue, cameras)
-    while threaded_camera.is_active():
-        threaded_camera.update()
-        time.sleep(0.1)     # limits main loop
\ No newline at end of file
+    watcher = ConfigWatcher(config_path, config_reload_interval)
+    startup = Startup(startup_stages(watcher.config))
+    if metrics_port:
+        # up first, so /ready answers 503 while the rest starts
+        metrics.start_server(metrics_port, readiness=startup.report)
+    venues = Venues(watcher, startup)
+    while venues.is_active():
+        venues.update()
+        time.sleep(venues.loop_interval())     # limits main loop, longer when idle or asleep
\ No newline at end of file
@@ -0,0 +1,16 @@
+# One-off conversion of the training checkpoint into the weights TSNPredictor
+# loads at startup, run from facial-recognition-model/:
+#   python -m liveness_detection.export_weights
+# The output holds plain tensors only (no optimizer state, no "module." prefixes),
+# so it can be memory-mapped with weights_only=True.
+import torch
+
+from .models import AENet
+from .tsn_predict import CHECKPOINT_PATH, WEIGHTS_PATH, pretrain
+
+if __name__ == "__main__":
+    net = AENet(num_classes = 2)
+    checkpoint = torch.load(CHECKPOINT_PATH, map_location="cpu")
+    pretrain(net, checkpoint['state_dict'])
+    torch.save(net.state_dict(), WEIGHTS_PATH)
+    print(f"Wrote {WEIGHTS_PATH} from {CHECKPOINT_PATH}")
@@ -1,4 +1,5 @@
 from PIL import Image
+import os
 import sys
 import numpy as np
 import torchvision
@@ -7,6 +8,9 @@ import torch
 from .models import AENet 
 from .detector import CelebASpoofDetector
 
+CHECKPOINT_PATH = './liveness_detection/ckpt_iter.pth.tar'
+WEIGHTS_PATH = './liveness_detection/tsn_weights.pt'     # made by export_weights.py, loads much faster
+
 def pretrain(model, state_dict):
     own_state = model.state_dict()
 
@@ -25,16 +29,29 @@ def pretrain(model, state_dict):
                       .format(realname, own_state[name].size(), param.size()))
                 print("But don't worry about it. Continue pretraining.")
 
+def load_net(num_class, device):
+    if os.path.exists(WEIGHTS_PATH):
+        # built on the meta device so the random init is skipped, then the
+        # memory-mapped weights are assigned in place instead of copied
+        with torch.device("meta"):
+            net = AENet(num_classes = num_class)
+        state_dict = torch.load(WEIGHTS_PATH, map_location="cpu", mmap=True, weights_only=True)
+        net.load_state_dict(state_dict, assign=True)
+        return net
+
+    print(f"{WEIGHTS_PATH} not found, loading the training checkpoint "
+          "(python -m liveness_detection.export_weights makes startup faster)")
+    net = AENet(num_classes = num_class)
+    checkpoint = torch.load(CHECKPOINT_PATH, map_location=device)
+    pretrain(net,checkpoint['state_dict'])
+    return net
+
 class TSNPredictor(CelebASpoofDetector):
 
     def __init__(self):
         self.num_class = 2
-        self.net = AENet(num_classes = self.num_class)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-        checkpoint = torch.load('./liveness_detection/ckpt_iter.pth.tar')
-
-        pretrain(self.net,checkpoint['state_dict'])
+        self.net = load_net(self.num_class, self.device)
 
         self.new_width = self.new_height = 224
 
@@ -54,7 +71,7 @@ class TSNPredictor(CelebASpoofDetector):
     def eval_image(self, image):
         data = torch.stack(image,dim=0)
         channel = 3
-        input_var = data.view(-1, channel, data.size(2), data.size(3)).cuda()
+        input_var = data.view(-1, channel, data.size(2), data.size(3)).to(self.device)
         with torch.no_grad():
             rst = self.net(input_var).detach()
         return rst.reshape(-1, self.num_class)
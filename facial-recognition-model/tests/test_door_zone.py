@@ -0,0 +1,114 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from edge_pipeline.door_zone import DoorLine, DoorZone, INSIDE, OUTSIDE
+from edge_pipeline.presence import PresenceTracker
+
+# Vertical door halfway across the frame, the room is on the right
+DOOR = {"line": [[0.5, 0.0], [0.5, 1.0]], "inside": [0.9, 0.5]}
+
+
+def box_at(x, y=0.5, size=1000):
+    """Face box of 40 px centred on (x, y) in a size x size frame"""
+    cx, cy = int(x * size), int(y * size)
+    return {"x_min": cx - 20, "x_max": cx + 20, "y_min": cy - 20, "y_max": cy + 20}
+
+
+class DoorLineTests(unittest.TestCase):
+    def test_sides_follow_the_inside_point(self):
+        line = DoorLine(DOOR["line"], DOOR["inside"])
+        self.assertEqual(line.side(0.8, 0.5), INSIDE)
+        self.assertEqual(line.side(0.2, 0.5), OUTSIDE)
+
+        flipped = DoorLine(DOOR["line"], [0.1, 0.5])
+        self.assertEqual(flipped.side(0.8, 0.5), OUTSIDE)
+        self.assertEqual(flipped.side(0.2, 0.5), INSIDE)
+
+    def test_margin_around_the_line_is_neither_side(self):
+        line = DoorLine(DOOR["line"], DOOR["inside"], margin=0.05)
+        self.assertIsNone(line.side(0.52, 0.5))
+        self.assertIsNone(line.side(0.46, 0.5))
+        self.assertEqual(line.side(0.56, 0.5), INSIDE)
+        self.assertEqual(line.side(0.44, 0.5), OUTSIDE)
+
+    def test_overhang_beyond_the_ends(self):
+        line = DoorLine([[0.5, 0.2], [0.5, 0.8]], DOOR["inside"], overhang=0.15)
+        # along the line 0 is at y=0.2 and 1 at y=0.8, so 0.15 of it reaches y=0.11 and y=0.89
+        self.assertEqual(line.side(0.8, 0.12), INSIDE)
+        self.assertEqual(line.side(0.8, 0.88), INSIDE)
+        self.assertIsNone(line.side(0.8, 0.05))
+        self.assertIsNone(line.side(0.2, 0.95))
+
+    def test_rejects_a_line_of_one_point(self):
+        with self.assertRaises(ValueError):
+            DoorLine([[0.5, 0.5], [0.5, 0.5]], DOOR["inside"])
+
+
+class DoorZoneTests(unittest.TestCase):
+    def setUp(self):
+        self.zone = DoorZone([{"id": "door", "door": DOOR}, {"id": "room"}], max_gap=3.0, margin=0.03)
+
+    def observe(self, x, ts, cam_id="door", student_id="S1"):
+        return self.zone.observe(cam_id, student_id, box_at(x), 1000, 1000, ts)
+
+    def test_only_cameras_with_a_door(self):
+        self.assertTrue(self.zone)
+        self.assertFalse(DoorZone([{"id": "room"}]))
+        self.assertEqual(self.observe(0.2, 0, cam_id="room"), (None, None))
+
+    def test_walking_in_then_out(self):
+        self.assertEqual(self.observe(0.2, 0.0), (OUTSIDE, None))
+        self.assertEqual(self.observe(0.4, 0.5), (OUTSIDE, None))
+        self.assertEqual(self.observe(0.51, 1.0), (None, None))     # on the line
+        self.assertEqual(self.observe(0.7, 1.5), (INSIDE, "entry"))
+        self.assertEqual(self.observe(0.8, 2.0), (INSIDE, None))
+        self.assertEqual(self.observe(0.3, 2.5), (OUTSIDE, "exit"))
+        self.assertEqual(self.zone.counts, {"entry": 1, "exit": 1})
+
+    def test_no_crossing_after_max_gap(self):
+        self.observe(0.2, 0.0)
+        self.assertEqual(self.observe(0.8, 3.5), (INSIDE, None))
+        self.assertEqual(self.zone.counts, {"entry": 0, "exit": 0})
+
+    def test_students_are_tracked_separately(self):
+        self.observe(0.2, 0.0, student_id="S1")
+        self.assertEqual(self.observe(0.8, 0.5, student_id="S2"), (INSIDE, None))
+        self.assertEqual(self.observe(0.8, 1.0, student_id="S1"), (INSIDE, "entry"))
+
+    def test_prune_forgets_old_sides(self):
+        self.observe(0.2, 0.0)
+        self.zone.prune(10.0)
+        self.assertEqual(self.zone.last, {})
+        self.assertEqual(self.observe(0.8, 10.5), (INSIDE, None))
+
+    def test_missing_box(self):
+        self.assertEqual(self.zone.observe("door", "S1", None, 1000, 1000, 0.0), (None, None))
+
+
+class DoorModePresenceTests(unittest.TestCase):
+    def present_student(self, tracker, seen_at):
+        state = tracker.track("S1", seen_at)
+        state.update(entry=seen_at, curr_entry=seen_at, exit=seen_at, present=True)
+        tracker.reschedule("S1")
+        return state
+
+    def test_seated_student_never_expires(self):
+        start = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+        tracker = PresenceTracker(float("inf"), 5)
+        tracker.start_session("class")
+        self.present_student(tracker, start)
+
+        self.assertEqual(tracker.expire(start + timedelta(hours=3)), [])
+        self.assertEqual([student_id for student_id, _ in tracker.start_session("next")], ["S1"])
+
+    def test_leaving_door_mode_requeues_deadlines(self):
+        start = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+        tracker = PresenceTracker(float("inf"), 5)
+        self.present_student(tracker, start)
+
+        tracker.set_absence_threshold(5)
+        self.assertEqual([student_id for student_id, _ in tracker.expire(start + timedelta(seconds=6))], ["S1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
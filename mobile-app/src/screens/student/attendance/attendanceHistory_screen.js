@@ -71,22 +71,43 @@ const AttendanceHistoryScreen = ({ navigation }) => {
   const [loading, setLoading] = useState(true);
   const [records, setRecords] = useState([]);
   const [refreshing, setRefreshing] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const [activeFilter, setActiveFilter] = useState("all");
 
   const fetchHistory = async () => {
     try {
       const res = await api.get("/attendance-history/");
-      setRecords(Array.isArray(res.data) ? res.data : []);
+      setRecords(Array.isArray(res.data?.results) ? res.data.results : []);
+      setNextCursor(res.data?.next_cursor ?? null);
     } catch (err) {
       console.log("Attendance history error:", err?.response?.status, err?.response?.data);
       setRecords([]);
+      setNextCursor(null);
     } finally {
       setLoading(false);
       setRefreshing(false);
     }
   };
 
+  // next page (cursor-paginated, newest first)
+  const fetchMore = async () => {
+    if (!nextCursor || loadingMore) return;
+
+    setLoadingMore(true);
+    try {
+      const res = await api.get("/attendance-history/", { params: { cursor: nextCursor } });
+      const page = Array.isArray(res.data?.results) ? res.data.results : [];
+      setRecords((prev) => [...prev, ...page]);
+      setNextCursor(res.data?.next_cursor ?? null);
+    } catch (err) {
+      console.log("Attendance history page error:", err?.response?.status, err?.response?.data);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchHistory();
   }, []);
@@ -235,6 +256,11 @@ const AttendanceHistoryScreen = ({ navigation }) => {
             contentContainerStyle={{ padding: 16, paddingBottom: 28 }}
             stickySectionHeadersEnabled={false}
             refreshControl={<RefreshControl refreshing={refreshing} onRefresh={onRefresh} />}
+            onEndReached={fetchMore}
+            onEndReachedThreshold={0.5}
+            ListFooterComponent={
+              loadingMore ? <ActivityIndicator style={{ marginVertical: 12 }} color={COLORS.primary} /> : null
+            }
             ListEmptyComponent={
               <View style={styles.emptyContainer}>
                 <Ionicons name="document-text-outline" size={38} color="#CBD5E1" />